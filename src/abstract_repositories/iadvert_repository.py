@@ -1,16 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Set
 from models.advert import Advert
+from dto.advert_dto import AdvertWithCategoryDTO
 from datetime import datetime
+from core.db import STREAM_FETCH_SIZE
+from core.pagination import Cursor, DEFAULT_PAGE_SIZE
 
 
 class IAdvertRepository(ABC):
     @abstractmethod
     async def create(self, advert: Advert) -> Advert: ...
     @abstractmethod
+    async def create_many(self, adverts: List[Advert]) -> List[Advert]: ...
+    @abstractmethod
     async def get_by_id(self, advert_id: int) -> Optional[Advert]: ...
     @abstractmethod
-    async def get_all_adverts(self) -> List[Advert]: ...
+    async def get_all_adverts(self, after: Optional[Cursor] = None, limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]: ...
 
     @abstractmethod
     async def get_advert_by_user(self, user_id: int) -> List[Advert]: ...
@@ -19,19 +24,48 @@ class IAdvertRepository(ABC):
     async def is_created(self, user_id: int, advert_id: int) -> bool: ...
 
     @abstractmethod
-    async def get_adverts_by_key_word(self, key_word: str) -> List[Advert]: ...
+    async def is_created_many(self, user_id: int, advert_ids: List[int]) -> Set[int]: ...
+
+    @abstractmethod
+    async def get_adverts_by_key_word(self, key_word: str, user_id: int | None = None,
+                                      after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]: ...
 
     @abstractmethod
     async def get_adverts_by_filter(self, begin_time: datetime, end_time: datetime) -> List[Advert]: ...
 
     @abstractmethod
-    async def get_adverts_by_category(self, category_id: int) -> List[Advert]: ...
+    async def get_adverts_by_category(self, category_id: int, after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]: ...
 
     @abstractmethod
-    async def delete_advert(self, advert_id: int, user_id: int) -> None: ...
-    async def delete(self, advert_id: int) -> None: ...
+    async def delete_advert(self, advert_id: int, user_id: int) -> bool: ...
 
     @abstractmethod
-    async def get_all_with_full_info(self, user_id: int | None = None): ...
+    async def get_all_with_full_info(self, user_id: int | None = None, after: Optional[Cursor] = None,
+                                     limit: int = DEFAULT_PAGE_SIZE): ...
+
+    async def get_all_by_category_authorized(self, category_id: int, user_id: int | None,
+                                             after: Optional[Cursor] = None, limit: int = DEFAULT_PAGE_SIZE) : ...
 
-    async def get_all_by_category_authorized(self, category_id: int, user_id: int) : ...
\ No newline at end of file
+    # потоковые варианты списков: серверный курсор вместо загрузки всего результата
+    @abstractmethod
+    def iter_all_adverts(self, after: Optional[Cursor] = None,
+                         fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[Advert]: ...
+
+    @abstractmethod
+    def iter_adverts_by_category(self, category_id: int, after: Optional[Cursor] = None,
+                                 fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[Advert]: ...
+
+    @abstractmethod
+    def iter_all_with_full_info(self, user_id: int | None = None, after: Optional[Cursor] = None,
+                                fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[AdvertWithCategoryDTO]: ...
+
+    @abstractmethod
+    def iter_all_by_category_authorized(self, category_id: int, user_id: int | None,
+                                        after: Optional[Cursor] = None,
+                                        fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[AdvertWithCategoryDTO]: ...
+
+    @abstractmethod
+    def iter_adverts_by_key_word(self, key_word: str, user_id: int | None = None, after: Optional[Cursor] = None,
+                                 fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[AdvertWithCategoryDTO]: ...
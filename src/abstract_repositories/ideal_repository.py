@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Set
 from models.advert import Advert
 from models.deal import Deal
 
@@ -12,4 +12,10 @@ class IDealRepository(ABC):
     async def get_deals_by_user(self, user_id: int) -> List[Advert]: ...
 
     @abstractmethod
-    async def is_in_deals(self, user_id: int, advert_id: int) -> bool: ...
\ No newline at end of file
+    async def is_in_deals(self, user_id: int, advert_id: int) -> bool: ...
+
+    @abstractmethod
+    async def is_in_deals_many(self, user_id: int, advert_ids: List[int]) -> Set[int]: ...
+
+    @abstractmethod
+    async def get_bought_ids(self, user_id: int) -> Optional[List[int]]: ...
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
+from dto.like_dto import LikeToggleResult
 from models.advert import Advert
 from models.liked import Liked
 
@@ -9,10 +10,19 @@ class ILikedRepository(ABC):
     async def add_to_liked(self, id_advert: int, id_user: int) -> Optional[Liked]: ...
 
     @abstractmethod
-    async def remove_from_liked(self, user_id: int, advert_id: int): ...
+    async def remove_from_liked(self, user_id: int, advert_id: int) -> None: ...
+
+    @abstractmethod
+    async def toggle_likes(self, user_id: int, toggles: Dict[int, bool]) -> LikeToggleResult: ...
 
     @abstractmethod
     async def get_liked_by_user(self, id_user: int)-> List[Advert]: ...
 
     @abstractmethod
-    async def is_liked(self, user_id: int, advert_id: int) -> bool: ...
\ No newline at end of file
+    async def is_liked(self, user_id: int, advert_id: int) -> bool: ...
+
+    @abstractmethod
+    async def is_liked_many(self, user_id: int, advert_ids: List[int]) -> Set[int]: ...
+
+    @abstractmethod
+    async def get_liked_ids(self, user_id: int) -> Optional[List[int]]: ...
@@ -13,4 +13,5 @@ class IUserRepository(ABC):
     @abstractmethod
     async def find_by_email(self, db: AsyncSession, email: str) -> User | None: ...
 
-
+    @abstractmethod
+    async def update_password(self, profile_id: int, password_hash: str) -> bool: ...
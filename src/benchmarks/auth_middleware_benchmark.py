@@ -0,0 +1,120 @@
+"""
+Накладные расходы middleware add_user_to_request на запрос: до и после
+ленивого определения пользователя и кэша проверенных токенов.
+
+Сравниваются:
+  * none  — приложение без middleware (база для вычитания);
+  * eager — прежний вариант: decode_token на каждый запрос;
+  * lazy  — LazyUser + VerifiedTokenCache.
+Для каждого варианта три маршрута: /ping не читает пользователя, /role только
+выбирает роль БД, как get_request_locator (по проверенному токену), /me читает
+пользователя. Кэш проверенных токенов очищается перед каждым
+запросом, если передан --cold: так видна цена самой проверки JWT.
+
+    python -m benchmarks.auth_middleware_benchmark --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+import httpx
+from fastapi import FastAPI, Request
+
+from core.create_jwt import JWTManager
+from core.current_user import LazyUser
+from core.token_cache import token_cache
+from service_locator import request_role
+
+
+PATHS = ("/ping", "/role", "/me")
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    if variant == "eager":
+        @app.middleware("http")
+        async def eager_user(request: Request, call_next):
+            token = request.cookies.get("access_token")
+            request.state.user = None
+            if token:
+                try:
+                    payload = JWTManager.decode_token(token)
+                    request.state.user = {
+                        "id": payload.get("id"),
+                        "email": payload.get("sub"),
+                        "role": payload.get("role"),
+                    }
+                except Exception:
+                    request.state.user = None
+            return await call_next(request)
+
+    elif variant == "lazy":
+        @app.middleware("http")
+        async def lazy_user(request: Request, call_next):
+            request.state.user = LazyUser(request.cookies.get("access_token"))
+            return await call_next(request)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/role")
+    async def role(request: Request):
+        return {"role": request_role(request) if hasattr(request.state, "user") else None}
+
+    @app.get("/me")
+    async def me(request: Request):
+        user = getattr(request.state, "user", None)
+        return {"id": user["id"] if user else None}
+
+    return app
+
+
+async def time_requests(app: FastAPI, path: str, cookies: dict, count: int, cold: bool) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies) as client:
+        for _ in range(50):
+            await client.get(path)
+        elapsed = 0.0
+        for _ in range(count):
+            if cold:
+                token_cache.clear()
+            started = time.perf_counter()
+            await client.get(path)
+            elapsed += time.perf_counter() - started
+        return elapsed / count * 1_000_000
+
+
+async def run(count: int, cold: bool) -> dict:
+    token = JWTManager.create_access_token({"sub": "bench@example.com", "id": 1, "role": "authorized_user"},
+                                           timedelta(hours=1))
+    cookies = {"access_token": token}
+    per_request = {}
+    for variant in ("none", "eager", "lazy"):
+        token_cache.clear()
+        app = build_app(variant)
+        for path in PATHS:
+            per_request[f"{variant}{path}"] = await time_requests(app, path, cookies, count, cold)
+
+    report = {"requests": count, "cold_token_cache": cold, "us_per_request": {k: round(v, 2) for k, v in per_request.items()}}
+    report["middleware_overhead_us"] = {
+        f"{variant}{path}": round(per_request[f"{variant}{path}"] - per_request[f"none{path}"], 2)
+        for variant in ("eager", "lazy")
+        for path in PATHS
+    }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--cold", action="store_true", help="очищать кэш проверенных токенов перед запросом")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests, args.cold)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
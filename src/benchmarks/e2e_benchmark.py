@@ -0,0 +1,273 @@
+"""
+Сквозной бенчмарк: маршруты -> сервисы -> репозитории -> PostgreSQL.
+
+Приложение main.app поднимается в процессе и опрашивается через ASGI-транспорт httpx
+(без сети и uvicorn), так что в замер попадают middleware, зависимости, сервисы,
+SQL и шаблоны. Для каждого размера каталога замеряются пропускная способность
+и p50/p95/p99 задержки маршрутов:
+
+  * GET  /                         — аноним (через кэш страниц) и авторизованный;
+  * GET  /category/{id}            — аноним и авторизованный;
+  * GET  /search?q=...             — авторизованный;
+  * POST /login                    — с настоящим хэшем пароля;
+  * GET/POST /profile/create_advert — форма и создание объявления.
+
+Объявления дописываются в рабочие таблицы adv.* от имени тестовых продавцов
+(email bench-N@bench.local) до нужного размера и удаляются в конце. Запускать
+только против локальной базы с применёнными миграциями и хотя бы одной категорией.
+Запуск из каталога src:
+
+    python -m benchmarks.e2e_benchmark --sizes 10000 100000 --requests 300 --concurrency 16 --output e2e.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.category_cache import category_cache
+from core.db import DATABASES, pool_manager
+from core.page_cache import page_cache
+from core.passwords import password_hasher
+
+BENCH_EMAIL = "bench-{}@bench.local"
+BENCH_PASSWORD = "bench-password"
+SELLERS = 50
+
+WORDS = [
+    "велосипед", "телефон", "диван", "квартира", "ноутбук", "куртка", "коляска", "гитара",
+    "холодильник", "книга", "шкаф", "машина", "ремонт", "новый", "старый", "отличный",
+    "продам", "срочно", "дешево", "подарок", "детский", "зимний", "кожаный", "игровой",
+]
+TERMS = ["велосипед", "телефон", "детская коляска", "зимняя куртка", "игровой ноутбук"]
+
+CREATE_SELLERS = text("""
+    WITH profile AS (
+        INSERT INTO adv.profiles (nickname, fio, email, phone_number, password)
+        SELECT 'bench' || g, 'Bench Seller ' || g, 'bench-' || g || '@bench.local', '0', :password
+        FROM generate_series(1, :count) AS g
+        RETURNING id
+    ), customer AS (
+        INSERT INTO adv.customers (profile_id, rating) SELECT id, 0 FROM profile
+    )
+    INSERT INTO adv.sellers (profile_id, rating) SELECT id, 0 FROM profile
+""")
+
+BENCH_PROFILES = text("SELECT id FROM adv.profiles WHERE email LIKE '%@bench.local' ORDER BY id")
+BENCH_SELLERS = text("SELECT s.id FROM adv.sellers s WHERE s.profile_id = ANY(:profiles) ORDER BY s.id")
+COUNT_ADVERTS = text("SELECT count(*) FROM adv.adverts WHERE id_seller = ANY(:sellers)")
+CATEGORY_IDS = text("SELECT id FROM adv.categories ORDER BY id")
+
+# объявления генерируются на стороне сервера, одним INSERT ... SELECT на размер
+INSERT_ADVERTS = text("""
+    INSERT INTO adv.adverts (content, description, id_category, price, status, id_seller, date_created)
+    SELECT w[1 + (random() * (array_length(w, 1) - 1))::int] || ' ' ||
+           w[1 + (random() * (array_length(w, 1) - 1))::int],
+           w[1 + (random() * (array_length(w, 1) - 1))::int] || ' ' ||
+           w[1 + (random() * (array_length(w, 1) - 1))::int] || ' ' ||
+           w[1 + (random() * (array_length(w, 1) - 1))::int],
+           c[1 + g % array_length(c, 1)],
+           100 + (random() * 100000)::int,
+           1,
+           s[1 + g % array_length(s, 1)],
+           now() - (g || ' seconds')::interval
+    FROM generate_series(:start, :stop) AS g,
+         (SELECT CAST(:words AS text[]) AS w, CAST(:categories AS int[]) AS c, CAST(:sellers AS int[]) AS s) AS src
+""")
+
+# POST /profile/create_advert пишет id профиля в id_seller, поэтому чистим по обоим спискам
+CLEANUP = [
+    "DELETE FROM adv.likes WHERE id_advert IN "
+    "(SELECT id FROM adv.adverts WHERE id_seller = ANY(:sellers) OR id_seller = ANY(:profiles))",
+    "DELETE FROM adv.deals WHERE id_advert IN "
+    "(SELECT id FROM adv.adverts WHERE id_seller = ANY(:sellers) OR id_seller = ANY(:profiles))",
+    "DELETE FROM adv.adverts WHERE id_seller = ANY(:sellers) OR id_seller = ANY(:profiles)",
+    "DELETE FROM adv.sellers WHERE profile_id = ANY(:profiles)",
+    "DELETE FROM adv.customers WHERE profile_id = ANY(:profiles)",
+    "DELETE FROM adv.profiles WHERE id = ANY(:profiles)",
+]
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """p-й перцентиль (метод ближайшего ранга) уже отсортированной выборки."""
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: list[float], elapsed: float, errors: int) -> dict:
+    ordered = sorted(samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+    }
+
+
+class Catalog:
+    """Тестовые продавцы и их объявления в adv.*."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.profiles: list[int] = []
+        self.sellers: list[int] = []
+        self.categories: list[int] = []
+
+    async def prepare(self) -> None:
+        async with self.engine.begin() as conn:
+            self.categories = list((await conn.execute(CATEGORY_IDS)).scalars())
+            if not self.categories:
+                raise SystemExit("в adv.categories нет ни одной категории")
+            self.profiles = list((await conn.execute(BENCH_PROFILES)).scalars())
+            if not self.profiles:
+                password = password_hasher.hash_sync(BENCH_PASSWORD)
+                await conn.execute(CREATE_SELLERS, {"password": password, "count": SELLERS})
+                self.profiles = list((await conn.execute(BENCH_PROFILES)).scalars())
+            self.sellers = list((await conn.execute(BENCH_SELLERS, {"profiles": self.profiles})).scalars())
+
+    async def grow_to(self, size: int) -> None:
+        """Дописывает объявления тестовых продавцов до size штук."""
+        async with self.engine.begin() as conn:
+            current = (await conn.execute(COUNT_ADVERTS, {"sellers": self.sellers})).scalar_one()
+            if current < size:
+                await conn.execute(INSERT_ADVERTS, {
+                    "start": current + 1, "stop": size, "words": WORDS,
+                    "categories": self.categories, "sellers": self.sellers,
+                })
+            await conn.execute(text("ANALYZE adv.adverts"))
+            await conn.execute(text("ANALYZE adv.advert_feed"))
+        # данные залиты мимо сервисов — кэши о них не знают
+        page_cache.invalidate()
+        category_cache.invalidate()
+
+    async def cleanup(self) -> None:
+        async with self.engine.begin() as conn:
+            for statement in CLEANUP:
+                await conn.execute(text(statement), {"sellers": self.sellers, "profiles": self.profiles})
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    response = await client.post("/login", data={"email": BENCH_EMAIL.format(1), "password": BENCH_PASSWORD})
+    token = response.cookies.get("access_token")
+    if response.status_code != 303 or not token:
+        raise SystemExit(f"не удалось войти тестовым пользователем: {response.status_code}")
+    return token
+
+
+async def measure(client: httpx.AsyncClient, send, total: int, concurrency: int) -> dict:
+    """total запросов send(client, i), не больше concurrency одновременно."""
+    samples: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await send(client, i)
+            samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - started, errors)
+
+
+def scenarios(categories: list[int]) -> dict:
+    """Имя сценария -> (нужна ли авторизация, функция client, i -> ответ)."""
+    def category(i):
+        return categories[i % len(categories)]
+
+    return {
+        "GET / anonymous": (False, lambda c, i: c.get("/")),
+        "GET / authorized": (True, lambda c, i: c.get("/")),
+        "GET /category/{id} anonymous": (False, lambda c, i: c.get(f"/category/{category(i)}")),
+        "GET /category/{id} authorized": (True, lambda c, i: c.get(f"/category/{category(i)}")),
+        "GET /search": (True, lambda c, i: c.get("/search", params={"q": TERMS[i % len(TERMS)]})),
+        "POST /login": (False, lambda c, i: c.post(
+            "/login", data={"email": BENCH_EMAIL.format(1 + i % SELLERS), "password": BENCH_PASSWORD}
+        )),
+        "GET /profile/create_advert": (True, lambda c, i: c.get("/profile/create_advert")),
+        "POST /profile/create_advert": (True, lambda c, i: c.post("/profile/create_advert", data={
+            "content": f"bench {WORDS[i % len(WORDS)]}", "description": "bench", "price": 1000 + i,
+            "id_category": category(i),
+        })),
+    }
+
+
+async def run(sizes: list[int], total: int, concurrency: int, keep: bool) -> dict:
+    from main import app
+
+    engine = create_async_engine(DATABASES["admin"])
+    catalog = Catalog(engine)
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "requests": total,
+        "concurrency": concurrency,
+        "results": [],
+    }
+    try:
+        await catalog.prepare()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as anonymous:
+            token = await login(anonymous)
+            anonymous.cookies.clear()
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                         cookies={"access_token": token}) as authorized:
+                for size in sorted(sizes):
+                    await catalog.grow_to(size)
+                    routes = {}
+                    for name, (auth, send) in scenarios(catalog.categories).items():
+                        client = authorized if auth else anonymous
+                        routes[name] = await measure(client, send, total, concurrency)
+                        # POST /login ставит cookie — анонимный клиент должен остаться анонимным
+                        anonymous.cookies.clear()
+                    report["results"].append({"adverts": size, "routes": routes})
+    finally:
+        if not keep:
+            await catalog.cleanup()
+        await engine.dispose()
+        await pool_manager.dispose()
+        password_hasher.shutdown()
+    return report
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=300, help="запросов на маршрут и размер")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--keep", action="store_true", help="не удалять тестовые данные в конце")
+    parser.add_argument("--output", help="куда сохранить JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.sizes, args.requests, args.concurrency, args.keep))
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Пропускная способность запросов при включённом журнале: print() против logging.
+
+Приложение в процессе опрашивается через ASGI-транспорт httpx; каждый запрос
+пишет --records записей. Приёмник журнала — поток, запись в который занимает
+--sink-delay-ms (медленный диск, переполненный pipe у сборщика логов).
+Сравниваются:
+  * none  — без журнала (база);
+  * print — прежний print() прямо в приёмник, в потоке обработчика;
+  * sync  — logging со StreamHandler в приёмник, тоже в потоке обработчика;
+  * queue — core.log: запись в очередь, форматирование и вывод в фоновом потоке.
+
+    python -m benchmarks.logging_benchmark --requests 2000 --concurrency 16 --sink-delay-ms 0.2
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from core.log import JsonFormatter, setup_logging, stop_logging
+
+VARIANTS = ("none", "print", "sync", "queue")
+
+logger = logging.getLogger("bench.logging")
+# клиент httpx пишет INFO на каждый запрос — в замер попадали бы и его записи
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class SlowSink(io.StringIO):
+    """Поток, каждая запись в который занимает delay секунд."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, s: str) -> int:
+        self.writes += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return super().write(s)
+
+
+def build_app(variant: str, sink: SlowSink, records: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/item/{item_id}")
+    async def item(item_id: int):
+        for i in range(records):
+            if variant == "print":
+                print(f"Запрос объявления {item_id}: шаг {i}", file=sink)
+            elif variant in ("sync", "queue"):
+                logger.info("Запрос объявления %s: шаг %s", item_id, i, extra={"item_id": item_id})
+        return {"id": item_id}
+
+    return app
+
+
+def configure(variant: str, sink: SlowSink) -> None:
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if variant == "sync":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(JsonFormatter())
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    elif variant == "queue":
+        setup_logging(level="INFO", levels={}, sampling={}, stream=sink, fmt="json")
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_variant(variant: str, requests: int, concurrency: int, records: int, delay: float) -> dict:
+    sink = SlowSink(delay)
+    configure(variant, sink)
+    app = build_app(variant, sink, records)
+    transport = httpx.ASGITransport(app=app)
+    samples: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(20):
+            await client.get(f"/item/{i}")
+        pending = iter(range(requests))
+
+        async def worker():
+            for i in pending:
+                started = time.perf_counter()
+                await client.get(f"/item/{i}")
+                samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    # очередь дописывается уже после замера: это и есть выигрыш фонового потока
+    configure("none", sink)
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "written": sink.writes,
+    }
+
+
+async def run(requests: int, concurrency: int, records: int, delay_ms: float) -> dict:
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "records_per_request": records,
+        "sink_delay_ms": delay_ms,
+        "variants": {variant: await run_variant(variant, requests, concurrency, records, delay_ms / 1000)
+                     for variant in VARIANTS},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--records", type=int, default=2, help="записей журнала на запрос")
+    parser.add_argument("--sink-delay-ms", type=float, default=0.2)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests, args.concurrency, args.records, args.sink_delay_ms)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Пропускная способность логина и задержка остальных запросов, пока идёт хэширование паролей.
+
+Сравниваются:
+  * inline   — хэш считается прямо в event loop (как было бы без пула);
+  * executor — PasswordHasher с ограниченным пулом потоков.
+Одновременно с потоком логинов клиент дёргает лёгкий /ping и замеряет его p50/p99.
+БД не нужна: AuthService работает поверх репозитория в памяти.
+
+    python -m benchmarks.login_benchmark --logins 200 --concurrency 16 --iterations 600000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, Form, HTTPException
+
+from core.passwords import PasswordHasher
+from core.revocation import InMemoryRevocationBackend, RevocationStore
+from models.user import User
+from services.auth_service import AuthService
+
+PING_INTERVAL = 0.005
+
+
+class InlinePasswordHasher(PasswordHasher):
+    """Тот же PasswordHasher, но без пула: вычисление блокирует event loop."""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+class MemoryUserRepository:
+    def __init__(self, users: dict[str, User]):
+        self.users = users
+
+    async def find_by_email(self, db, email: str):
+        return self.users.get(email)
+
+    async def update_password(self, profile_id: int, password_hash: str) -> bool:
+        return True
+
+
+def build_app(hasher: PasswordHasher, users: dict[str, User]) -> FastAPI:
+    app = FastAPI()
+    service = AuthService(MemoryUserRepository(users), RevocationStore(InMemoryRevocationBackend()), hasher)
+
+    @app.post("/login")
+    async def login(email: str = Form(...), password: str = Form(...)):
+        try:
+            return {"token": await service.login(None, email, password)}
+        except ValueError:
+            raise HTTPException(status_code=401)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_variant(hasher: PasswordHasher, users: dict[str, User], logins: int, concurrency: int) -> dict:
+    app = build_app(hasher, users)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(logins):
+            queue.put_nowait(i)
+        done = asyncio.Event()
+
+        async def login_worker():
+            while not queue.empty():
+                queue.get_nowait()
+                response = await client.post("/login", data={"email": "bench@example.com", "password": "secret"})
+                response.raise_for_status()
+
+        ping_latencies = []
+
+        async def pinger():
+            # задержка считается от момента, когда запрос должен был уйти, — иначе
+            # заблокированный event loop откладывает и сам замер (coordinated omission)
+            while not done.is_set():
+                intended = time.perf_counter() + PING_INTERVAL
+                await asyncio.sleep(PING_INTERVAL)
+                await client.get("/ping")
+                ping_latencies.append((time.perf_counter() - intended) * 1000)
+
+        ping_task = asyncio.create_task(pinger())
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ping_task
+
+    hasher.shutdown()
+    return {
+        "logins_per_second": round(logins / elapsed, 1),
+        "ping_samples": len(ping_latencies),
+        "ping_p50_ms": round(statistics.median(ping_latencies), 2),
+        "ping_p99_ms": round(percentile(ping_latencies, 0.99), 2),
+    }
+
+
+async def run(logins: int, concurrency: int, iterations: int, workers: int) -> dict:
+    stored = PasswordHasher(iterations=iterations).hash_sync("secret")
+    users = {"bench@example.com": User(id=1, nickname="bench", fio="Bench", email="bench@example.com",
+                                       phone_number="0", password=stored)}
+    report = {"logins": logins, "concurrency": concurrency, "iterations": iterations, "workers": workers}
+    report["inline"] = await run_variant(InlinePasswordHasher(iterations), users, logins, concurrency)
+    report["executor"] = await run_variant(PasswordHasher(iterations, workers), users, logins, concurrency)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=600_000)
+    parser.add_argument("--workers", type=int, default=PasswordHasher().max_workers)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.logins, args.concurrency, args.iterations, args.workers)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
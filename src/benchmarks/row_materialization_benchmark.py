@@ -0,0 +1,118 @@
+"""
+Скорость превращения строк БД в объекты (строк в секунду) для разных подходов.
+
+Сравниваются:
+  * validate        — Model(**row), полная валидация Pydantic (как было);
+  * model_validate  — Model.model_validate(row);
+  * construct       — Model.model_construct(**row), без валидации, но на чистом Python;
+  * slots           — класс с __slots__, поля по имени;
+  * namedtuple      — namedtuple(**row);
+  * trusted_row     — core.rows: кортежный тип строки, поля по позициям одним itemgetter;
+  * trusted_to_dict — trusted_row + model_dump(), как на границе JSON API;
+  * dict            — просто dict(row), для сравнения.
+Строки — Row/RowMapping из настоящего Result SQLAlchemy (SQLite в памяти), как в репозиториях.
+
+    python -m benchmarks.row_materialization_benchmark --rows 20000
+"""
+import argparse
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import Boolean, DateTime, create_engine, text
+
+from core.rows import row_factory
+from dto.advert_dto import AdvertWithCategoryDTO
+from dto.rows import AdvertWithCategoryRow
+
+FEED_COLUMNS = ["id", "content", "description", "id_category", "category_name", "price", "status",
+                "id_seller", "seller_name", "date_created", "is_favorite", "is_bought", "is_created"]
+COLUMN_TYPES = {"content": "TEXT", "description": "TEXT", "category_name": "TEXT", "seller_name": "TEXT",
+                "date_created": "TIMESTAMP", "is_favorite": "BOOLEAN", "is_bought": "BOOLEAN", "is_created": "BOOLEAN"}
+
+
+def load_rows(count: int) -> tuple[list, list]:
+    """count строк ленты: (список Row, список RowMapping)."""
+    engine = create_engine("sqlite://")
+    started = datetime(2025, 1, 1)
+    columns = ", ".join(f"{name} {COLUMN_TYPES.get(name, 'INTEGER')}" for name in FEED_COLUMNS)
+    with engine.connect() as conn:
+        conn.execute(text(f"CREATE TABLE feed ({columns})"))
+        conn.execute(
+            text(f"INSERT INTO feed VALUES ({', '.join(':' + c for c in FEED_COLUMNS)})"),
+            [{
+                "id": i, "content": f"Объявление {i}", "description": "Описание " * 10, "id_category": i % 20,
+                "category_name": "Электроника", "price": 1000 + i, "status": 1, "id_seller": i % 500,
+                "seller_name": "Продавец", "date_created": started + timedelta(minutes=i),
+                "is_favorite": False, "is_bought": False, "is_created": False,
+            } for i in range(count)],
+        )
+        # типы колонок как у asyncpg: datetime и bool, а не строки и числа SQLite
+        query = text("SELECT * FROM feed").columns(date_created=DateTime, is_favorite=Boolean,
+                                                   is_bought=Boolean, is_created=Boolean)
+        rows = conn.execute(query).all()
+    return rows, [row._mapping for row in rows]
+
+
+class FeedSlots:
+    __slots__ = tuple(FEED_COLUMNS)
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+
+FeedTuple = namedtuple("FeedTuple", FEED_COLUMNS)
+
+
+def trusted_rows(model, rows):
+    make = row_factory(AdvertWithCategoryRow, rows[0]._fields)
+    return [make(row) for row in rows]
+
+
+# подход -> (принимает Row или RowMapping, функция)
+APPROACHES = {
+    "validate": ("mapping", lambda model, rows: [model(**row) for row in rows]),
+    "model_validate": ("mapping", lambda model, rows: [model.model_validate(row) for row in rows]),
+    "construct": ("mapping", lambda model, rows: [model.model_construct(**row) for row in rows]),
+    "slots": ("mapping", lambda model, rows: [FeedSlots(**row) for row in rows]),
+    "namedtuple": ("mapping", lambda model, rows: [FeedTuple(**row) for row in rows]),
+    "trusted_row": ("row", trusted_rows),
+    "trusted_to_dict": ("row", lambda model, rows: [row.model_dump() for row in trusted_rows(model, rows)]),
+    "dict": ("mapping", lambda model, rows: [dict(row) for row in rows]),
+}
+
+
+def rows_per_second(fn, model, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(model, rows)
+        best = min(best, time.perf_counter() - started)
+    return len(rows) / best
+
+
+def run(count: int, repeat: int) -> dict:
+    rows, mappings = load_rows(count)
+    report = {"rows": count, "rows_per_second": {}}
+    for name, (kind, fn) in APPROACHES.items():
+        data = rows if kind == "row" else mappings
+        report["rows_per_second"][name] = round(rows_per_second(fn, AdvertWithCategoryDTO, data, repeat))
+    base = report["rows_per_second"]["validate"]
+    report["speedup_vs_validate"] = {
+        name: round(value / base, 2) for name, value in report["rows_per_second"].items()
+    }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Сравнение поиска %LIKE% (как в adv.search_adverts) с полнотекстовым поиском
+по GIN-индексу на 100k и 1M объявлений.
+
+Данные генерируются во временной схеме bench_search, рабочие таблицы adv.* не трогаются.
+Запуск из каталога src:
+
+    python -m benchmarks.search_benchmark --sizes 100000 1000000 --repeat 20 --output search.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.db import DATABASES
+
+WORDS = [
+    "велосипед", "телефон", "диван", "квартира", "ноутбук", "куртка", "коляска", "гитара",
+    "холодильник", "книга", "шкаф", "машина", "ремонт", "новый", "старый", "отличный",
+    "продам", "срочно", "дешево", "подарок", "детский", "зимний", "кожаный", "игровой",
+]
+TERMS = ["велосипед", "телефоны", "детская коляска", "зимняя куртка", "игровой ноутбук"]
+
+SETUP = [
+    "DROP SCHEMA IF EXISTS bench_search CASCADE",
+    "CREATE SCHEMA bench_search",
+    """
+    CREATE TABLE bench_search.adverts AS
+    SELECT g AS id,
+           w[1 + (random() * (array_length(w, 1) - 1))::int] || ' ' ||
+           w[1 + (random() * (array_length(w, 1) - 1))::int] AS content,
+           w[1 + (random() * (array_length(w, 1) - 1))::int] || ' ' ||
+           w[1 + (random() * (array_length(w, 1) - 1))::int] || ' ' ||
+           w[1 + (random() * (array_length(w, 1) - 1))::int] AS description,
+           now() - (g || ' seconds')::interval AS date_created
+    FROM generate_series(1, :size) AS g, (SELECT CAST(:words AS text[]) AS w) AS words
+    """,
+    """
+    ALTER TABLE bench_search.adverts ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(content, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ON bench_search.adverts USING GIN (search_vector)",
+    "ANALYZE bench_search.adverts",
+]
+
+# то, что делает adv.search_adverts: подстрока %term% по обоим полям, без ранжирования и лимита
+LIKE_QUERY = text("""
+    SELECT id, content, description, date_created FROM bench_search.adverts
+    WHERE content ILIKE :kw OR description ILIKE :kw
+    ORDER BY date_created DESC
+""")
+
+FTS_QUERY = text("""
+    SELECT a.id, a.content, a.description, a.date_created,
+           ts_rank_cd(a.search_vector, q.query) AS rank
+    FROM bench_search.adverts a, websearch_to_tsquery('russian', :kw) AS q(query)
+    WHERE a.search_vector @@ q.query
+    ORDER BY rank DESC, a.date_created DESC, a.id DESC
+    LIMIT :limit
+""")
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+async def measure(conn, query, params_for_term, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        for term in TERMS:
+            started = time.perf_counter()
+            result = await conn.execute(query, params_for_term(term))
+            result.all()
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def run(sizes: list[int], repeat: int, limit: int) -> list[dict]:
+    engine = create_async_engine(DATABASES["admin"])
+    report = []
+    try:
+        for size in sizes:
+            async with engine.begin() as conn:
+                for statement in SETUP:
+                    await conn.execute(text(statement), {"size": size, "words": WORDS})
+
+            async with engine.connect() as conn:
+                like = await measure(conn, LIKE_QUERY, lambda term: {"kw": f"%{term}%"}, repeat)
+                fts = await measure(conn, FTS_QUERY, lambda term: {"kw": term, "limit": limit}, repeat)
+            report.append({"adverts": size, "like": summarize(like), "fulltext": summarize(fts)})
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA IF EXISTS bench_search CASCADE"))
+    finally:
+        await engine.dispose()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--output", help="куда сохранить JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.sizes, args.repeat, args.limit))
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Генератор синтетических данных для схемы adv: профили, покупатели, продавцы,
+категории, объявления, избранное и сделки — миллионы строк за минуты.
+
+Строки генерируются пачками в пуле процессов и заливаются через COPY
+(asyncpg copy_records_to_table) в несколько соединений параллельно, а не по одному
+INSERT через репозитории. id профилей и объявлений резервируются блоками в тех же
+последовательностях, что использует приложение (core.id_allocator), поэтому данные
+можно доливать в живую базу; id избранного и сделок выдаёт DEFAULT nextval.
+
+Распределения:
+  * популярность категорий — Zipf с показателем --category-skew;
+  * объявления по продавцам и лайки по объявлениям — степенной перекос к «популярным»;
+  * число лайков у пользователя — Парето с показателем --likes-alpha (у большинства
+    несколько, у единиц сотни), не больше --max-likes;
+  * тексты — русские названия и описания из словаря.
+Один --seed даёт одни и те же данные при любом числе процессов.
+Все пользователи получают пароль --password (хэш считается один раз).
+
+    python -m benchmarks.seed_data --users 200000 --adverts 1000000 --workers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Callable, Iterator, Sequence
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.db import DATABASES
+from core.id_allocator import SEQUENCES, IdBlockAllocator
+from core.passwords import password_hasher
+
+FIRST_NAMES = [
+    ("Александр", "Анна"), ("Дмитрий", "Мария"), ("Максим", "Елена"), ("Сергей", "Ольга"),
+    ("Андрей", "Наталья"), ("Алексей", "Татьяна"), ("Иван", "Екатерина"), ("Михаил", "Ирина"),
+    ("Никита", "Светлана"), ("Павел", "Юлия"), ("Егор", "Дарья"), ("Артём", "Полина"),
+]
+LAST_NAMES = [
+    ("Иванов", "Иванова"), ("Смирнов", "Смирнова"), ("Кузнецов", "Кузнецова"), ("Попов", "Попова"),
+    ("Васильев", "Васильева"), ("Петров", "Петрова"), ("Соколов", "Соколова"), ("Михайлов", "Михайлова"),
+    ("Новиков", "Новикова"), ("Фёдоров", "Фёдорова"), ("Морозов", "Морозова"), ("Волков", "Волкова"),
+]
+PATRONYMICS = [
+    ("Александрович", "Александровна"), ("Сергеевич", "Сергеевна"), ("Андреевич", "Андреевна"),
+    ("Дмитриевич", "Дмитриевна"), ("Игоревич", "Игоревна"), ("Викторович", "Викторовна"),
+]
+CATEGORIES = [
+    "Электроника", "Одежда и обувь", "Детские товары", "Мебель", "Бытовая техника", "Транспорт",
+    "Недвижимость", "Спорт и отдых", "Хобби", "Книги", "Музыкальные инструменты", "Ремонт и стройка",
+    "Животные", "Красота и здоровье", "Сад и огород", "Посуда", "Компьютеры", "Телефоны",
+    "Игры и приставки", "Фототехника", "Часы и украшения", "Коллекционирование", "Услуги", "Работа",
+]
+ITEMS = [
+    "велосипед", "телефон", "диван", "ноутбук", "куртка", "коляска", "гитара", "холодильник",
+    "шкаф", "самокат", "пылесос", "планшет", "комод", "сапоги", "пальто", "монитор", "стол",
+    "фотоаппарат", "телевизор", "рюкзак", "кресло", "палатка", "электрогитара", "приставка",
+]
+ADJECTIVES = [
+    "новый", "почти новый", "б/у", "отличный", "детский", "зимний", "кожаный", "игровой",
+    "складной", "винтажный", "компактный", "мощный", "удобный", "редкий",
+]
+PHRASES = [
+    "Продаю в связи с переездом.", "Состояние отличное, без царапин.", "Пользовались аккуратно.",
+    "Полный комплект, есть документы.", "Торг уместен.", "Самовывоз от метро.",
+    "Возможна доставка по городу.", "Отдам быстро и недорого.", "Есть небольшие следы использования.",
+    "Гарантия ещё действует.", "Покупали в прошлом году.", "Обмен не интересует.",
+]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург", "Нижний Новгород", "online"]
+
+PROFILE_COLUMNS = ["id", "nickname", "fio", "email", "phone_number", "password"]
+ADVERT_COLUMNS = ["id", "content", "description", "id_category", "price", "status", "id_seller", "date_created"]
+LIKE_COLUMNS = ["id_customer", "id_advert", "date_created"]
+DEAL_COLUMNS = ["id_customer", "id_advert", "date_created", "status", "address"]
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    users: int = 100_000
+    seller_share: float = 0.2
+    categories: int = len(CATEGORIES)
+    adverts: int = 1_000_000
+    category_skew: float = 1.1
+    popularity_skew: float = 3.0
+    likes_alpha: float = 1.5
+    max_likes: int = 500
+    deal_share: float = 0.3
+    days: int = 365
+    batch_size: int = 20_000
+    workers: int = os.cpu_count() or 4
+    seed: int = 42
+    password: str = "password"
+
+
+# -----------------
+# Генерация пачек (в процессах пула)
+# -----------------
+_shared: dict = {}
+
+
+def _init_worker(shared: dict) -> None:
+    """Общие для всех пачек данные передаются в процесс один раз, а не с каждой задачей."""
+    _shared.update(shared)
+
+
+def _rng(config: SeedConfig, table: str, batch: int) -> random.Random:
+    return random.Random(f"{config.seed}:{table}:{batch}")
+
+
+def _skewed(rng: random.Random, items: Sequence[int], skew: float) -> int:
+    """Элемент items со степенным перекосом к началу списка."""
+    return items[int(len(items) * rng.random() ** skew)]
+
+
+def _moment(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def profile_batch(config: SeedConfig, batch: int, ids: Sequence[int], password: str) -> list[tuple]:
+    rng = _rng(config, "profiles", batch)
+    rows = []
+    for profile_id in ids:
+        female = rng.random() < 0.5
+        first = rng.choice(FIRST_NAMES)[female]
+        fio = f"{rng.choice(LAST_NAMES)[female]} {first} {rng.choice(PATRONYMICS)[female]}"
+        phone = f"+7 9{rng.randrange(10, 100)} {rng.randrange(100, 1000)}-{rng.randrange(10, 100)}-{rng.randrange(10, 100)}"
+        rows.append((profile_id, f"user{profile_id}", fio, f"user{profile_id}@seed.local", phone, password))
+    return rows
+
+
+def advert_batch(config: SeedConfig, batch: int, ids: Sequence[int], now: datetime) -> list[tuple]:
+    rng = _rng(config, "adverts", batch)
+    categories, weights, sellers = _shared["categories"], _shared["category_weights"], _shared["sellers"]
+    rows = []
+    for advert_id, category in zip(ids, rng.choices(categories, cum_weights=weights, k=len(ids))):
+        item = rng.choice(ITEMS)
+        content = f"{rng.choice(ADJECTIVES).capitalize()} {item}"
+        description = " ".join(rng.sample(PHRASES, rng.randint(1, 4)))
+        price = int(rng.lognormvariate(8.5, 1.2)) // 10 * 10 + 100
+        seller = _skewed(rng, sellers, config.popularity_skew)
+        rows.append((advert_id, content, description, category, price, 1, seller, _moment(rng, now, config.days)))
+    return rows
+
+
+def like_batch(config: SeedConfig, batch: int, customers: Sequence[int], now: datetime) -> list[tuple]:
+    rng = _rng(config, "likes", batch)
+    adverts = _shared["adverts"]
+    rows = []
+    for customer in customers:
+        count = min(config.max_likes, int(rng.paretovariate(config.likes_alpha)) - 1, len(adverts))
+        liked = set()
+        while len(liked) < count:
+            liked.add(_skewed(rng, adverts, config.popularity_skew))
+        rows.extend((customer, advert, _moment(rng, now, config.days)) for advert in liked)
+    return rows
+
+
+def deal_batch(config: SeedConfig, batch: int, customers: Sequence[int], now: datetime) -> list[tuple]:
+    rng = _rng(config, "deals", batch)
+    adverts = _shared["adverts"]
+    rows = []
+    for customer in customers:
+        if rng.random() >= config.deal_share:
+            continue
+        bought = {_skewed(rng, adverts, config.popularity_skew) for _ in range(rng.randint(1, 3))}
+        rows.extend((customer, advert, _moment(rng, now, config.days), rng.randint(0, 1), rng.choice(CITIES))
+                    for advert in bought)
+    return rows
+
+
+def category_weights(count: int, skew: float) -> list[float]:
+    """Накопленные веса Zipf: первая категория самая популярная."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def category_names(count: int) -> list[str]:
+    return [CATEGORIES[i % len(CATEGORIES)] + (f" {i // len(CATEGORIES) + 1}" if i >= len(CATEGORIES) else "")
+            for i in range(count)]
+
+
+def chunks(items: Sequence[int], size: int) -> Iterator[Sequence[int]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# -----------------
+# Загрузка
+# -----------------
+class Loader:
+    """COPY пачек в adv.* через пул соединений asyncpg, не больше workers одновременно."""
+
+    def __init__(self, pool: asyncpg.Pool, config: SeedConfig):
+        self.pool = pool
+        self.config = config
+        self.report: dict[str, dict] = {}
+
+    async def copy(self, table: str, columns: list[str], batches: list[list[tuple]]) -> None:
+        started = time.perf_counter()
+        rows = await self._copy_all(table, columns, [lambda batch=batch: asyncio.sleep(0, batch) for batch in batches])
+        self._record(table, rows, started)
+
+    async def generate_and_copy(self, table: str, columns: list[str], make_batch: Callable,
+                                tasks: list[tuple], shared: dict | None = None) -> None:
+        """Пачки make_batch(config, номер, *task) считаются в процессах и сразу уходят в COPY."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(self.config.workers, initializer=_init_worker, initargs=(shared or {},)) as pool:
+            jobs = [lambda number=number, task=task: loop.run_in_executor(pool, make_batch, self.config, number, *task)
+                    for number, task in enumerate(tasks)]
+            rows = await self._copy_all(table, columns, jobs)
+        self._record(table, rows, started)
+
+    async def _copy_all(self, table: str, columns: list[str], jobs: list[Callable]) -> int:
+        # пачка генерируется только когда есть свободный слот: в памяти не больше workers пачек
+        limit = asyncio.Semaphore(self.config.workers)
+
+        async def copy_one(job) -> int:
+            async with limit:
+                records = await job()
+                if not records:
+                    return 0
+                async with self.pool.acquire() as conn:
+                    await conn.copy_records_to_table(table, schema_name="adv", columns=columns, records=records)
+                return len(records)
+
+        return sum(await asyncio.gather(*(copy_one(job) for job in jobs)))
+
+    def _record(self, table: str, rows: int, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self.report[table] = {"rows": rows, "seconds": round(elapsed, 2), "rows_per_second": round(rows / elapsed)}
+        print(f"{table}: {rows} строк за {elapsed:.1f} с", file=sys.stderr)
+
+
+async def reserve_ids(session: AsyncSession, table: str, count: int) -> list[int]:
+    allocator = IdBlockAllocator(SEQUENCES[table], block_size=count)
+    ids = await allocator.allocate(session, count)
+    await session.commit()
+    return ids
+
+
+def asyncpg_dsn(url: str) -> str:
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def seed(config: SeedConfig) -> dict:
+    now = datetime.now()
+    password = password_hasher.hash_sync(config.password)
+    engine = create_async_engine(DATABASES["admin"])
+    pool = await asyncpg.create_pool(asyncpg_dsn(DATABASES["admin"]), min_size=1, max_size=config.workers)
+    loader = Loader(pool, config)
+    started = time.perf_counter()
+    try:
+        async with AsyncSession(engine) as session:
+            profiles = await reserve_ids(session, "profiles", config.users)
+            adverts = await reserve_ids(session, "adverts", config.adverts)
+            first_category = (await session.execute(
+                text("SELECT COALESCE(MAX(id), 0) + 1 FROM adv.categories")
+            )).scalar_one()
+
+        batch = config.batch_size
+        await loader.generate_and_copy("profiles", PROFILE_COLUMNS, profile_batch,
+                                       [(ids, password) for ids in chunks(profiles, batch)])
+        await loader.copy("customers", ["profile_id", "rating"],
+                          [[(pid, 0) for pid in ids] for ids in chunks(profiles, batch)])
+        seller_profiles = profiles[:max(1, int(config.users * config.seller_share))]
+        await loader.copy("sellers", ["profile_id", "rating"],
+                          [[(pid, 0) for pid in ids] for ids in chunks(seller_profiles, batch)])
+        # id продавцов выдаёт DEFAULT таблицы, забираем их после загрузки
+        async with pool.acquire() as conn:
+            sellers = [r["id"] for r in await conn.fetch(
+                "SELECT id FROM adv.sellers WHERE profile_id = ANY($1::int[]) ORDER BY profile_id", seller_profiles
+            )]
+
+        categories = list(range(first_category, first_category + config.categories))
+        await loader.copy("categories", ["id", "name"],
+                          [list(zip(categories, category_names(config.categories)))])
+
+        shared = {"categories": categories, "sellers": sellers,
+                  "category_weights": category_weights(config.categories, config.category_skew)}
+        await loader.generate_and_copy("adverts", ADVERT_COLUMNS, advert_batch,
+                                       [(ids, now) for ids in chunks(adverts, batch)], shared)
+
+        # лайки и сделки — пачками по покупателям, объявления общие для всех пачек
+        customer_batch = max(1, batch // 20)
+        await loader.generate_and_copy("likes", LIKE_COLUMNS, like_batch,
+                                       [(ids, now) for ids in chunks(profiles, customer_batch)], {"adverts": adverts})
+        await loader.generate_and_copy("deals", DEAL_COLUMNS, deal_batch,
+                                       [(ids, now) for ids in chunks(profiles, customer_batch)], {"adverts": adverts})
+
+        async with pool.acquire() as conn:
+            for table in loader.report:
+                await conn.execute(f"ANALYZE adv.{table}")
+            # ленту заполнил триггер на adv.adverts (migrations/006_advert_feed.sql)
+            await conn.execute("ANALYZE adv.advert_feed")
+    finally:
+        await pool.close()
+        await engine.dispose()
+        password_hasher.shutdown()
+    return {"seconds": round(time.perf_counter() - started, 1), "tables": loader.report}
+
+
+def main() -> None:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--seller-share", type=float, default=defaults.seller_share)
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument("--adverts", type=int, default=defaults.adverts)
+    parser.add_argument("--category-skew", type=float, default=defaults.category_skew)
+    parser.add_argument("--popularity-skew", type=float, default=defaults.popularity_skew)
+    parser.add_argument("--likes-alpha", type=float, default=defaults.likes_alpha)
+    parser.add_argument("--max-likes", type=int, default=defaults.max_likes)
+    parser.add_argument("--deal-share", type=float, default=defaults.deal_share)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--password", default=defaults.password)
+    args = parser.parse_args()
+
+    config = SeedConfig(**{name.replace("-", "_"): value for name, value in vars(args).items()})
+    print(json.dumps(asyncio.run(seed(config)), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
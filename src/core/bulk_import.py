@@ -0,0 +1,161 @@
+import codecs
+import csv
+import json
+import os
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, NamedTuple, Optional
+
+# Сколько объявлений уходит в базу одним INSERT и фиксируется одной транзакцией
+IMPORT_CHUNK_SIZE = int(os.getenv("ADVERT_IMPORT_CHUNK_SIZE", "500"))
+
+# Предел длины одного элемента JSON-массива: массив читается потоком, и держать
+# в памяти приходится только текущий элемент
+IMPORT_MAX_JSON_ITEM = int(os.getenv("ADVERT_IMPORT_MAX_JSON_ITEM", str(1 << 20)))
+
+# Поля объявления, которые берутся из файла; продавец и статус задаются сервером
+IMPORT_FIELDS = ("content", "description", "id_category", "price")
+
+
+class RawRow(NamedTuple):
+    """Строка файла импорта: номер (с 1, без заголовка), значения или ошибка разбора."""
+    number: int
+    values: Optional[dict]
+    error: Optional[str] = None
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Строки текста из потока байтов UTF-8 (BOM отбрасывается), с переводами строк."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line + "\n"
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def csv_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[RawRow]:
+    """
+    CSV с заголовком, по одной записи. Запись собирается из строк, пока кавычки
+    не закроются, поэтому переводы строк внутри полей в кавычках не рвут запись.
+    """
+    header = None
+    number = 0
+    record = ""
+    async for line in iter_lines(chunks):
+        record += line
+        if record.count('"') % 2:
+            continue
+        complete, record = record, ""
+        if not complete.strip():
+            continue
+        fields = next(csv.reader([complete]))
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+        number += 1
+        if len(fields) != len(header):
+            yield RawRow(number, None, f"ожидалось {len(header)} полей, получено {len(fields)}")
+        else:
+            yield RawRow(number, dict(zip(header, fields)))
+    if record.strip():
+        yield RawRow(number + 1, None, "незакрытая кавычка")
+
+
+_JSON_SPACE = " \t\r\n"
+
+
+def _object_row(number: int, value) -> RawRow:
+    if not isinstance(value, dict):
+        return RawRow(number, None, "ожидался объект JSON")
+    return RawRow(number, value)
+
+
+async def ndjson_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[RawRow]:
+    """NDJSON: объект JSON на строку, пустые строки пропускаются."""
+    number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield _object_row(number, json.loads(line))
+        except json.JSONDecodeError as e:
+            yield RawRow(number, None, f"некорректный JSON: {e.msg}")
+
+
+async def json_rows(chunks: AsyncIterable[bytes], max_item: int = IMPORT_MAX_JSON_ITEM) -> AsyncIterator[RawRow]:
+    """
+    Массив объектов JSON, разбирается по элементу по мере прихода данных: в памяти
+    лежит только недочитанный элемент, и он не может быть длиннее max_item символов.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parser = json.JSONDecoder()
+    source = chunks.__aiter__()
+    buffer, pos, eof = "", 0, False
+    # start — ждём '[', first — первый элемент или ']', item — элемент, next — ',' или ']'
+    state = "start"
+    number = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in _JSON_SPACE:
+            pos += 1
+        value = end = None
+        if pos < len(buffer) and state in ("first", "item") and not (state == "first" and buffer[pos] == "]"):
+            try:
+                value, end = parser.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    yield RawRow(number + 1, None, f"некорректный JSON: {e.msg}")
+                    return
+            # число на границе куска может продолжиться в следующем
+            if end is not None and (end < len(buffer) or eof):
+                number += 1
+                yield _object_row(number, value)
+                pos, state = end, "next"
+                continue
+        elif pos < len(buffer):
+            char = buffer[pos]
+            if state == "start" and char == "[":
+                state = "first"
+            elif state in ("first", "next") and char == "]":
+                state = "done"
+            elif state == "next" and char == ",":
+                state = "item"
+            elif state == "start":
+                yield RawRow(1, None, "ожидался массив объектов JSON")
+                return
+            else:
+                yield RawRow(number + 1, None, f"некорректный JSON: неожиданный символ {char!r}")
+                return
+            pos += 1
+            continue
+        if eof:
+            if state != "done":
+                yield RawRow(number + 1, None, "некорректный JSON: массив не закрыт")
+            return
+        if len(buffer) - pos > max_item:
+            yield RawRow(number + 1, None, f"элемент массива длиннее {max_item} символов")
+            return
+        try:
+            chunk = await source.__anext__()
+        except StopAsyncIteration:
+            chunk, eof = b"", True
+        try:
+            buffer = buffer[pos:] + decoder.decode(chunk, final=eof)
+        except UnicodeDecodeError as e:
+            yield RawRow(number + 1, None, f"некорректный JSON: {e}")
+            return
+        pos = 0
+
+
+# media type -> разбор потока байтов в строки импорта
+PARSERS: Dict[str, Callable[[AsyncIterable[bytes]], AsyncIterator[RawRow]]] = {
+    "text/csv": csv_rows,
+    "application/x-ndjson": ndjson_rows,
+    "application/json": json_rows,
+}
+
+EXTENSIONS = {".csv": "text/csv", ".ndjson": "application/x-ndjson", ".jsonl": "application/x-ndjson",
+              ".json": "application/json"}
@@ -0,0 +1,64 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+from models.category import Category
+
+# Справочник категорий меняется редко — держим его в памяти процесса
+CATEGORY_CACHE_TTL = 300.0
+
+
+class CategoryCache:
+    """
+    Общий на процесс кэш категорий: упорядоченный список и словарь id -> name.
+    Загружается один раз, обновляется по истечении TTL или после invalidate().
+    """
+
+    def __init__(self, ttl: float = CATEGORY_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._categories: Optional[List[Category]] = None
+        self._names: Dict[int, str] = {}
+        self._loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self) -> bool:
+        return self._categories is not None and self._clock() - self._loaded_at < self.ttl
+
+    def get_all(self) -> Optional[List[Category]]:
+        """Список категорий или None, если кэш пуст/устарел и нужно сходить в БД."""
+        if self._is_fresh():
+            self.hits += 1
+            return list(self._categories)
+        self.misses += 1
+        return None
+
+    def get_names(self) -> Optional[Dict[int, str]]:
+        if self._is_fresh():
+            self.hits += 1
+            return self._names
+        self.misses += 1
+        return None
+
+    def store(self, categories: List[Category]) -> None:
+        # пустой ответ не кэшируем: репозиторий возвращает [] и при ошибке БД
+        if not categories:
+            return
+        self._categories = list(categories)
+        self._names = {category.id: category.name for category in categories}
+        self._loaded_at = self._clock()
+
+    def invalidate(self) -> None:
+        self._categories = None
+        self._names = {}
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._names),
+            "fresh": self._is_fresh(),
+        }
+
+
+category_cache = CategoryCache()
@@ -1,4 +1,5 @@
 import jwt
+import uuid
 from datetime import datetime, timedelta
 from typing import Any
 
@@ -12,7 +13,8 @@ class JWTManager:
     def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
         to_encode = data.copy()
         expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-        to_encode.update({"exp": expire})
+        # jti нужен для отзыва токена при выходе (core/revocation.py)
+        to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
         return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     @staticmethod
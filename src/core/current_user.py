@@ -0,0 +1,63 @@
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+from core.revocation import revocation_store, token_id
+from core.timing import phase
+from core.token_cache import decode_token_cached
+
+
+class LazyUser(Mapping):
+    """
+    Текущий пользователь в request.state.user.
+
+    Токен проверяется только при первом обращении (if user, user["id"], шаблон),
+    так что запросы, которым пользователь не нужен, не платят за проверку JWT.
+    Ведёт себя как прежний dict {"id", "email", "role"}; для анонима — ложное значение.
+    """
+
+    __slots__ = ("_token", "_resolved", "_user")
+
+    def __init__(self, token: Optional[str]):
+        self._token = token
+        self._resolved = False
+        self._user: Optional[dict[str, Any]] = None
+
+    def _resolve(self) -> Optional[dict[str, Any]]:
+        if not self._resolved:
+            self._resolved = True
+            if self._token:
+                with phase("auth"):
+                    self._user = self._verify(self._token)
+        return self._user
+
+    @staticmethod
+    def _verify(token: str) -> Optional[dict[str, Any]]:
+        try:
+            payload = decode_token_cached(token)
+        except ValueError:
+            return None
+        if revocation_store.is_revoked(token_id(token, payload)):
+            return None
+        return {
+            "id": payload.get("id"),
+            "email": payload.get("sub"),
+            "role": payload.get("role"),
+        }
+
+    def __bool__(self) -> bool:
+        return self._resolve() is not None
+
+    def __getitem__(self, key: str) -> Any:
+        user = self._resolve()
+        if user is None:
+            raise KeyError(key)
+        return user[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._resolve() or {})
+
+    def __len__(self) -> int:
+        return len(self._resolve() or {})
+
+    def __repr__(self) -> str:
+        return f"LazyUser({self._user!r})" if self._resolved else "LazyUser(<unresolved>)"
@@ -0,0 +1,50 @@
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Последовательности, из которых берутся id (см. migrations/002_id_sequences.sql)
+SEQUENCES = {
+    "adverts": "adv.adverts_id_seq",
+    "deals": "adv.deals_id_seq",
+    "likes": "adv.likes_id_seq",
+    "profiles": "adv.profiles_id_seq",
+}
+
+DEFAULT_BLOCK_SIZE = 1000
+
+
+class IdBlockAllocator:
+    """
+    Выдаёт id для пакетной записи блоками.
+
+    Одиночные вставки берут id из DEFAULT nextval(...) прямо в INSERT ... RETURNING.
+    Пакетной записи (импорт, генерация данных) id нужны заранее, поэтому аллокатор
+    одним запросом резервирует в той же последовательности блок значений и дальше
+    раздаёт их из памяти. Значения уникальны для всех процессов, потому что их
+    выдаёт база; неиспользованный остаток блока просто становится дыркой в нумерации.
+    """
+
+    def __init__(self, sequence: str, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.sequence = sequence
+        self.block_size = block_size
+        self._pool: List[int] = []
+        self._reserve_query = text(f"SELECT nextval('{sequence}') FROM generate_series(1, :n)")
+
+    async def allocate(self, session: AsyncSession, count: int) -> List[int]:
+        # между await другие корутины могут забрать часть пула, поэтому проверяем в цикле
+        while len(self._pool) < count:
+            need = max(self.block_size, count - len(self._pool))
+            result = await session.execute(self._reserve_query, {"n": need})
+            self._pool.extend(result.scalars())
+        ids = self._pool[:count]
+        del self._pool[:count]
+        return ids
+
+    async def next_id(self, session: AsyncSession) -> int:
+        return (await self.allocate(session, 1))[0]
+
+    @property
+    def available(self) -> int:
+        return len(self._pool)
+
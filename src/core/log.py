@@ -0,0 +1,132 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, TextIO
+
+# LOG_LEVEL — общий уровень; LOG_LEVELS — уровни отдельных логгеров:
+#   LOG_LEVELS="repositories=WARNING,services.advert_service=DEBUG"
+# LOG_SAMPLING — доля записей ниже ERROR, которые пропускаются дальше, по логгерам:
+#   LOG_SAMPLING="core.metrics=0.1"
+# LOG_FORMAT — json (по умолчанию) или text
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+# атрибуты, которые есть у любой LogRecord; всё остальное пришло через extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def parse_mapping(raw: str) -> Dict[str, str]:
+    """"a=1,b.c=2" -> {"a": "1", "b.c": "2"}."""
+    pairs = (item.split("=", 1) for item in raw.split(",") if "=" in item)
+    return {name.strip(): value.strip() for name, value in pairs}
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись одной строкой JSON: время, уровень, логгер, сообщение и поля из extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю rate записей логгера (и его потомков) — для частых событий.
+    Ошибки не отбрасываются никогда.
+    """
+
+    def __init__(self, rates: Dict[str, float], rand: Callable[[], float] = random.random):
+        super().__init__()
+        self.rates = rates
+        self.rand = rand
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or self.rand() < rate
+
+
+class EnqueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладёт запись в очередь и сразу возвращается: форматирование и запись в поток
+    делает фоновый поток QueueListener. В вызывающем потоке только подставляются
+    аргументы сообщения — они могут измениться, пока запись ждёт в очереди.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # трассировка держит кадры стека живыми — превращаем её в текст сразу
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL, levels: Optional[Dict[str, str]] = None,
+                  sampling: Optional[Dict[str, float]] = None, stream: TextIO = sys.stderr,
+                  fmt: str = LOG_FORMAT) -> logging.handlers.QueueListener:
+    """
+    Корневой логгер пишет через очередь в фоновый поток. Повторный вызов
+    перенастраивает логирование (старый поток дописывает очередь и останавливается).
+    """
+    global _listener
+    stop_logging()
+    if levels is None:
+        levels = parse_mapping(os.getenv("LOG_LEVELS", ""))
+    if sampling is None:
+        sampling = {name: float(rate) for name, rate in parse_mapping(os.getenv("LOG_SAMPLING", "")).items()}
+
+    writer = logging.StreamHandler(stream)
+    writer.setFormatter(JsonFormatter() if fmt == "json" else
+                        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = EnqueueHandler(records)
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    for old in [h for h in root.handlers if isinstance(h, EnqueueHandler)]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    _listener = logging.handlers.QueueListener(records, writer, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Дописывает накопленные записи и останавливает фоновый поток (при остановке приложения)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
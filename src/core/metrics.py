@@ -0,0 +1,217 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.statements import statement_name
+
+# Сколько раз один и тот же запрос может выполниться за HTTP-запрос, прежде чем маршрут считается N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Гистограмма в духе Prometheus: счётчики по верхним границам корзин, сумма и количество."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Exposition:
+    """Текстовый формат Prometheus (version 0.0.4)."""
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help: str) -> None:
+        self.lines.append(f"# HELP {name} {help}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, labels: Dict[str, str], value: float) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, labels: Dict[str, str], histogram: Histogram) -> None:
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, float("inf")), histogram.counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", {**labels, "le": _number(bound)}, cumulative)
+        self.sample(f"{name}_sum", labels, histogram.sum)
+        self.sample(f"{name}_count", labels, histogram.count)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@dataclass
+class RequestQueries:
+    """Запросы к БД, выполненные в рамках одного HTTP-запроса."""
+    count: int = 0
+    seconds: float = 0.0
+    by_statement: Counter = field(default_factory=Counter)
+
+
+class QueryMetrics:
+    """
+    Учёт SQL: гистограмма времени по каждому запросу из реестра (core.statements),
+    число и суммарное время запросов на HTTP-запрос по маршрутам и срабатывания N+1 —
+    когда один запрос выполняется за HTTP-запрос больше threshold раз.
+    Подключается к движкам через события SQLAlchemy (instrument), HTTP-запрос
+    оборачивается в track_request / finish_request.
+    """
+
+    def __init__(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.threshold = threshold
+        self.statement_seconds: Dict[str, Histogram] = {}
+        self.statement_errors: Counter = Counter()
+        self.request_queries: Dict[str, Histogram] = {}
+        self.request_seconds: Dict[str, Histogram] = {}
+        self.n_plus_one: Counter = Counter()
+        self._current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+        # вызываются с длительностью каждого выполненного SQL (core.timing относит её к фазе db)
+        self.listeners: List[Callable[[float], None]] = []
+
+    # -----------------
+    # События движка
+    # -----------------
+    def instrument(self, engine: AsyncEngine) -> None:
+        target = engine.sync_engine
+        event.listen(target, "before_cursor_execute", self._before_execute)
+        event.listen(target, "after_cursor_execute", self._after_execute)
+        event.listen(target, "handle_error", self._on_error)
+
+    @staticmethod
+    def _label(context) -> str:
+        compiled = getattr(context, "compiled", None)
+        name = statement_name(compiled.statement) if compiled is not None else None
+        return name or "other"
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        context._metrics_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._metrics_started
+        label = self._label(context)
+        self.statement_seconds.setdefault(label, Histogram()).observe(elapsed)
+        # объект учёта общий для задач запроса: ContextVar копируется в задачи, а объект — нет
+        usage = self._current.get()
+        if usage is not None:
+            usage.count += 1
+            usage.seconds += elapsed
+            usage.by_statement[label] += 1
+        for listener in self.listeners:
+            listener(elapsed)
+
+    def _on_error(self, exception_context) -> None:
+        self.statement_errors[self._label(exception_context.execution_context)] += 1
+
+    # -----------------
+    # HTTP-запросы
+    # -----------------
+    @contextmanager
+    def track_request(self) -> Iterator[RequestQueries]:
+        usage = RequestQueries()
+        token = self._current.set(usage)
+        try:
+            yield usage
+        finally:
+            self._current.reset(token)
+
+    def finish_request(self, route: str, usage: RequestQueries) -> list[Tuple[str, int]]:
+        """Учитывает запросы маршрута; возвращает запросы, повторившиеся больше порога."""
+        self.request_queries.setdefault(route, Histogram(QUERY_COUNT_BUCKETS)).observe(usage.count)
+        self.request_seconds.setdefault(route, Histogram()).observe(usage.seconds)
+        repeated = [(label, count) for label, count in usage.by_statement.items() if count > self.threshold]
+        for label, count in repeated:
+            self.n_plus_one[route, label] += 1
+            # на нагруженном маршруте срабатывает на каждый запрос — кандидат для LOG_SAMPLING
+            logger.warning("N+1: %s выполнил %s %d раз за запрос", route, label, count,
+                           extra={"route": route, "statement": label, "count": count})
+        return repeated
+
+    def render(self, out: Exposition) -> None:
+        out.family("db_statement_duration_seconds", "histogram", "Время выполнения SQL по запросам реестра")
+        for label, histogram in sorted(self.statement_seconds.items()):
+            out.histogram("db_statement_duration_seconds", {"statement": label}, histogram)
+        out.family("db_statement_errors_total", "counter", "Ошибки выполнения SQL")
+        for label, count in sorted(self.statement_errors.items()):
+            out.sample("db_statement_errors_total", {"statement": label}, count)
+        out.family("http_request_db_queries", "histogram", "Число SQL-запросов на HTTP-запрос")
+        for route, histogram in sorted(self.request_queries.items()):
+            out.histogram("http_request_db_queries", {"route": route}, histogram)
+        out.family("http_request_db_seconds", "histogram", "Суммарное время SQL на HTTP-запрос")
+        for route, histogram in sorted(self.request_seconds.items()):
+            out.histogram("http_request_db_seconds", {"route": route}, histogram)
+        out.family("http_request_n_plus_one_total", "counter",
+                   f"HTTP-запросы, где один SQL выполнился больше {self.threshold} раз")
+        for (route, label), count in sorted(self.n_plus_one.items()):
+            out.sample("http_request_n_plus_one_total", {"route": route, "statement": label}, count)
+
+
+def render_pool_stats(out: Exposition, stats: Dict[str, dict]) -> None:
+    """Состояние пулов из PoolManager.stats()."""
+    gauges = {"size": "Размер пула", "checked_in": "Свободные соединения", "checked_out": "Занятые соединения",
+              "overflow": "Соединения сверх pool_size", "wait_seconds_max": "Самое долгое ожидание соединения"}
+    counters = {"checkouts": "Выдачи соединений", "timeouts": "Таймауты ожидания соединения",
+                "wait_seconds_total": "Суммарное ожидание соединения"}
+    for key, help in gauges.items():
+        out.family(f"db_pool_{key}", "gauge", help)
+        for role, values in sorted(stats.items()):
+            out.sample(f"db_pool_{key}", {"role": role}, values[key])
+    for key, help in counters.items():
+        name = f"db_pool_{key}" if key.endswith("_total") else f"db_pool_{key}_total"
+        out.family(name, "counter", help)
+        for role, values in sorted(stats.items()):
+            out.sample(name, {"role": role}, values[key])
+
+
+def render_cache_stats(out: Exposition, caches: Dict[str, dict]) -> None:
+    """Числовые поля stats() кэшей: cache_<поле>{cache="..."}."""
+    keys = sorted({key for stats in caches.values() for key in stats})
+    for key in keys:
+        out.family(f"cache_{key}", "gauge", f"{key} из stats() кэша")
+        for cache, stats in sorted(caches.items()):
+            if key in stats:
+                out.sample(f"cache_{key}", {"cache": cache}, stats[key])
+
+
+query_metrics = QueryMetrics()
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+# Лента для анонимов одинакова у всех — отрендеренный HTML живёт в памяти процесса
+PAGE_CACHE_TTL = 30.0
+PAGE_CACHE_MAXSIZE = 256
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedPage(NamedTuple):
+    body: bytes
+    # пустую ленту не кэшируем: репозитории отдают [] и при недоступной БД
+    cacheable: bool = True
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    created_at: float
+
+
+Renderer = Callable[[], Awaitable[RenderedPage]]
+
+
+class PageCache:
+    """
+    LRU-кэш отрендеренных страниц с stale-while-revalidate.
+
+    Свежая страница (моложе ttl) отдаётся сразу. Устаревшая тоже отдаётся сразу,
+    а обновление запускается одной фоновой задачей на ключ. Если обновить не удалось
+    (ошибка или пустая выдача), остаётся последняя удачная версия — так страницы
+    продолжают открываться, пока БД недоступна. invalidate() вызывается после
+    изменения объявлений и сбрасывает все страницы.
+    """
+
+    def __init__(self, maxsize: int = PAGE_CACHE_MAXSIZE, ttl: float = PAGE_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._pages: OrderedDict[str, CachedPage] = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+        # растёт при invalidate(), чтобы не сохранить результат обновления, начатого до него
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+
+    async def get(self, key: str, render: Renderer, refresh: Optional[Renderer] = None) -> tuple[bytes, str]:
+        """
+        Тело страницы и статус HIT / STALE / MISS.
+        render вызывается в рамках текущего запроса, refresh — в фоне (по умолчанию тот же render).
+        """
+        page = self._pages.get(key)
+        if page is not None:
+            self._pages.move_to_end(key)
+            if self._clock() - page.created_at < self.ttl:
+                self.hits += 1
+                return page.body, "HIT"
+            self.stale_hits += 1
+            self._schedule_refresh(key, refresh or render)
+            return page.body, "STALE"
+
+        self.misses += 1
+        generation = self._generation
+        rendered = await render()
+        if rendered.cacheable:
+            self._store(key, rendered.body, generation)
+        return rendered.body, "MISS"
+
+    def _store(self, key: str, body: bytes, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._pages[key] = CachedPage(body, self._clock())
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.maxsize:
+            self._pages.popitem(last=False)
+
+    def _schedule_refresh(self, key: str, refresh: Renderer) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, refresh, self._generation))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, refresh: Renderer, generation: int) -> None:
+        try:
+            rendered = await refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning("Ошибка при обновлении страницы %s в кэше: %s", key, e)
+            return
+        if rendered.cacheable:
+            self._store(key, rendered.body, generation)
+        else:
+            self.refresh_failures += 1
+
+    async def wait_refreshing(self) -> None:
+        """Дождаться фоновых обновлений (для тестов и остановки приложения)."""
+        if self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._pages.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_failures": self.refresh_failures,
+            "size": len(self._pages),
+            "refreshing": len(self._refreshing),
+        }
+
+
+page_cache = PageCache()
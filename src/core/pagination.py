@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional, Sequence, Any
+
+# Размер страницы для лент объявлений
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+
+class Cursor(NamedTuple):
+    """
+    Позиция в ленте: последняя показанная пара (date_created, id).
+    Для выдачи поиска, отсортированной по релевантности, добавляется rank.
+    """
+    date_created: datetime
+    id: int
+    rank: float | None = None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    values = [cursor.date_created.isoformat(), cursor.id]
+    if cursor.rank is not None:
+        values.append(cursor.rank)
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str | None) -> Optional[Cursor]:
+    """
+    Разбирает непрозрачный курсор из ?after=.
+    Испорченный или пустой курсор означает первую страницу.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        date_created, advert_id, *rest = json.loads(raw)
+        rank = float(rest[0]) if rest else None
+        return Cursor(datetime.fromisoformat(date_created), int(advert_id), rank)
+    except (ValueError, TypeError, IndexError):
+        return None
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница неполная (дальше ничего нет)."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(Cursor(last.date_created, last.id, getattr(last, "rank", None)))
+
+
+def keyset_condition(after: Optional[Cursor], alias: str = "", ranked: bool = False) -> tuple[str, dict]:
+    """
+    Условие WHERE для keyset-пагинации по (date_created, id) DESC,
+    а для поиска (ranked=True) — по (rank, date_created, id) DESC.
+    В отличие от OFFSET, стоимость любой страницы одинакова: индекс сразу
+    позиционируется на курсор.
+    """
+    if after is None or (ranked and after.rank is None):
+        return "TRUE", {}
+    prefix = f"{alias}." if alias else ""
+    params = {"after_date": after.date_created, "after_id": after.id}
+    if ranked:
+        params["after_rank"] = after.rank
+        return f"({prefix}rank, {prefix}date_created, {prefix}id) < (:after_rank, :after_date, :after_id)", params
+    return f"({prefix}date_created, {prefix}id) < (:after_date, :after_id)", params
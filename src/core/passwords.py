@@ -0,0 +1,96 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+ALGORITHM = "pbkdf2_sha256"
+# рекомендация OWASP для PBKDF2-HMAC-SHA256
+DEFAULT_ITERATIONS = 600_000
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+SALT_BYTES = 16
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def _derive(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+class PasswordHasher:
+    """
+    Хэширование паролей PBKDF2-HMAC-SHA256 вне event loop.
+
+    Хэш считается сотни миллисекунд, поэтому выполняется в ограниченном пуле потоков
+    (hashlib отпускает GIL на время вычисления): одновременно идёт не больше max_workers
+    хэширований, остальные логины ждут в очереди, не блокируя другие запросы.
+
+    Формат хранения: pbkdf2_sha256$<iterations>$<salt>$<hash>. Пароли, сохранённые
+    до появления хэширования открытым текстом, тоже проверяются — needs_rehash()
+    для них истинно, и при успешном входе они перехэшируются.
+    """
+
+    def __init__(self, iterations: int = DEFAULT_ITERATIONS, max_workers: int = DEFAULT_WORKERS):
+        self.iterations = iterations
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        """PASSWORD_HASH_ITERATIONS — стоимость хэша, PASSWORD_HASH_WORKERS — размер пула."""
+        return cls(
+            iterations=int(os.getenv("PASSWORD_HASH_ITERATIONS", str(DEFAULT_ITERATIONS))),
+            max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(DEFAULT_WORKERS))),
+        )
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def hash_sync(self, password: str) -> str:
+        salt = secrets.token_bytes(SALT_BYTES)
+        digest = _derive(password, salt, self.iterations)
+        return f"{ALGORITHM}${self.iterations}${_b64(salt)}${_b64(digest)}"
+
+    @staticmethod
+    def verify_sync(password: str, stored: str) -> bool:
+        parts = stored.split("$")
+        if len(parts) != 4 or parts[0] != ALGORITHM:
+            # старый пароль в открытом виде
+            return hmac.compare_digest(password.encode(), stored.encode())
+        try:
+            iterations, salt, expected = int(parts[1]), _unb64(parts[2]), _unb64(parts[3])
+        except ValueError:
+            return False
+        return hmac.compare_digest(_derive(password, salt, iterations), expected)
+
+    def needs_rehash(self, stored: str) -> bool:
+        """Хэш устарел: открытый текст или другое число итераций."""
+        parts = stored.split("$")
+        return len(parts) != 4 or parts[0] != ALGORITHM or parts[1] != str(self.iterations)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hash_sync, password)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        return await self._run(self.verify_sync, password, stored)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher.from_env()
@@ -0,0 +1,212 @@
+"""
+Чтение с реплик.
+
+Запросы реестра, которые только читают (core.statements.is_read_only), уходят на
+одну из реплик, всё остальное — на primary. Реплика выбирается по кругу
+(round_robin) или с наименьшим числом занятых соединений (least_connections).
+Отставание реплик проверяет фоновая задача (run) раз в check_interval, запрос
+читает только сохранённые значения; реплика, которая отстала больше max_lag секунд
+или не ответила за check_timeout, не используется, пока не догонит.
+
+Read-your-writes: сессия после первой записи читает только с primary, а ответ на
+запрос с записью ставит cookie READ_PRIMARY_COOKIE — следующие запросы клиента
+(например, редирект после создания объявления) в течение READ_YOUR_WRITES_SECONDS
+читают с primary.
+
+Реплики задаются адресами серверов, роли и база — как у primary:
+
+    DB_REPLICA_HOSTS=localhost:5434,localhost:5435
+
+Для локальной проверки хватит второго экземпляра PostgreSQL: сервер не в режиме
+восстановления считается репликой без отставания, так что подойдёт и копия базы
+из pg_dump; настоящее отставание видно только на потоковой реплике.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import Engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.metrics import Exposition
+
+REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "1.0"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "2.0"))
+REPLICA_CHECK_TIMEOUT = float(os.getenv("DB_REPLICA_CHECK_TIMEOUT", "1.0"))
+REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+READ_PRIMARY_COOKIE = "read_primary"
+
+# роль, под которой проверяется отставание: у неё самые широкие права на чтение
+LAG_CHECK_ROLE = "any_user"
+
+# секунды с последней применённой транзакции; 0 — реплика догнала primary или это не реплика
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+logger = logging.getLogger(__name__)
+
+
+def replica_databases(urls: Dict[str, str], hosts: List[str]) -> Dict[str, Dict[str, str]]:
+    """{реплика: {роль: url}} — адреса ролей primary с хостом и портом реплики."""
+    replicas = {}
+    for host in hosts:
+        hostname, _, port = host.partition(":")
+        replicas[host] = {
+            role: make_url(url).set(host=hostname, port=int(port) if port else None)
+                                .render_as_string(hide_password=False)
+            for role, url in urls.items()
+        }
+    return replicas
+
+
+@dataclass
+class Replica:
+    name: str
+    # None — ещё не проверялась или не ответила
+    lag: Optional[float] = None
+    reads: int = 0
+
+
+@dataclass
+class ReadRouting:
+    """Маршрутизация чтения в рамках одного HTTP-запроса."""
+    primary_only: bool = False
+    wrote: bool = False
+
+
+class ReplicaSet:
+    """
+    Реплики одной базы: отставание, выбор реплики для чтения и маршрутизация
+    HTTP-запроса (track_request). engine(роль, реплика) отдаёт движок реплики.
+    """
+
+    def __init__(self, names: List[str], engine: Callable[[str, str], AsyncEngine],
+                 max_lag: float = REPLICA_MAX_LAG, check_interval: float = REPLICA_CHECK_INTERVAL,
+                 strategy: str = REPLICA_STRATEGY, clock: Callable[[], float] = time.monotonic,
+                 check_timeout: float = REPLICA_CHECK_TIMEOUT):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"неизвестная стратегия выбора реплики: {strategy}")
+        self.replicas = [Replica(name) for name in names]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.strategy = strategy
+        self._engine = engine
+        self._clock = clock
+        self._turn = itertools.count()
+        self._last_check: Optional[float] = None
+        self.primary_fallbacks = 0
+        self._routing: ContextVar[Optional[ReadRouting]] = ContextVar("read_routing", default=None)
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    # -----------------
+    # Отставание
+    # -----------------
+    async def refresh(self, force: bool = False) -> None:
+        """Проверяет отставание реплик, не чаще раза в check_interval."""
+        if not self.replicas:
+            return
+        now = self._clock()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        lags = await asyncio.gather(*(self.measure_lag(replica.name) for replica in self.replicas))
+        for replica, lag in zip(self.replicas, lags):
+            replica.lag = lag
+
+    async def measure_lag(self, name: str) -> Optional[float]:
+        try:
+            # зависшая реплика не держит проверку дольше check_timeout
+            lag = await asyncio.wait_for(self._query_lag(name), self.check_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Реплика %s не ответила за %s с", name, self.check_timeout)
+            return None
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning("Реплика %s недоступна: %s", name, e)
+            return None
+        return None if lag is None else float(lag)
+
+    async def _query_lag(self, name: str):
+        async with self._engine(LAG_CHECK_ROLE, name).connect() as conn:
+            return (await conn.execute(LAG_QUERY)).scalar()
+
+    async def run(self) -> None:
+        """Фоновая проверка отставания раз в check_interval; запускается в lifespan приложения."""
+        while True:
+            try:
+                await self.refresh(force=True)
+            except Exception:
+                logger.exception("Сбой проверки отставания реплик")
+            await asyncio.sleep(self.check_interval)
+
+    def usable(self) -> List[Replica]:
+        return [replica for replica in self.replicas if replica.lag is not None and replica.lag <= self.max_lag]
+
+    # -----------------
+    # Выбор реплики
+    # -----------------
+    def pick(self, role: str) -> Optional[Engine]:
+        """Движок реплики для чтения или None, если читать надо с primary."""
+        routing = self._routing.get()
+        if not self.replicas or (routing is not None and routing.primary_only):
+            return None
+        candidates = self.usable()
+        if not candidates:
+            # все реплики отстали или недоступны
+            self.primary_fallbacks += 1
+            return None
+        if self.strategy == "least_connections":
+            replica = min(candidates, key=lambda r: self._engine(role, r.name).sync_engine.pool.checkedout())
+        else:
+            replica = candidates[next(self._turn) % len(candidates)]
+        replica.reads += 1
+        return self._engine(role, replica.name).sync_engine
+
+    def wrote(self) -> None:
+        """Запрос что-то записал: ответ закрепит клиента за primary (read-your-writes)."""
+        routing = self._routing.get()
+        if routing is not None:
+            routing.wrote = True
+
+    # -----------------
+    # HTTP-запросы
+    # -----------------
+    @contextmanager
+    def track_request(self, primary_only: bool = False) -> Iterator[ReadRouting]:
+        # объект общий для задач запроса — как RequestQueries в core.metrics
+        routing = ReadRouting(primary_only=primary_only)
+        token = self._routing.set(routing)
+        try:
+            yield routing
+        finally:
+            self._routing.reset(token)
+
+    def render(self, out: Exposition) -> None:
+        out.family("db_replica_lag_seconds", "gauge", "Отставание реплики; -1 — не проверялась или недоступна")
+        for replica in self.replicas:
+            out.sample("db_replica_lag_seconds", {"replica": replica.name},
+                       -1 if replica.lag is None else replica.lag)
+        out.family("db_replica_reads_total", "counter", "Сессии, читавшие с реплики")
+        for replica in self.replicas:
+            out.sample("db_replica_reads_total", {"replica": replica.name}, replica.reads)
+        out.family("db_replica_primary_fallbacks_total", "counter",
+                   "Чтения, ушедшие на primary, потому что все реплики отстали или недоступны")
+        out.sample("db_replica_primary_fallbacks_total", {}, self.primary_fallbacks)
@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import heapq
+import logging
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def token_id(token: str, payload: dict[str, Any]) -> str:
+    """Идентификатор токена для отзыва: jti, а для старых токенов без jti — хэш самого токена."""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+# -----------------
+# Фильтр Блума
+# -----------------
+class BloomFilter:
+    """
+    Отвечает «точно не отозван» за O(k) без обращения к словарю.
+    Ложноположительные ответы возможны (их проверяет точный словарь), ложноотрицательных нет.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# -----------------
+# Хранилища отозванных токенов
+# -----------------
+class Revocation(NamedTuple):
+    jti: str
+    expires_at: float
+    revoked_at: float
+
+
+class IRevocationBackend(ABC):
+    # на сколько секунд назад от последнего увиденного revoked_at перечитывать отзывы
+    sync_overlap: float = 0.0
+
+    @abstractmethod
+    async def revoke(self, jti: str, expires_at: float) -> None: ...
+
+    @abstractmethod
+    async def load_since(self, since: float) -> List[Revocation]:
+        """Неистёкшие отзывы, сделанные после since (unix time)."""
+
+    @abstractmethod
+    async def purge_expired(self) -> None: ...
+
+
+class InMemoryRevocationBackend(IRevocationBackend):
+    """
+    Отзывы живут только в памяти процесса (один воркер, тесты).
+    Записи упорядочены по revoked_at: load_since отдаёт хвост списка двоичным поиском,
+    не перебирая все отзывы.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._jtis: set[str] = set()
+        self._revoked_at: list[float] = []
+        self._records: list[Revocation] = []
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        if jti in self._jtis:
+            return
+        record = Revocation(jti, expires_at, self._clock())
+        self._jtis.add(jti)
+        # часы обычно не идут назад — вставка в конец списка
+        i = bisect_right(self._revoked_at, record.revoked_at)
+        self._revoked_at.insert(i, record.revoked_at)
+        self._records.insert(i, record)
+
+    async def load_since(self, since: float) -> List[Revocation]:
+        now = self._clock()
+        start = bisect_right(self._revoked_at, since)
+        return [r for r in self._records[start:] if r.expires_at > now]
+
+    async def purge_expired(self) -> None:
+        now = self._clock()
+        self._records = [r for r in self._records if r.expires_at > now]
+        self._revoked_at = [r.revoked_at for r in self._records]
+        self._jtis = {r.jti for r in self._records}
+
+
+class DatabaseRevocationBackend(IRevocationBackend):
+    """Общая для всех воркеров таблица adv.revoked_tokens (migrations/004_revoked_tokens.sql)."""
+
+    # запас на отзывы, закоммиченные в другом воркере позже своего revoked_at
+    sync_overlap = 30.0
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        query = text("""
+            INSERT INTO adv.revoked_tokens (jti, expires_at)
+            VALUES (:jti, :expires_at)
+            ON CONFLICT (jti) DO NOTHING
+        """)
+        async with self._session_factory() as session:
+            await session.execute(query, {"jti": jti, "expires_at": datetime.fromtimestamp(expires_at, timezone.utc)})
+            await session.commit()
+
+    async def load_since(self, since: float) -> List[Revocation]:
+        query = text("""
+            SELECT jti, extract(epoch FROM expires_at) AS expires_at, extract(epoch FROM revoked_at) AS revoked_at
+            FROM adv.revoked_tokens
+            WHERE revoked_at > :since AND expires_at > now()
+        """)
+        async with self._session_factory() as session:
+            result = await session.execute(query, {"since": datetime.fromtimestamp(since, timezone.utc)})
+            return [Revocation(row.jti, float(row.expires_at), float(row.revoked_at)) for row in result]
+
+    async def purge_expired(self) -> None:
+        async with self._session_factory() as session:
+            await session.execute(text("DELETE FROM adv.revoked_tokens WHERE expires_at <= now()"))
+            await session.commit()
+
+
+# -----------------
+# Хранилище с локальным зеркалом
+# -----------------
+REVOCATION_REFRESH_INTERVAL = 5.0
+REVOCATION_EXPECTED_ITEMS = 100_000
+_REFRESH_BATCH = 10_000
+
+
+class RevocationStore:
+    """
+    Отозванные токены с автоматическим удалением по истечении exp.
+
+    is_revoked() синхронный и дешёвый при любом числе отзывов: сначала фильтр Блума,
+    при совпадении — словарь jti -> exp. Бэкенд (память или таблица в БД) нужен для
+    обмена отзывами между воркерами: refresh() подтягивает новые записи и чистит
+    истёкшие. Его вызывает фоновая задача run(), а не обработка запроса.
+    """
+
+    def __init__(self, backend: IRevocationBackend, refresh_interval: float = REVOCATION_REFRESH_INTERVAL,
+                 expected_items: int = REVOCATION_EXPECTED_ITEMS, clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._expires: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._bloom = BloomFilter(expected_items)
+        self._synced_until = 0.0
+        self._last_refresh: Optional[float] = None
+
+    def _remember(self, jti: str, expires_at: float) -> None:
+        if jti in self._expires:
+            return
+        self._expires[jti] = expires_at
+        heapq.heappush(self._heap, (expires_at, jti))
+        self._bloom.add(jti)
+        if len(self._expires) > self._bloom.capacity:
+            self._rebuild_bloom()
+
+    def _rebuild_bloom(self) -> None:
+        self._bloom = BloomFilter(max(self._bloom.capacity, 2 * len(self._expires)))
+        for jti in self._expires:
+            self._bloom.add(jti)
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        if expires_at <= self._clock():
+            return
+        await self.backend.revoke(jti, expires_at)
+        self._remember(jti, expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        expires_at = self._expires.get(jti)
+        return expires_at is not None and expires_at > self._clock()
+
+    def sweep(self) -> int:
+        """Удаляет истёкшие отзывы; после массового удаления фильтр пересобирается."""
+        now = self._clock()
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            if self._expires.pop(jti, None) is not None:
+                removed += 1
+        if removed and removed >= len(self._expires):
+            self._rebuild_bloom()
+        return removed
+
+    async def refresh(self, force: bool = False) -> None:
+        now = self._clock()
+        if not force and self._last_refresh is not None and now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        try:
+            records = await self.backend.load_since(self._synced_until - self.backend.sync_overlap)
+            for i, record in enumerate(records, 1):
+                self._remember(record.jti, record.expires_at)
+                self._synced_until = max(self._synced_until, record.revoked_at)
+                if i % _REFRESH_BATCH == 0:
+                    # большая первая загрузка не держит цикл событий целиком
+                    await asyncio.sleep(0)
+            if self.sweep():
+                await self.backend.purge_expired()
+        except (SQLAlchemyError, OSError) as e:
+            # бэкенд недоступен — продолжаем работать с локальным зеркалом
+            logger.warning("Ошибка при обновлении списка отозванных токенов: %s", e)
+
+    async def run(self) -> None:
+        """Фоновая синхронизация раз в refresh_interval; запускается в lifespan приложения."""
+        while True:
+            try:
+                await self.refresh(force=True)
+            except Exception:
+                logger.exception("Сбой синхронизации отозванных токенов")
+            await asyncio.sleep(self.refresh_interval)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+def _default_backend() -> IRevocationBackend:
+    # TOKEN_REVOCATION_BACKEND=database — общий для воркеров список отзывов в БД
+    if os.getenv("TOKEN_REVOCATION_BACKEND", "memory") == "database":
+        return DatabaseRevocationBackend(lambda: SessionLocal["authorized_user"]())
+    return InMemoryRevocationBackend()
+
+
+revocation_store = RevocationStore(_default_backend())
@@ -0,0 +1,91 @@
+import os
+from collections import namedtuple
+from operator import itemgetter
+from typing import Any, Callable, List, Optional, Sequence, Type
+
+from pydantic import BaseModel
+
+# DB_VALIDATE_ROWS=1 — снова валидировать строки из БД (отладка, поиск расхождений со схемой)
+VALIDATE_ROWS = os.getenv("DB_VALIDATE_ROWS", "0").lower() in ("1", "true", "yes")
+
+
+class TrustedRow(tuple):
+    """
+    Строка из БД без валидации: кортеж с доступом к полям по имени, как у модели.
+
+    Повторная проверка Pydantic для строк из наших же запросов только тратит время:
+    типы уже приведены драйвером. Для чтения (шаблоны, сервисы, API) строка ведёт себя
+    как модель — row.id, row.model_dump(include=...); настоящая модель Pydantic
+    создаётся только по требованию через to_model().
+    """
+
+    __slots__ = ()
+    model: Type[BaseModel]
+    defaults: dict
+
+    def model_dump(self, include: Optional[set[str]] = None) -> dict:
+        if include is None:
+            return dict(zip(self._fields, self))
+        return {name: value for name, value in zip(self._fields, self) if name in include}
+
+    def to_model(self) -> BaseModel:
+        return self.model.model_validate(self.model_dump())
+
+
+def with_fields(row, **values):
+    """Копия строки (TrustedRow или модели при DB_VALIDATE_ROWS=1) с другими значениями полей."""
+    if isinstance(row, TrustedRow):
+        return row._replace(**values)
+    return row.model_copy(update=values)
+
+
+def row_type(model: Type[BaseModel]) -> Type[TrustedRow]:
+    """Кортежный тип строки с теми же полями (и значениями по умолчанию), что у модели."""
+    fields = model.model_fields
+    base = namedtuple(f"{model.__name__}Row", list(fields))
+    defaults = {name: info.get_default(call_default_factory=True)
+                for name, info in fields.items() if not info.is_required()}
+    return type(base.__name__, (TrustedRow, base), {"__slots__": (), "model": model, "defaults": defaults})
+
+
+def row_factory(row_cls: Type[TrustedRow], keys: Sequence[str]) -> Callable[[Sequence[Any]], TrustedRow]:
+    """
+    Функция строка результата -> row_cls для результата с колонками keys.
+    Позиции полей вычисляются один раз на результат, дальше на строку — один itemgetter:
+    лишние колонки (например, search_vector в SELECT *) отбрасываются, недостающие
+    поля получают значения по умолчанию.
+    """
+    keys = list(keys)
+    if VALIDATE_ROWS:
+        model = row_cls.model
+        return lambda row: model(**dict(zip(keys, row)))
+
+    missing = [name for name in row_cls._fields if name not in keys]
+    if missing and any(name not in row_cls.defaults for name in missing):
+        raise ValueError(f"{row_cls.__name__}: в результате нет колонок {missing}")
+
+    # недостающие поля берутся из хвоста, приклеенного к строке
+    positions = {name: index for index, name in enumerate(keys)}
+    positions.update({name: len(keys) + index for index, name in enumerate(missing)})
+    getter = itemgetter(*(positions[name] for name in row_cls._fields))
+    new = tuple.__new__
+    if not missing:
+        return lambda row: new(row_cls, getter(row))
+    tail = tuple(row_cls.defaults[name] for name in missing)
+    return lambda row: new(row_cls, getter(tuple(row) + tail))
+
+
+def materialize(row_cls: Type[TrustedRow], result) -> List[TrustedRow]:
+    """Все строки результата SQLAlchemy как row_cls."""
+    rows = result.all()
+    if not rows:
+        return []
+    make = row_factory(row_cls, result.keys())
+    return [make(row) for row in rows]
+
+
+def materialize_first(row_cls: Type[TrustedRow], result) -> Optional[TrustedRow]:
+    keys = result.keys()
+    row = result.first()
+    return row_factory(row_cls, keys)(row) if row is not None else None
+
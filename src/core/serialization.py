@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    # orjson в разы быстрее json и сам сериализует datetime; без него работает запасной вариант
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse с кодированием через orjson (если установлен)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[set[str]]:
+    """
+    Разбирает ?fields=id,content,price. None — отдавать все поля.
+    Неизвестное поле — 400, чтобы опечатка клиента не превращалась в молча пустой ответ.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def project(model: BaseModel, fields: Optional[set[str]] = None) -> dict:
+    """Словарь только с запрошенными полями модели (sparse fieldset)."""
+    return model.model_dump(include=fields)
@@ -0,0 +1,116 @@
+import re
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from sqlalchemy import TextClause, text
+
+from core.pagination import Cursor, keyset_condition
+
+# Курсор-заглушка: нужен только чтобы получить текст условия «после курсора»
+_SAMPLE_CURSOR = Cursor(date_created=None, id=0, rank=0.0)
+
+# запрос -> имя во всех реестрах; по нему метрики подписывают выполненные запросы
+_names: Dict[TextClause, str] = {}
+# запросы реестров, которые только читают: их можно отправлять на реплику (см. core.replicas)
+_read_only: Set[TextClause] = set()
+
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|FOR\s+UPDATE|FOR\s+SHARE|nextval|setval)\b",
+                     re.IGNORECASE)
+
+
+def statement_name(statement) -> Optional[str]:
+    """Имя запроса из реестра или None, если запрос собран где-то ещё."""
+    try:
+        return _names.get(statement)
+    except TypeError:
+        return None
+
+
+def is_write(statement) -> bool:
+    """Запрос что-то меняет: DML-конструкция или текст с INSERT/UPDATE/DELETE и т. п."""
+    if getattr(statement, "is_dml", False):
+        return True
+    sql = getattr(statement, "text", None)
+    return isinstance(sql, str) and _WRITES.search(sql) is not None
+
+
+def is_read_only(statement) -> bool:
+    """Запрос из реестра, который ничего не меняет; про запросы не из реестра ничего не известно."""
+    try:
+        return statement in _read_only
+    except TypeError:
+        return False
+
+
+class Listing:
+    """
+    Постраничный запрос в четырёх готовых вариантах: первая страница или после курсора,
+    с LIMIT или без (потоковое чтение). Вариант выбирается по курсору, текст SQL не собирается.
+    """
+
+    def __init__(self, name: str, build: Callable[[str, str], str], alias: str = "", ranked: bool = False):
+        self.alias = alias
+        self.ranked = ranked
+        self._variants: Dict[Tuple[str, bool], TextClause] = {}
+        for cursor in (None, _SAMPLE_CURSOR):
+            keyset, _ = keyset_condition(cursor, alias, ranked)
+            for limited in (True, False):
+                statement = text(build(keyset, "LIMIT :limit" if limited else ""))
+                self._variants[keyset, limited] = statement
+                # варианты различаются в метриках: первая страница дешевле, поток не ограничен
+                _names[statement] = name + ("" if cursor is None else ".after") + ("" if limited else ".stream")
+                _read_only.add(statement)
+
+    def __call__(self, after: Optional[Cursor], limited: bool = True) -> Tuple[TextClause, dict]:
+        """Запрос и параметры курсора для страницы после after."""
+        keyset, params = keyset_condition(after, self.alias, self.ranked)
+        return self._variants[keyset, limited], params
+
+    def __iter__(self) -> Iterator[TextClause]:
+        return iter(self._variants.values())
+
+
+class StatementRegistry:
+    """
+    Все SQL репозиториев по именам.
+
+    Каждый запрос определяется и превращается в text() один раз при импорте, а не при
+    каждом вызове метода. Текст запроса всегда один и тот же, поэтому asyncpg находит
+    его в кэше подготовленных выражений соединения (prepared_statement_cache_size,
+    см. core.db.PoolSettings) и не готовит заново, а сервер переиспользует план.
+    """
+
+    def __init__(self):
+        self._statements: Dict[str, TextClause] = {}
+        self._listings: Dict[str, Listing] = {}
+
+    def define(self, name: str, sql: str) -> TextClause:
+        self._check_new(name)
+        statement = self._statements[name] = text(sql)
+        _names[statement] = name
+        if not is_write(statement):
+            _read_only.add(statement)
+        return statement
+
+    def define_listing(self, name: str, build: Callable[[str, str], str],
+                       alias: str = "", ranked: bool = False) -> Listing:
+        """build(условие keyset, "LIMIT :limit" или "") -> SQL постраничного запроса."""
+        self._check_new(name)
+        self._listings[name] = Listing(name, build, alias, ranked)
+        return self._listings[name]
+
+    def _check_new(self, name: str) -> None:
+        if name in self._statements or name in self._listings:
+            raise ValueError(f"запрос {name} уже определён")
+
+    def __getitem__(self, name: str) -> TextClause:
+        return self._statements[name]
+
+    def listing(self, name: str) -> Listing:
+        return self._listings[name]
+
+    def __len__(self) -> int:
+        """Сколько разных текстов SQL может уйти в базу."""
+        return len(self._statements) + sum(len(list(listing)) for listing in self._listings.values())
+
+    def names(self) -> list[str]:
+        return sorted([*self._statements, *self._listings])
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+from core.metrics import Exposition, Histogram, query_metrics
+
+# Запросы дольше порога пишутся в журнал медленных запросов с разбивкой по фазам
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+PHASES = ("auth", "db", "render", "service")
+
+slow_log = logging.getLogger("slow_requests")
+
+
+class RequestTiming:
+    """
+    Время одного HTTP-запроса по фазам. Фазы могут вкладываться (проверка токена
+    внутри рендера шаблона), каждая получает только собственное время. SQL
+    учитывается в db и вычитается из фазы, внутри которой выполнялся.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = defaultdict(float)
+        self._active: list[str] = []
+        self._mark = self.started
+
+    def enter(self, name: str) -> None:
+        now = self.clock()
+        if self._active:
+            self.phases[self._active[-1]] += now - self._mark
+        self._active.append(name)
+        self._mark = now
+
+    def exit(self) -> None:
+        now = self.clock()
+        self.phases[self._active.pop()] += now - self._mark
+        self._mark = now
+
+    def add_db(self, seconds: float) -> None:
+        # запрос только что закончился — его время уже сидит в текущей фазе (или в service)
+        if self._active:
+            self.phases[self._active[-1]] -= seconds
+        self.phases["db"] += seconds
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Отнести время блока к фазе текущего HTTP-запроса (вне запроса ничего не делает)."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing.enter(name)
+    try:
+        yield
+    finally:
+        timing.exit()
+
+
+def record_query(seconds: float) -> None:
+    timing = _current.get()
+    if timing is not None:
+        timing.add_db(seconds)
+
+
+class TimedTemplate(jinja2.Template):
+    """Шаблон, время рендера которого попадает в фазу render."""
+
+    def render(self, *args, **kwargs) -> str:
+        with phase("render"):
+            return super().render(*args, **kwargs)
+
+
+def timed_templates(directory: str) -> Jinja2Templates:
+    templates = Jinja2Templates(directory=directory)
+    templates.env.template_class = TimedTemplate
+    return templates
+
+
+class RequestTimer:
+    """
+    Разбивка времени запросов: auth (проверка токена), db (SQL, из core.metrics),
+    render (шаблоны) и service — всё остальное время обработчика и сервисов.
+    Держит гистограммы по маршрутам и пишет медленные запросы в журнал slow_requests.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_REQUEST_MS):
+        self.slow_seconds = slow_ms / 1000
+        self.durations: Dict[str, Histogram] = {}
+        self.phase_durations: Dict[Tuple[str, str], Histogram] = {}
+        self.slow_requests: Counter = Counter()
+
+    @contextmanager
+    def track(self, clock: Callable[[], float] = time.perf_counter) -> Iterator[RequestTiming]:
+        timing = RequestTiming(clock)
+        token = _current.set(timing)
+        try:
+            yield timing
+        finally:
+            _current.reset(token)
+
+    def finish(self, route: str, timing: RequestTiming) -> Dict[str, float]:
+        """Фазы запроса в секундах (с total); учитывает их в гистограммах маршрута."""
+        total = timing.elapsed()
+        # каждый интервал SQL уже отнесён ровно к одной фазе — к db (см. add_db)
+        breakdown = {
+            "auth": max(0.0, timing.phases["auth"]),
+            "db": timing.phases["db"],
+            "render": max(0.0, timing.phases["render"]),
+        }
+        breakdown["service"] = max(0.0, total - sum(breakdown.values()))
+        breakdown["total"] = total
+
+        self.durations.setdefault(route, Histogram()).observe(total)
+        for name in PHASES:
+            self.phase_durations.setdefault((route, name), Histogram()).observe(breakdown[name])
+        return breakdown
+
+    def is_slow(self, breakdown: Dict[str, float]) -> bool:
+        return breakdown["total"] >= self.slow_seconds
+
+    def log_slow(self, route: str, record: dict) -> None:
+        self.slow_requests[route] += 1
+        slow_log.warning(json.dumps(record, ensure_ascii=False))
+
+    def render(self, out: Exposition) -> None:
+        out.family("http_request_duration_seconds", "histogram", "Время обработки запроса по маршрутам")
+        for route, histogram in sorted(self.durations.items()):
+            out.histogram("http_request_duration_seconds", {"route": route}, histogram)
+        out.family("http_request_phase_seconds", "histogram", "Время фаз запроса: auth, db, render, service")
+        for (route, name), histogram in sorted(self.phase_durations.items()):
+            out.histogram("http_request_phase_seconds", {"route": route, "phase": name}, histogram)
+        out.family("http_slow_requests_total", "counter", f"Запросы дольше {self.slow_seconds * 1000:g} мс")
+        for route, count in sorted(self.slow_requests.items()):
+            out.sample("http_slow_requests_total", {"route": route}, count)
+
+
+def server_timing(breakdown: Dict[str, float], queries: int) -> str:
+    """Заголовок Server-Timing: длительности фаз в миллисекундах."""
+    parts = []
+    for name, seconds in breakdown.items():
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if name == "db":
+            entry += f';desc="{queries} queries"'
+        parts.append(entry)
+    return ", ".join(parts)
+
+
+request_timer = RequestTimer()
+query_metrics.listeners.append(record_query)
@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from core.create_jwt import JWTManager
+
+TOKEN_CACHE_SIZE = 10_000
+
+
+class VerifiedTokenCache:
+    """
+    LRU уже проверенных JWT: токен -> payload.
+    Запись живёт до exp токена, поэтому повторная проверка подписи
+    и разбор JSON нужны только для новых токенов.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE, clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict[str, Any]]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        expires_at = payload.get("exp")
+        # без exp не знаем, когда выкинуть запись, — такие токены не кэшируем
+        if expires_at is None:
+            return
+        self._entries[token] = (payload, float(expires_at))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache()
+
+
+def decode_token_cached(token: str) -> dict[str, Any]:
+    """JWTManager.decode_token с кэшем; невалидный токен по-прежнему даёт ValueError."""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = JWTManager.decode_token(token)
+        token_cache.put(token, payload)
+    return payload
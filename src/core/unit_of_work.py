@@ -0,0 +1,49 @@
+"""
+Действия после фиксации транзакции.
+
+Кэши процесса (страницы ленты, множества избранного и покупок) нельзя менять до
+commit: параллельный запрос успеет прочитать из БД старые данные и положить их в
+кэш, а откат транзакции оставит кэш неверным до истечения TTL. Сервисы
+откладывают такие изменения через after_commit(); open_locator выполняет их
+сразу после успешного commit и выбрасывает при откате.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], None]
+
+_pending: ContextVar[Optional[List[Callback]]] = ContextVar("after_commit", default=None)
+
+
+def after_commit(callback: Callback) -> None:
+    """Выполнить callback после commit текущего unit of work; вне unit of work — сразу."""
+    pending = _pending.get()
+    if pending is None:
+        callback()
+    else:
+        pending.append(callback)
+
+
+@contextmanager
+def track_commit() -> Iterator[List[Callback]]:
+    # список общий для задач unit of work — как RequestQueries в core.metrics
+    pending: List[Callback] = []
+    token = _pending.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending.reset(token)
+
+
+def run_after_commit(pending: List[Callback]) -> None:
+    for callback in pending:
+        try:
+            callback()
+        except Exception:
+            # транзакция уже зафиксирована — сбой кэша не превращаем в ошибку запроса
+            logger.exception("Ошибка в действии после commit")
+    pending.clear()
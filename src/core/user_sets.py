@@ -0,0 +1,181 @@
+import os
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Literal, Optional, Set, Tuple
+
+# Избранное и покупки пользователя: id объявлений держатся в памяти процесса,
+# флаги is_favorite / is_bought ставятся проверкой по множеству, без SQL на карточку.
+USER_SETS_CACHE_BYTES = int(os.getenv("USER_SETS_CACHE_BYTES", str(32 * 1024 * 1024)))
+# другие воркеры про лайки и сделки этого процесса не знают — множества перечитываются
+USER_SETS_CACHE_TTL = float(os.getenv("USER_SETS_CACHE_TTL", "60"))
+
+Kind = Literal["liked", "bought"]
+
+# накладные расходы записи кэша сверх самих id: ключ, узел OrderedDict, объект IdSet
+_ENTRY_OVERHEAD = 200
+
+
+class IdSet:
+    """
+    Неизменяемое снаружи множество id: отсортированный массив int64, 8 байт на id
+    (у set — десятки байт). Проверка вхождения — двоичный поиск.
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._ids = array("q", sorted(set(ids)))
+
+    def __contains__(self, advert_id: int) -> bool:
+        i = bisect_left(self._ids, advert_id)
+        return i < len(self._ids) and self._ids[i] == advert_id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def add(self, advert_id: int) -> None:
+        i = bisect_left(self._ids, advert_id)
+        if i == len(self._ids) or self._ids[i] != advert_id:
+            self._ids.insert(i, advert_id)
+
+    def discard(self, advert_id: int) -> None:
+        i = bisect_left(self._ids, advert_id)
+        if i < len(self._ids) and self._ids[i] == advert_id:
+            del self._ids[i]
+
+    @property
+    def nbytes(self) -> int:
+        return self._ids.itemsize * len(self._ids) + _ENTRY_OVERHEAD
+
+
+class CachedSet:
+    __slots__ = ("ids", "loaded_at")
+
+    def __init__(self, ids: IdSet, loaded_at: float):
+        self.ids = ids
+        self.loaded_at = loaded_at
+
+
+class UserSetsCache:
+    """
+    LRU-кэш множеств id объявлений по (вид, пользователь) с бюджетом памяти max_bytes:
+    при переполнении вытесняются давно не читавшиеся пользователи.
+
+    Запись (лайк, сделка) меняет множество на месте. Если запись пришлась на время
+    загрузки множества из БД, загруженное множество может её не содержать — такое
+    множество отдаётся запросу, но в кэш не кладётся (см. load).
+    """
+
+    def __init__(self, max_bytes: int = USER_SETS_CACHE_BYTES, ttl: float = USER_SETS_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[Kind, int], CachedSet]" = OrderedDict()
+        # токены идущих загрузок, после которых записей ещё не было
+        self._loading: Dict[Tuple[Kind, int], Set[object]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, kind: Kind, user_id: int) -> Optional[IdSet]:
+        """Множество пользователя или None, если его надо загрузить из БД."""
+        key = (kind, user_id)
+        entry = self._entries.get(key)
+        if entry is None or self._clock() - entry.loaded_at >= self.ttl:
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.ids
+
+    async def load(self, kind: Kind, user_id: int,
+                   loader: Callable[[], Awaitable[Optional[Iterable[int]]]]) -> IdSet:
+        """Множество из кэша, а при промахе — из loader(); None от loader — ошибка БД, не кэшируется."""
+        cached = self.get(kind, user_id)
+        if cached is not None:
+            return cached
+        key = (kind, user_id)
+        # у каждой загрузки свой токен: запись во время загрузки (add / discard)
+        # снимает токены всех идущих загрузок этого ключа
+        token = object()
+        self._loading.setdefault(key, set()).add(token)
+        try:
+            ids = await loader()
+        finally:
+            stale = self._finish_load(key, token)
+        if ids is None:
+            return IdSet()
+        return IdSet(ids) if stale else self.store(kind, user_id, ids)
+
+    def _finish_load(self, key: Tuple[Kind, int], token: object) -> bool:
+        tokens = self._loading.get(key, set())
+        stale = token not in tokens
+        tokens.discard(token)
+        if not tokens:
+            self._loading.pop(key, None)
+        return stale
+
+    def store(self, kind: Kind, user_id: int, ids: Iterable[int]) -> IdSet:
+        key = (kind, user_id)
+        id_set = IdSet(ids)
+        if key in self._entries:
+            self._drop(key)
+        if id_set.nbytes > self.max_bytes:
+            return id_set
+        self._entries[key] = CachedSet(id_set, self._clock())
+        self.bytes += id_set.nbytes
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        return id_set
+
+    def add(self, kind: Kind, user_id: int, advert_id: int) -> None:
+        self._changed(kind, user_id, lambda ids: ids.add(advert_id))
+
+    def discard(self, kind: Kind, user_id: int, advert_id: int) -> None:
+        self._changed(kind, user_id, lambda ids: ids.discard(advert_id))
+
+    def _changed(self, kind: Kind, user_id: int, change: Callable[[IdSet], None]) -> None:
+        key = (kind, user_id)
+        tokens = self._loading.get(key)
+        if tokens:
+            tokens.clear()
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self.bytes -= entry.ids.nbytes
+        change(entry.ids)
+        self.bytes += entry.ids.nbytes
+
+    def _drop(self, key: Tuple[Kind, int]) -> None:
+        self.bytes -= self._entries.pop(key).ids.nbytes
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        if user_id is None:
+            self._entries.clear()
+            self.bytes = 0
+            return
+        for kind in ("liked", "bought"):
+            if (kind, user_id) in self._entries:
+                self._drop((kind, user_id))
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+user_sets = UserSetsCache()
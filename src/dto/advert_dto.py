@@ -18,3 +18,6 @@ class AdvertWithCategoryDTO(BaseModel):
     is_favorite: bool = False
     is_bought: bool = False
     is_created: bool = False
+
+    # релевантность для выдачи полнотекстового поиска
+    rank: float | None = None
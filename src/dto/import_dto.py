@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class AdvertImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class AdvertImportReport(BaseModel):
+    created: int = 0
+    failed: int = 0
+    ids: List[int] = []
+    errors: List[AdvertImportError] = []
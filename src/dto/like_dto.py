@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class LikeToggle(BaseModel):
+    advert_id: int
+    liked: bool
+
+
+class LikeToggleRequest(BaseModel):
+    toggles: List[LikeToggle] = Field(max_length=500)
+
+
+class LikeToggleResult(BaseModel):
+    liked: List[int] = []
+    unliked: List[int] = []
+    # реально вставленные или удалённые строки; повтор уже применённого переключения сюда не попадает
+    changed: List[int] = []
+    # объявления не существуют — лайк не поставлен
+    missing: List[int] = []
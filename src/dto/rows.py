@@ -0,0 +1,15 @@
+from core.rows import row_type
+from dto.advert_dto import AdvertWithCategoryDTO
+from models.advert import Advert
+from models.category import Category
+from models.deal import Deal
+from models.liked import Liked
+from models.user import User
+
+# Строки, которые репозитории отдают вместо моделей (см. core/rows.py)
+AdvertRow = row_type(Advert)
+AdvertWithCategoryRow = row_type(AdvertWithCategoryDTO)
+CategoryRow = row_type(Category)
+DealRow = row_type(Deal)
+LikedRow = row_type(Liked)
+UserRow = row_type(User)
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from routers.main import main_router
 from routers.user import user_router
@@ -6,13 +8,58 @@ from routers.user import user_router
 
 from routers.advert import advert_router
 from routers.liked import likes_router
+from routers.api import api_router
+from routers.metrics import metrics_router
 
 
 from fastapi import Request
 
-from core.create_jwt import JWTManager
+from contextlib import asynccontextmanager
+
+from core.current_user import LazyUser
+from core.db import pool_manager
+from core.log import setup_logging, stop_logging
+from core.metrics import query_metrics
+from core.timing import request_timer, server_timing
+from core.passwords import password_hasher
+from core.replicas import READ_PRIMARY_COOKIE, READ_YOUR_WRITES_SECONDS
+from core.revocation import revocation_store
+
+# журнал пишется фоновым потоком: обработчики запросов только кладут записи в очередь
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # отзывы токенов из других воркеров подтягиваются в фоне, а не на пути запроса
+    revocation_sync = asyncio.create_task(revocation_store.run())
+    # отставание реплик тоже проверяется в фоне: запрос читает готовые значения
+    replica_checks = asyncio.create_task(pool_manager.replicas.run()) if pool_manager.replicas else None
+    yield
+    revocation_sync.cancel()
+    if replica_checks is not None:
+        replica_checks.cancel()
+    # закрываем соединения всех пулов при остановке
+    await pool_manager.dispose()
+    password_hasher.shutdown()
+    # дописываем записи, оставшиеся в очереди
+    stop_logging()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+
+# -------------------
+# Middleware: чтение с реплик (core.replicas)
+# -------------------
+@app.middleware("http")
+async def route_reads(request: Request, call_next):
+    replicas = pool_manager.replicas
+    # клиент недавно что-то записал — читает с primary, чтобы увидеть свою запись
+    with replicas.track_request(primary_only=READ_PRIMARY_COOKIE in request.cookies) as routing:
+        response = await call_next(request)
+    if routing.wrote and replicas:
+        response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=READ_YOUR_WRITES_SECONDS, httponly=True)
+    return response
 
 
 # -------------------
@@ -20,25 +67,43 @@ app = FastAPI()
 # -------------------
 @app.middleware("http")
 async def add_user_to_request(request: Request, call_next):
-    token = request.cookies.get("access_token")
-    request.state.user = None
-    if token:
-        try:
-            payload = JWTManager.decode_token(token)
-            request.state.user = {
-                "id": payload.get("id"),
-                "email": payload.get("sub"),
-                "role": payload.get("role"),
-            }
-        except Exception:
-            request.state.user = None
+    # токен проверяется лениво — при первом обращении к request.state.user
+    request.state.user = LazyUser(request.cookies.get("access_token"))
     response = await call_next(request)
     return response
 
 
+# -------------------
+# Middleware: время запроса по фазам (Server-Timing, /metrics, журнал медленных запросов)
+# Подключён последним, поэтому внешний: в замер попадает и проверка пользователя.
+# -------------------
+@app.middleware("http")
+async def time_request(request: Request, call_next):
+    with query_metrics.track_request() as queries, request_timer.track() as timing:
+        response = await call_next(request)
+    # шаблон пути, а не сам путь: /category/{category_id}, а не /category/7
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    repeated = query_metrics.finish_request(route, queries)
+    breakdown = request_timer.finish(route, timing)
+    response.headers["Server-Timing"] = server_timing(breakdown, queries.count)
+    if request_timer.is_slow(breakdown):
+        request_timer.log_slow(route, {
+            "method": request.method,
+            "path": request.url.path,
+            "route": route,
+            "status": response.status_code,
+            "ms": {name: round(seconds * 1000, 1) for name, seconds in breakdown.items()},
+            "queries": queries.count,
+            "repeated_statements": dict(repeated),
+        })
+    return response
+
+
 
 
 app.include_router(main_router)
 app.include_router(user_router)
 app.include_router(advert_router)
-app.include_router(likes_router)
\ No newline at end of file
+app.include_router(likes_router)
+app.include_router(api_router)
+app.include_router(metrics_router)
\ No newline at end of file
@@ -0,0 +1,7 @@
+-- Индексы под keyset-пагинацию лент объявлений:
+-- ORDER BY date_created DESC, id DESC с условием (date_created, id) < (:after_date, :after_id)
+CREATE INDEX IF NOT EXISTS adverts_date_created_id_idx
+    ON adv.adverts (date_created DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS adverts_category_date_created_id_idx
+    ON adv.adverts (id_category, date_created DESC, id DESC);
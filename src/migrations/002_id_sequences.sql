@@ -0,0 +1,24 @@
+-- Идентификаторы выдаёт последовательность, а не SELECT MAX(id) + 1:
+-- одиночная вставка делает один INSERT ... RETURNING id, параллельные
+-- писатели не конфликтуют. Значение последовательности выравнивается
+-- по уже существующим данным.
+
+CREATE SEQUENCE IF NOT EXISTS adv.adverts_id_seq OWNED BY adv.adverts.id;
+SELECT setval('adv.adverts_id_seq', COALESCE((SELECT MAX(id) FROM adv.adverts), 0) + 1, false);
+ALTER TABLE adv.adverts ALTER COLUMN id SET DEFAULT nextval('adv.adverts_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS adv.deals_id_seq OWNED BY adv.deals.id;
+SELECT setval('adv.deals_id_seq', COALESCE((SELECT MAX(id) FROM adv.deals), 0) + 1, false);
+ALTER TABLE adv.deals ALTER COLUMN id SET DEFAULT nextval('adv.deals_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS adv.likes_id_seq OWNED BY adv.likes.id;
+SELECT setval('adv.likes_id_seq', COALESCE((SELECT MAX(id) FROM adv.likes), 0) + 1, false);
+ALTER TABLE adv.likes ALTER COLUMN id SET DEFAULT nextval('adv.likes_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS adv.profiles_id_seq OWNED BY adv.profiles.id;
+SELECT setval('adv.profiles_id_seq', COALESCE((SELECT MAX(id) FROM adv.profiles), 0) + 1, false);
+ALTER TABLE adv.profiles ALTER COLUMN id SET DEFAULT nextval('adv.profiles_id_seq');
+
+GRANT USAGE, SELECT ON SEQUENCE
+    adv.adverts_id_seq, adv.deals_id_seq, adv.likes_id_seq, adv.profiles_id_seq
+TO admin, authorized_user;
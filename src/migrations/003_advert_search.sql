@@ -0,0 +1,14 @@
+-- Полнотекстовый поиск по объявлениям.
+-- search_vector — хранимая генерируемая колонка: PostgreSQL пересчитывает её
+-- при каждой вставке/изменении строки, а GIN-индекс обновляется вместе с ней,
+-- так что индекс поддерживается инкрементально без отдельной переиндексации.
+-- Заголовок (content) весит больше описания.
+ALTER TABLE adv.adverts
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(content, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS adverts_search_vector_idx
+    ON adv.adverts USING GIN (search_vector);
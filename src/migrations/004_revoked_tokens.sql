@@ -0,0 +1,12 @@
+-- Отозванные JWT (выход из аккаунта), общие для всех воркеров.
+-- Записи нужны только до истечения токена и удаляются по expires_at.
+CREATE TABLE IF NOT EXISTS adv.revoked_tokens (
+    jti         text PRIMARY KEY,
+    expires_at  timestamptz NOT NULL,
+    revoked_at  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS revoked_tokens_revoked_at_idx ON adv.revoked_tokens (revoked_at);
+CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at_idx ON adv.revoked_tokens (expires_at);
+
+GRANT SELECT, INSERT, DELETE ON adv.revoked_tokens TO authorized_user;
@@ -0,0 +1,5 @@
+-- Пароли хранятся в виде pbkdf2_sha256$<iterations>$<salt>$<hash> (около 100 символов).
+-- Старые пароли в открытом виде перехэшируются при следующем входе пользователя.
+ALTER TABLE adv.profiles ALTER COLUMN password TYPE text;
+
+GRANT UPDATE (password) ON adv.profiles TO authorized_user;
@@ -0,0 +1,126 @@
+-- Лента объявлений в одной таблице: объявление вместе с названием категории и
+-- именем продавца. Ленты (feed.all, feed.by_category, feed.search) читают её
+-- диапазоном по индексу и присоединяют только флаги пользователя (likes, deals)
+-- вместо categories + sellers + profiles на каждый запрос.
+--
+-- Таблица поддерживается инкрементально триггерами уровня оператора: каждый
+-- INSERT/UPDATE (в том числе пакетный INSERT и COPY) обрабатывается одним
+-- запросом по таблице переходов, а не строка за строкой. Удаление объявления
+-- удаляет строку ленты каскадом. Переименование категории или продавца
+-- обновляет только их строки ленты.
+CREATE TABLE IF NOT EXISTS adv.advert_feed (
+    id            integer PRIMARY KEY REFERENCES adv.adverts (id) ON DELETE CASCADE,
+    content       text,
+    description   text,
+    id_category   integer NOT NULL,
+    category_name text,
+    price         integer,
+    status        integer,
+    id_seller     integer NOT NULL,
+    seller_name   text,
+    date_created  timestamp
+);
+
+CREATE INDEX IF NOT EXISTS advert_feed_date_created_id_idx
+    ON adv.advert_feed (date_created DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS advert_feed_category_date_created_id_idx
+    ON adv.advert_feed (id_category, date_created DESC, id DESC);
+
+-- переименование продавца находит его строки по id_seller
+CREATE INDEX IF NOT EXISTS advert_feed_seller_idx
+    ON adv.advert_feed (id_seller);
+
+
+-- Объявления: новые и изменённые строки -> лента
+CREATE OR REPLACE FUNCTION adv.advert_feed_upsert() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = adv, pg_temp AS $$
+BEGIN
+    INSERT INTO adv.advert_feed (id, content, description, id_category, category_name,
+                                 price, status, id_seller, seller_name, date_created)
+    SELECT a.id, a.content, a.description, a.id_category, c.name,
+           a.price, a.status, a.id_seller, p.fio, a.date_created
+    FROM changed a
+    JOIN adv.categories c ON c.id = a.id_category
+    JOIN adv.sellers s ON s.id = a.id_seller
+    JOIN adv.profiles p ON p.id = s.profile_id
+    ON CONFLICT (id) DO UPDATE SET
+        content = EXCLUDED.content,
+        description = EXCLUDED.description,
+        id_category = EXCLUDED.id_category,
+        category_name = EXCLUDED.category_name,
+        price = EXCLUDED.price,
+        status = EXCLUDED.status,
+        id_seller = EXCLUDED.id_seller,
+        seller_name = EXCLUDED.seller_name,
+        date_created = EXCLUDED.date_created;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS advert_feed_insert ON adv.adverts;
+CREATE TRIGGER advert_feed_insert
+    AFTER INSERT ON adv.adverts
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION adv.advert_feed_upsert();
+
+DROP TRIGGER IF EXISTS advert_feed_update ON adv.adverts;
+CREATE TRIGGER advert_feed_update
+    AFTER UPDATE ON adv.adverts
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION adv.advert_feed_upsert();
+
+
+-- Категории: новое название -> строки ленты этой категории
+CREATE OR REPLACE FUNCTION adv.advert_feed_category_renamed() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = adv, pg_temp AS $$
+BEGIN
+    UPDATE adv.advert_feed f
+    SET category_name = n.name
+    FROM renamed_new n
+    JOIN renamed_old o ON o.id = n.id
+    WHERE f.id_category = n.id AND n.name IS DISTINCT FROM o.name;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS advert_feed_category_rename ON adv.categories;
+CREATE TRIGGER advert_feed_category_rename
+    AFTER UPDATE ON adv.categories
+    REFERENCING OLD TABLE AS renamed_old NEW TABLE AS renamed_new
+    FOR EACH STATEMENT EXECUTE FUNCTION adv.advert_feed_category_renamed();
+
+
+-- Профили: новое ФИО -> строки ленты объявлений этого продавца
+CREATE OR REPLACE FUNCTION adv.advert_feed_seller_renamed() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = adv, pg_temp AS $$
+BEGIN
+    UPDATE adv.advert_feed f
+    SET seller_name = n.fio
+    FROM renamed_new n
+    JOIN renamed_old o ON o.id = n.id
+    JOIN adv.sellers s ON s.profile_id = n.id
+    WHERE f.id_seller = s.id AND n.fio IS DISTINCT FROM o.fio;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS advert_feed_seller_rename ON adv.profiles;
+CREATE TRIGGER advert_feed_seller_rename
+    AFTER UPDATE ON adv.profiles
+    REFERENCING OLD TABLE AS renamed_old NEW TABLE AS renamed_new
+    FOR EACH STATEMENT EXECUTE FUNCTION adv.advert_feed_seller_renamed();
+
+
+-- Уже существующие объявления — один раз при миграции
+INSERT INTO adv.advert_feed (id, content, description, id_category, category_name,
+                             price, status, id_seller, seller_name, date_created)
+SELECT a.id, a.content, a.description, a.id_category, c.name,
+       a.price, a.status, a.id_seller, p.fio, a.date_created
+FROM adv.adverts a
+JOIN adv.categories c ON c.id = a.id_category
+JOIN adv.sellers s ON s.id = a.id_seller
+JOIN adv.profiles p ON p.id = s.profile_id
+ON CONFLICT (id) DO NOTHING;
+
+GRANT SELECT ON adv.advert_feed TO admin, authorized_user, any_user;
@@ -0,0 +1,13 @@
+-- Одно объявление попадает в избранное пользователя один раз: повторный клик
+-- «в избранное» (двойной клик, повтор запроса) не создаёт дубликат, а
+-- INSERT ... ON CONFLICT (id_customer, id_advert) DO NOTHING опирается на этот ключ.
+--
+-- Уже накопленные дубликаты схлопываются до самой ранней записи.
+DELETE FROM adv.likes l
+USING adv.likes earlier
+WHERE earlier.id_customer = l.id_customer
+  AND earlier.id_advert = l.id_advert
+  AND earlier.id < l.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS likes_customer_advert_uidx
+    ON adv.likes (id_customer, id_advert);
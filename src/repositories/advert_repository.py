@@ -1,198 +1,203 @@
-from sqlalchemy import text
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import logging
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from typing import List, Optional, cast
+from typing import AsyncIterator, List, Optional, Set, Type
 from sqlalchemy.engine import RowMapping
 
 from abstract_repositories.iadvert_repository import IAdvertRepository
 from models.advert import Advert
 from dto.advert_dto import AdvertWithCategoryDTO
+from core.db import STREAM_FETCH_SIZE
+from core.pagination import Cursor, DEFAULT_PAGE_SIZE
+from core.rows import TrustedRow, materialize, materialize_first, row_factory
+from dto.rows import AdvertRow, AdvertWithCategoryRow
+from repositories.statements import statements
+
+logger = logging.getLogger(__name__)
 
 class AdvertsRepository(IAdvertRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create(self, advert: Advert) -> Optional[Advert]:
-        try:
-            # Получаем максимальный id
-            max_id_query = text("SELECT MAX(id) AS max_id FROM adv.adverts")
-            result = await self.session.execute(max_id_query)
-            row: Optional[RowMapping] = result.mappings().first()
-            max_id = cast(Optional[int], row["max_id"]) if row is not None else None
-            next_id = (max_id or 0) + 1
-
-            # Вставляем с явным id
-            insert_query = text("""
-                INSERT INTO adv.adverts (id, content, description, id_category, price, status, id_seller)
-                VALUES (:id, :content, :description, :id_category, :price, :status, :id_seller)
-                RETURNING id, content, description, id_category, price, status, id_seller, date_created
-            """)
-            result = await self.session.execute(insert_query, {
-                "id": next_id,
-                "content": advert.content,
-                "description": advert.description,
-                "id_category": advert.id_category,
-                "price": advert.price,
-                "status": advert.status,
-                "id_seller": advert.id_seller
-            })
-            row = result.mappings().first()
-            await self.session.commit()
-            if row:
-                return Advert(**row)
-
-        except IntegrityError:
-            print("Ошибка: такое объявление уже существует.")
-            await self.session.rollback()
-        except SQLAlchemyError as e:
-            print(f"Ошибка при создании объявления: {e}")
-            await self.session.rollback()
-
-        return None
+        # id выдаёт последовательность adv.adverts_id_seq — один запрос на вставку.
+        # Ошибку не глушим: транзакцию запроса целиком откатит open_locator.
+        result = await self.session.execute(statements["adverts.create"], {
+            "content": advert.content,
+            "description": advert.description,
+            "id_category": advert.id_category,
+            "price": advert.price,
+            "status": advert.status,
+            "id_seller": advert.id_seller
+        })
+        return materialize_first(AdvertRow, result)
+
+    async def create_many(self, adverts: List[Advert]) -> List[Advert]:
+        """
+        Вставляет пачку объявлений одним INSERT ... RETURNING. Ошибку не глушим:
+        импорт пишет каждую пачку в своей транзакции и сам решает, что делать при откате.
+        """
+        columns = ("content", "description", "id_category", "price", "status", "id_seller")
+        params = {name: [getattr(advert, name) for advert in adverts] for name in columns}
+        result = await self.session.execute(statements["adverts.create_many"], params)
+        return materialize(AdvertRow, result)
 
     async def get_by_id(self, advert_id: int) -> Optional[Advert]:
-        query = text("SELECT * FROM adv.adverts WHERE id = :id")
         try:
-            result = await self.session.execute(query, {"id": advert_id})
-            row = result.mappings().first()
-            return Advert(**row) if row else None
+            result = await self.session.execute(statements["adverts.by_id"], {"id": advert_id})
+            return materialize_first(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявления {advert_id}: {e}")
+            logger.error("Ошибка при получении объявления %s: %s", advert_id, e)
             return None
 
-    async def get_all_adverts(self) -> List[Advert]:
-        query = text("SELECT * FROM adv.adverts ORDER BY date_created DESC")
+    async def get_all_adverts(self, after: Optional[Cursor] = None, limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]:
+        query, params = statements.listing("adverts.all")(after)
         try:
-            result = await self.session.execute(query)
-            return [Advert(**row) for row in result.mappings()]
+            result = await self.session.execute(query, {**params, "limit": limit})
+            return materialize(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении списка объявлений: {e}")
+            logger.error("Ошибка при получении списка объявлений: %s", e)
             return []
 
+    # -----------------
+    # Потоковое чтение: серверный курсор, строки приходят пачками по fetch_size
+    # -----------------
+    async def _stream(self, query, params: dict, row_type: Type[TrustedRow],
+                      fetch_size: int) -> AsyncIterator[TrustedRow]:
+        """
+        Отдаёт строки по одной, не держа весь результат в памяти: драйвер открывает
+        серверный курсор и подкачивает по fetch_size строк. Ошибку не глушим —
+        оборванная выгрузка не должна выглядеть как законченная.
+        """
+        try:
+            result = await self.session.stream(query, params, execution_options={"yield_per": fetch_size})
+            try:
+                make = row_factory(row_type, result.keys())
+                async for row in result:
+                    yield make(row)
+            finally:
+                # курсор закрывается и когда потребитель прервал чтение раньше конца
+                await result.close()
+        except SQLAlchemyError as e:
+            # транзакцию запроса откатит open_locator
+            logger.error("Ошибка при потоковом чтении объявлений: %s", e)
+            raise
+
+    def iter_all_adverts(self, after: Optional[Cursor] = None,
+                         fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[Advert]:
+        query, params = statements.listing("adverts.all")(after, limited=False)
+        return self._stream(query, params, AdvertRow, fetch_size)
+
+    def iter_adverts_by_category(self, category_id: int, after: Optional[Cursor] = None,
+                                 fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[Advert]:
+        query, params = statements.listing("adverts.by_category")(after, limited=False)
+        return self._stream(query, {**params, "category_id": category_id}, AdvertRow, fetch_size)
+
+    def iter_all_with_full_info(self, user_id: int | None = None, after: Optional[Cursor] = None,
+                                fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[AdvertWithCategoryDTO]:
+        query, params = statements.listing("feed.all")(after, limited=False)
+        return self._stream(query, {**params, "customer_id": user_id},
+                            AdvertWithCategoryRow, fetch_size)
+
+    def iter_all_by_category_authorized(self, category_id: int, user_id: int | None,
+                                        after: Optional[Cursor] = None,
+                                        fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[AdvertWithCategoryDTO]:
+        query, params = statements.listing("feed.by_category")(after, limited=False)
+        return self._stream(query, {**params, "customer_id": user_id, "category_id": category_id},
+                            AdvertWithCategoryRow, fetch_size)
+
+    def iter_adverts_by_key_word(self, key_word: str, user_id: int | None = None, after: Optional[Cursor] = None,
+                                 fetch_size: int = STREAM_FETCH_SIZE) -> AsyncIterator[AdvertWithCategoryDTO]:
+        query, params = statements.listing("feed.search")(after, limited=False)
+        return self._stream(query,
+                            {**params, "kw": key_word, "customer_id": user_id},
+                            AdvertWithCategoryRow, fetch_size)
+
     async def get_advert_by_user(self, user_id: int) -> List[Advert]:
-        query = text("SELECT * FROM adv.adverts WHERE id_seller = :user_id ORDER BY date_created DESC")
         try:
-            result = await self.session.execute(query, {"user_id": user_id})
-            return [Advert(**row) for row in result.mappings()]
+            result = await self.session.execute(statements["adverts.by_seller"], {"user_id": user_id})
+            return materialize(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявлений пользователя {user_id}: {e}")
+            logger.error("Ошибка при получении объявлений пользователя %s: %s", user_id, e)
             return []
 
     async def is_created(self, user_id: int, advert_id: int) -> bool:
-        query = text("SELECT * FROM adv.adverts WHERE id_seller = :uid AND id = :aid")
-        row = await self.session.execute(query, {"uid": user_id, "aid": advert_id})
-        await self.session.commit()
+        result = await self.session.execute(statements["adverts.is_created"], {"uid": user_id, "aid": advert_id})
+        return bool(result.scalar())
 
-        res = [Advert(**row)  for row in row.mappings()]
-        if len(res):
-            return True
-        return False
-
-    async def get_adverts_by_key_word(self, key_word: str) -> List[Advert]:
-        query = text("SELECT * FROM adv.search_adverts(:kw)")
+    async def is_created_many(self, user_id: int, advert_ids: List[int]) -> Set[int]:
+        """Возвращает подмножество advert_ids, созданных пользователем (один запрос)."""
+        if not advert_ids:
+            return set()
+        try:
+            result = await self.session.execute(statements["adverts.created_among"],
+                                                {"uid": user_id, "aids": list(advert_ids)})
+            return set(result.scalars())
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при проверке авторства объявлений: %s", e)
+            return set()
+
+    async def get_adverts_by_key_word(self, key_word: str, user_id: int | None = None,
+                                      after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]:
+        """
+        Полнотекстовый поиск по content и description (русская морфология).
+        Использует GIN-индекс по adv.adverts.search_vector, результаты упорядочены
+        по релевантности и постранично отдаются через курсор (rank, date_created, id).
+        """
+        query, params = statements.listing("feed.search")(after)
         try:
-            result = await self.session.execute(query, {"kw": f"%{key_word}%"})
-            return [Advert(**row) for row in result.mappings()]
+            result = await self.session.execute(query, {**params, "kw": key_word, "customer_id": user_id,
+                                                        "limit": limit})
+            return materialize(AdvertWithCategoryRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при поиске объявлений по ключевому слову '{key_word}': {e}")
+            logger.error("Ошибка при поиске объявлений по ключевому слову '%s': %s", key_word, e)
             return []
 
     async def get_adverts_by_filter(self, begin_time: datetime, end_time: datetime) -> List[Advert]:
-        query = text("""
-            SELECT * FROM adv.adverts 
-            WHERE date_created BETWEEN :begin_time AND :end_time
-            ORDER BY date_created DESC
-        """)
         try:
-            result = await self.session.execute(query, {"begin_time": begin_time, "end_time": end_time})
-            return [Advert(**row) for row in result.mappings()]
+            result = await self.session.execute(statements["adverts.by_period"],
+                                                {"begin_time": begin_time, "end_time": end_time})
+            return materialize(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при фильтрации объявлений: {e}")
+            logger.error("Ошибка при фильтрации объявлений: %s", e)
             return []
 
-    async def get_adverts_by_category(self, category_id: int) -> List[Advert]:
-        query = text("SELECT * FROM adv.adverts WHERE id_category = :category_id ORDER BY date_created DESC")
+    async def get_adverts_by_category(self, category_id: int, after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]:
+        query, params = statements.listing("adverts.by_category")(after)
         try:
-            result = await self.session.execute(query, {"category_id": category_id})
-            return [Advert(**row) for row in result.mappings()]
+            result = await self.session.execute(query, {**params, "category_id": category_id, "limit": limit})
+            return materialize(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявлений по категории {category_id}: {e}")
+            logger.error("Ошибка при получении объявлений по категории %s: %s", category_id, e)
             return []
 
-    async def delete_advert(self, advert_id: int, user_id: int) -> None:
-        query = text("DELETE FROM adv.adverts WHERE id = :advert_id AND id_seller = :user_id")
-        try:
-            await self.session.execute(query, {"advert_id": advert_id, "user_id": user_id})
-            await self.session.commit()
-        except SQLAlchemyError as e:
-            print(f"Ошибка при удалении объявления {advert_id}: {e}")
-            await self.session.rollback()
-
-    async def get_all_with_full_info(self, user_id: int | None = None):
-        query = text("""
-                  SELECT 
-    a.id,
-    a.content,
-    a.description,
-    a.id_category,
-    c.name AS category_name,
-    a.price,
-    a.status,
-    a.id_seller,
-    p.fio AS seller_name,
-    a.date_created,
-    CASE WHEN f.id_customer IS NOT NULL THEN true ELSE false END AS is_favorite,
-    CASE WHEN pur.id IS NOT NULL THEN true ELSE false END AS is_bought,
-    CASE WHEN a.id_seller = :customer_id THEN true ELSE false END AS is_created
-FROM adv.adverts a
-JOIN adv.categories c ON a.id_category = c.id
-JOIN adv.sellers s ON a.id_seller = s.id
-JOIN adv.profiles p ON s.profile_id = p.id
-LEFT JOIN adv.likes f ON f.id_advert = a.id AND f.id_customer = :customer_id
-LEFT JOIN adv.deals pur ON pur.id_advert = a.id AND pur.id_customer = :customer_id
-ORDER BY a.date_created DESC
-                """)
+    async def delete_advert(self, advert_id: int, user_id: int) -> bool:
+        """True, если объявление действительно удалено (его мог опередить параллельный запрос)."""
+        result = await self.session.execute(statements["adverts.delete"], {"advert_id": advert_id, "user_id": user_id})
+        return result.rowcount > 0
+
+    async def get_all_with_full_info(self, user_id: int | None = None, after: Optional[Cursor] = None,
+                                     limit: int = DEFAULT_PAGE_SIZE):
+        query, params = statements.listing("feed.all")(after)
 
         try:
-            result = await self.session.execute(query, {"customer_id": user_id})
-            rows = result.mappings().all()
-            return [AdvertWithCategoryDTO(**row) for row in rows]
+            result = await self.session.execute(query, {**params, "customer_id": user_id, "limit": limit})
+            return materialize(AdvertWithCategoryRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявлений с категориями и флагами: {e}")
+            logger.error("Ошибка при получении объявлений с категориями и флагами: %s", e)
             return []
 
-    async def get_all_by_category_authorized(self, category_id: int, user_id: int):
-        query = text("""
-                            SELECT 
-                                a.id,
-                                a.content,
-                                a.description,
-                                a.id_category,
-                                c.name AS category_name,
-                                a.price,
-                                a.status,
-                                a.id_seller,
-                                p.fio AS seller_name,
-                                a.date_created,
-                                CASE WHEN f.id_customer IS NOT NULL THEN true ELSE false END AS is_favorite,
-                                CASE WHEN pur.id IS NOT NULL THEN true ELSE false END AS is_bought
-                            FROM adv.adverts a
-                            JOIN adv.categories c ON a.id_category = c.id
-                            JOIN adv.sellers s ON a.id_seller = s.id
-                            JOIN adv.profiles p ON s.profile_id = p.id
-                            LEFT JOIN adv.likes f 
-                                   ON f.id_advert = a.id AND f.id_customer = :customer_id
-                            LEFT JOIN adv.deals pur 
-                                   ON pur.id_advert = a.id AND pur.id_customer = :customer_id
-                            WHERE id_category = :category_id
-                            ORDER BY a.date_created DESC
-                        """)
+    async def get_all_by_category_authorized(self, category_id: int, user_id: int | None,
+                                             after: Optional[Cursor] = None, limit: int = DEFAULT_PAGE_SIZE):
+        query, params = statements.listing("feed.by_category")(after)
 
         try:
-            result = await self.session.execute(query, {"customer_id": user_id, "category_id":category_id})
-            rows = result.mappings().all()
-            return [AdvertWithCategoryDTO(**row) for row in rows]
+            result = await self.session.execute(query, {**params, "customer_id": user_id, "category_id": category_id,
+                                                        "limit": limit})
+            return materialize(AdvertWithCategoryRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявлений с категориями и флагами: {e}")
+            logger.error("Ошибка при получении объявлений с категориями и флагами: %s", e)
             return []
@@ -1,12 +1,17 @@
+import logging
 from models.category import Category
 from abstract_repositories.icategory_repository import ICategoryRepository
+from core.rows import materialize
+from dto.rows import CategoryRow
+from repositories.statements import statements
 
 
-from sqlalchemy import text
 from sqlalchemy.exc import  SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 class CategoryRepository(ICategoryRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -14,23 +19,21 @@ class CategoryRepository(ICategoryRepository):
 
 
     async def get_all(self) -> List[Category]:
-        query = text("SELECT * FROM adv.categories ")
         try:
-            result = await self.session.execute(query)
-            return [Category(**row) for row in result.mappings()]
+            result = await self.session.execute(statements["categories.all"])
+            return materialize(CategoryRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении списка categoory: {e}")
+            logger.error("Ошибка при получении списка категорий: %s", e)
             return []
 
     async def get_name_by_id(self, id_category: int) -> str:
-        query = text("SELECT name FROM adv.categories WHERE id = :id")
         try:
-            result = await self.session.execute(query, {'id': id_category})
+            result = await self.session.execute(statements["categories.name"], {'id': id_category})
             category = result.mappings().first()  # Получаем первую (и единственную) строку результата
             if category:
                 return category['name']  # Возвращаем имя категории
             else:
                 return "Категория не найдена"  # Если категория не найдена
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении категории: {e}")
+            logger.error("Ошибка при получении категории: %s", e)
             return "Ошибка при получении категории"
\ No newline at end of file
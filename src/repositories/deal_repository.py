@@ -1,14 +1,19 @@
-from sqlalchemy import text
+import logging
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Set
 
-from typing import Optional, cast
+from typing import Optional
 from sqlalchemy.engine import RowMapping
 
 from abstract_repositories.ideal_repository import IDealRepository
+from core.rows import materialize, materialize_first
+from dto.rows import AdvertRow, DealRow
 from models.advert import Advert
 from models.deal import Deal
+from repositories.statements import statements
+
+logger = logging.getLogger(__name__)
 
 
 class DealRepository(IDealRepository):
@@ -16,49 +21,46 @@ class DealRepository(IDealRepository):
         self.session = session
 
     async def create_deal(self, user_id: int, advert_id: int) -> Deal:
-        max_id_query = text("SELECT MAX(id) AS max_id FROM adv.deals")
-        result = await self.session.execute(max_id_query)
-        row_max: Optional[RowMapping] = result.mappings().first()
-        max_id = cast(Optional[int], row_max["max_id"]) if row_max is not None else None
-        next_id = (max_id or 0) + 1
-
-        insert_query = text("""
-             INSERT INTO adv.deals (id, id_customer, id_advert, address)
-             VALUES (:id, :id_customer, :id_advert, :address)
-             RETURNING id, id_customer, id_advert, date_created, address
-         """)
-        result = await self.session.execute(insert_query, {
-            "id": next_id,
+        result = await self.session.execute(statements["deals.create"], {
             "id_customer": user_id,
             "id_advert": advert_id,
             "address": "online"
         })
-        row_insert: Optional[RowMapping] = result.mappings().first()
-        await self.session.commit()
-        if row_insert is None:
+        deal = materialize_first(DealRow, result)
+        if deal is None:
             raise SQLAlchemyError("INSERT INTO adv.deals returned no row")
-        return Deal(**row_insert)
+        return deal
 
     async def get_deals_by_user(self, user_id: int) -> List[Advert]:
         try:
-            query = text("""
-                SELECT * 
-                FROM adv.profile join adv.deals on adv.profile.id = adv.deals.id_customer as p join adv.adverts on adv.adverts.id = p.id_advert
-                WHERE id_seller = :user_id
-            """)
-            result = await self.session.execute(query, {"user_id": user_id,
-            })
-            return [Advert(**row)  for row in result.mappings()]
+            result = await self.session.execute(statements["deals.adverts_by_user"], {"user_id": user_id})
+            return materialize(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявления: {e}")
+            logger.error("Ошибка при получении объявления: %s", e)
             return []
 
 
     async def is_in_deals(self, user_id: int, advert_id: int) -> bool:
-        query = text("SELECT * FROM adv.deals WHERE id_customer = :uid AND id_advert = :aid")
-        row = await self.session.execute(query, {"uid": user_id, "aid": advert_id})
-        await self.session.commit()
-        res = [Deal(**row)  for row in row.mappings()]
-        if len(res):
-            return True
-        return False
\ No newline at end of file
+        result = await self.session.execute(statements["deals.exists"], {"uid": user_id, "aid": advert_id})
+        return bool(result.scalar())
+
+    async def is_in_deals_many(self, user_id: int, advert_ids: List[int]) -> Set[int]:
+        """Возвращает подмножество advert_ids, купленных пользователем (один запрос)."""
+        if not advert_ids:
+            return set()
+        try:
+            result = await self.session.execute(statements["deals.bought_among"],
+                                                {"uid": user_id, "aids": list(advert_ids)})
+            return set(result.scalars())
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при проверке сделок: %s", e)
+            return set()
+
+    async def get_bought_ids(self, user_id: int) -> Optional[List[int]]:
+        """Id всех купленных пользователем объявлений; None — ошибка БД (не кэшировать)."""
+        try:
+            result = await self.session.execute(statements["deals.ids_by_user"], {"uid": user_id})
+            return list(result.scalars())
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при получении покупок пользователя %s: %s", user_id, e)
+            return None
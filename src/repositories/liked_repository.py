@@ -1,71 +1,92 @@
-from sqlalchemy import text
+import logging
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from typing import Optional, cast
+from typing import Dict, List, Set
+from typing import Optional
 from sqlalchemy.engine import RowMapping
 
 from abstract_repositories.iliked_repository import ILikedRepository
+from core.rows import materialize, materialize_first
+from dto.like_dto import LikeToggleResult
+from dto.rows import AdvertRow, LikedRow
 from models.advert import Advert
 from models.liked import Liked
+from repositories.statements import statements
+
+logger = logging.getLogger(__name__)
 
 class LikedRepository(ILikedRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def add_to_liked(self, user_id: int, advert_id: int) -> Optional[Liked]:
-        max_id_query = text("SELECT MAX(id) AS max_id FROM adv.liked")
-        result = await self.session.execute(max_id_query)
-        row: Optional[RowMapping] = result.mappings().first()
-        max_id = cast(Optional[int], row["max_id"]) if row is not None else None
-        next_id = (max_id or 0) + 1
-
-        insert_query = text("""
-                        INSERT INTO adv.liked (id, id_customer, id_advert)
-                        VALUES (:id, :id_customer, :id_advert)
-                        RETURNING id, id_customer, id_advert, date_created
-                    """)
-        result = await self.session.execute(insert_query, {
-            "id": next_id,
-            "id_customer": user_id,
-            "id_advert": advert_id
-        })
-        row = result.mappings().first()
-        await self.session.commit()
-        if row:
-            return Liked(**row)
-        return None
+        """
+        Идемпотентно: если объявление уже в избранном, возвращается существующая строка.
+        Записи избранного — один запрос без точек сохранения: ошибка БД не глушится,
+        транзакцию запроса откатит open_locator.
+        """
+        params = {"id_customer": user_id, "id_advert": advert_id}
+        liked = materialize_first(LikedRow, await self.session.execute(statements["likes.create"], params))
+        if liked is None:
+            # лайк вставил параллельный запрос: ON CONFLICT дождался его commit, но снимок
+            # нашего запроса строку не видит — отдельный SELECT получит новый снимок
+            liked = materialize_first(LikedRow, await self.session.execute(statements["likes.by_pair"], params))
+        return liked
 
     async def remove_from_liked(self, user_id: int, advert_id: int) -> None:
-        query = text("DELETE FROM adv.likes WHERE id_advert = :advert_id AND id_customer = :user_id")
-        try:
-            await self.session.execute(query, {"advert_id": advert_id, "user_id": user_id})
-            await self.session.commit()
-        except SQLAlchemyError as e:
-            print(f"Ошибка при удалении объявления {advert_id}: {e}")
-            await self.session.rollback()
+        # повторное удаление (записи уже нет) — не ошибка
+        await self.session.execute(statements["likes.delete"], {"advert_id": advert_id, "user_id": user_id})
+
+    async def toggle_likes(self, user_id: int, toggles: Dict[int, bool]) -> LikeToggleResult:
+        """Пакет переключений {id объявления: в избранном?} одним запросом."""
+        if not toggles:
+            return LikeToggleResult()
+        result = await self.session.execute(statements["likes.toggle"], {
+            "uid": user_id,
+            "aids": list(toggles),
+            "states": list(toggles.values()),
+        })
+        report = LikeToggleResult()
+        for advert_id, liked, found, changed in result:
+            if not found:
+                report.missing.append(advert_id)
+                continue
+            (report.liked if liked else report.unliked).append(advert_id)
+            if changed:
+                report.changed.append(advert_id)
+        return report
 
     async def get_liked_by_user(self, user_id: int)-> List[Advert]:
         try:
-            query = text("""
-                SELECT * 
-                FROM adv.profile join adv.likes on adv.user.id = adv.likes.id_customer as p join adv.adverts on adv.adverts.id = p.id_advert
-                WHERE id_seller = :user_id
-            """)
-            result = await self.session.execute(query, {"user_id": user_id,
-            })
-            return [Advert(**row) for row in result.mappings()]
+            result = await self.session.execute(statements["likes.adverts_by_user"], {"user_id": user_id})
+            return materialize(AdvertRow, result)
         except SQLAlchemyError as e:
-            print(f"Ошибка при получении объявления: {e}")
+            logger.error("Ошибка при получении объявления: %s", e)
             return []
 
 
 
     async def is_liked(self, user_id: int, advert_id: int) -> bool:
-        query = text("SELECT * FROM adv.likes WHERE id_customer = :uid AND id_advert = :aid")
-        row = await self.session.execute(query, {"uid": user_id, "aid": advert_id})
-        await self.session.commit()
-        res = [Liked(**row) for row in row.mappings()]
-        if len(res):
-            return True
-        return False
\ No newline at end of file
+        result = await self.session.execute(statements["likes.exists"], {"uid": user_id, "aid": advert_id})
+        return bool(result.scalar())
+
+    async def is_liked_many(self, user_id: int, advert_ids: List[int]) -> Set[int]:
+        """Возвращает подмножество advert_ids, которые пользователь добавил в избранное (один запрос)."""
+        if not advert_ids:
+            return set()
+        try:
+            result = await self.session.execute(statements["likes.liked_among"],
+                                                {"uid": user_id, "aids": list(advert_ids)})
+            return set(result.scalars())
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при проверке избранного: %s", e)
+            return set()
+
+    async def get_liked_ids(self, user_id: int) -> Optional[List[int]]:
+        """Id всех объявлений в избранном пользователя; None — ошибка БД (не кэшировать)."""
+        try:
+            result = await self.session.execute(statements["likes.ids_by_user"], {"uid": user_id})
+            return list(result.scalars())
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при получении избранного пользователя %s: %s", user_id, e)
+            return None
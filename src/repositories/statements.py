@@ -0,0 +1,219 @@
+"""
+SQL всех репозиториев. Репозитории берут запросы отсюда по имени:
+statements["adverts.by_id"], statements.listing("feed.all")(after).
+"""
+from core.statements import StatementRegistry
+
+statements = StatementRegistry()
+
+
+# -----------------
+# Лента: строки adv.advert_feed (объявление с названием категории и именем продавца,
+# см. migrations/006_advert_feed.sql) и флаг is_created для пользователя :customer_id.
+# is_favorite / is_bought ставит AdvertService по множествам из core.user_sets.
+# alias — таблица ленты.
+# -----------------
+def feed_columns(alias: str) -> str:
+    return f"""
+        {alias}.id,
+        {alias}.content,
+        {alias}.description,
+        {alias}.id_category,
+        {alias}.category_name,
+        {alias}.price,
+        {alias}.status,
+        {alias}.id_seller,
+        {alias}.seller_name,
+        {alias}.date_created,
+        CASE WHEN {alias}.id_seller = :customer_id THEN true ELSE false END AS is_created
+    """
+
+
+def feed_listing(where: str):
+    return lambda keyset, limit: f"""
+        SELECT {feed_columns("a")}
+        FROM adv.advert_feed a
+        WHERE {where} AND {keyset}
+        ORDER BY a.date_created DESC, a.id DESC
+        {limit}
+    """
+
+
+def adverts_listing(where: str):
+    return lambda keyset, limit: f"""
+        SELECT * FROM adv.adverts
+        WHERE {where} AND {keyset}
+        ORDER BY date_created DESC, id DESC
+        {limit}
+    """
+
+
+def search_listing(keyset: str, limit: str) -> str:
+    return f"""
+        WITH hits AS (
+            SELECT a.id, a.date_created, ts_rank_cd(a.search_vector, q.query) AS rank
+            FROM adv.adverts a, websearch_to_tsquery('russian', :kw) AS q(query)
+            WHERE a.search_vector @@ q.query
+        )
+        SELECT {feed_columns("af")}, h.rank
+        FROM hits h
+        JOIN adv.advert_feed af ON af.id = h.id
+        WHERE {keyset}
+        ORDER BY h.rank DESC, h.date_created DESC, h.id DESC
+        {limit}
+    """
+
+
+statements.define_listing("feed.all", feed_listing("TRUE"), alias="a")
+statements.define_listing("feed.by_category", feed_listing("a.id_category = :category_id"), alias="a")
+statements.define_listing("feed.search", search_listing, alias="h", ranked=True)
+
+
+# -----------------
+# Объявления
+# -----------------
+statements.define_listing("adverts.all", adverts_listing("TRUE"))
+statements.define_listing("adverts.by_category", adverts_listing("id_category = :category_id"))
+
+statements.define("adverts.create", """
+    INSERT INTO adv.adverts (content, description, id_category, price, status, id_seller)
+    VALUES (:content, :description, :id_category, :price, :status, :id_seller)
+    RETURNING id, content, description, id_category, price, status, id_seller, date_created
+""")
+# пачка объявлений одним запросом: столбцы передаются массивами, текст запроса не зависит от размера пачки
+statements.define("adverts.create_many", """
+    INSERT INTO adv.adverts (content, description, id_category, price, status, id_seller)
+    SELECT * FROM unnest(
+        CAST(:content AS text[]), CAST(:description AS text[]), CAST(:id_category AS int[]),
+        CAST(:price AS int[]), CAST(:status AS int[]), CAST(:id_seller AS int[])
+    )
+    RETURNING id, content, description, id_category, price, status, id_seller, date_created
+""")
+statements.define("adverts.by_id", "SELECT * FROM adv.adverts WHERE id = :id")
+statements.define("adverts.by_seller",
+                  "SELECT * FROM adv.adverts WHERE id_seller = :user_id ORDER BY date_created DESC")
+statements.define("adverts.by_period", """
+    SELECT * FROM adv.adverts
+    WHERE date_created BETWEEN :begin_time AND :end_time
+    ORDER BY date_created DESC
+""")
+statements.define("adverts.is_created",
+                  "SELECT EXISTS (SELECT 1 FROM adv.adverts WHERE id_seller = :uid AND id = :aid)")
+statements.define("adverts.created_among",
+                  "SELECT id FROM adv.adverts WHERE id_seller = :uid AND id = ANY(:aids)")
+statements.define("adverts.delete", "DELETE FROM adv.adverts WHERE id = :advert_id AND id_seller = :user_id")
+
+
+# -----------------
+# Категории
+# -----------------
+statements.define("categories.all", "SELECT * FROM adv.categories")
+statements.define("categories.name", "SELECT name FROM adv.categories WHERE id = :id")
+
+
+# -----------------
+# Сделки
+# -----------------
+statements.define("deals.create", """
+    INSERT INTO adv.deals (id_customer, id_advert, address)
+    VALUES (:id_customer, :id_advert, :address)
+    RETURNING id, id_customer, id_advert, date_created, address
+""")
+statements.define("deals.adverts_by_user", """
+    SELECT a.*
+    FROM adv.deals d
+    JOIN adv.adverts a ON a.id = d.id_advert
+    WHERE d.id_customer = :user_id
+    ORDER BY d.date_created DESC, d.id DESC
+""")
+statements.define("deals.exists",
+                  "SELECT EXISTS (SELECT 1 FROM adv.deals WHERE id_customer = :uid AND id_advert = :aid)")
+statements.define("deals.bought_among",
+                  "SELECT DISTINCT id_advert FROM adv.deals WHERE id_customer = :uid AND id_advert = ANY(:aids)")
+statements.define("deals.ids_by_user", "SELECT DISTINCT id_advert FROM adv.deals WHERE id_customer = :uid")
+
+
+# -----------------
+# Избранное
+# -----------------
+# Повторный лайк (двойной клик) не создаёт дубликат: ключ (id_customer, id_advert)
+# из migrations/007_likes_unique.sql, возвращается уже существующая строка.
+statements.define("likes.create", """
+    WITH ins AS (
+        INSERT INTO adv.likes (id_customer, id_advert)
+        VALUES (:id_customer, :id_advert)
+        ON CONFLICT (id_customer, id_advert) DO NOTHING
+        RETURNING id, id_customer, id_advert, date_created
+    )
+    SELECT id, id_customer, id_advert, date_created FROM ins
+    UNION ALL
+    SELECT id, id_customer, id_advert, date_created
+    FROM adv.likes
+    WHERE id_customer = :id_customer AND id_advert = :id_advert
+    LIMIT 1
+""")
+statements.define("likes.delete", "DELETE FROM adv.likes WHERE id_advert = :advert_id AND id_customer = :user_id")
+statements.define("likes.adverts_by_user", """
+    SELECT a.*
+    FROM adv.likes l
+    JOIN adv.adverts a ON a.id = l.id_advert
+    WHERE l.id_customer = :user_id
+    ORDER BY l.date_created DESC, l.id DESC
+""")
+statements.define("likes.by_pair", """
+    SELECT id, id_customer, id_advert, date_created
+    FROM adv.likes
+    WHERE id_customer = :id_customer AND id_advert = :id_advert
+""")
+statements.define("likes.exists",
+                  "SELECT EXISTS (SELECT 1 FROM adv.likes WHERE id_customer = :uid AND id_advert = :aid)")
+statements.define("likes.liked_among",
+                  "SELECT id_advert FROM adv.likes WHERE id_customer = :uid AND id_advert = ANY(:aids)")
+statements.define("likes.ids_by_user", "SELECT id_advert FROM adv.likes WHERE id_customer = :uid")
+# Пакет переключений одним запросом: liked = true — добавить, false — убрать.
+# changed — строка действительно вставлена или удалена, found — объявление существует.
+statements.define("likes.toggle", """
+    WITH wanted AS (
+        SELECT w.id_advert, w.liked, EXISTS (SELECT 1 FROM adv.adverts a WHERE a.id = w.id_advert) AS found
+        FROM unnest(CAST(:aids AS int[]), CAST(:states AS bool[])) AS w (id_advert, liked)
+    ), removed AS (
+        DELETE FROM adv.likes l
+        USING wanted w
+        WHERE l.id_customer = :uid AND l.id_advert = w.id_advert AND NOT w.liked
+        RETURNING l.id_advert
+    ), added AS (
+        INSERT INTO adv.likes (id_customer, id_advert)
+        SELECT :uid, w.id_advert FROM wanted w WHERE w.liked AND w.found
+        ON CONFLICT (id_customer, id_advert) DO NOTHING
+        RETURNING id_advert
+    )
+    SELECT w.id_advert, w.liked, w.found,
+           (w.id_advert IN (SELECT id_advert FROM removed)
+            OR w.id_advert IN (SELECT id_advert FROM added)) AS changed
+    FROM wanted w
+""")
+
+
+# -----------------
+# Пользователи
+# -----------------
+# profiles + customers + sellers одним запросом; id профиля выдаёт adv.profiles_id_seq
+statements.define("users.create", """
+    WITH profile AS (
+        INSERT INTO adv.profiles (nickname, fio, email, phone_number, password)
+        VALUES (:nickname, :fio, :email, :phone_number, :password)
+        RETURNING id
+    ), customer AS (
+        INSERT INTO adv.customers (profile_id, rating)
+        SELECT id, :rating FROM profile
+    ), seller AS (
+        INSERT INTO adv.sellers (profile_id, rating)
+        SELECT id, :rating FROM profile
+    )
+    SELECT id FROM profile
+""")
+statements.define("users.delete_customer", "DELETE FROM adv.customers WHERE profile_id = :id")
+statements.define("users.delete_seller", "DELETE FROM adv.sellers WHERE profile_id = :id")
+statements.define("users.delete_profile", "DELETE FROM adv.profiles WHERE id = :id")
+statements.define("users.update_password", "UPDATE adv.profiles SET password = :password WHERE id = :id")
+statements.define("users.by_email", "SELECT * FROM adv.profiles WHERE email = :email")
@@ -1,60 +1,43 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-
-from services.advert_service import AdvertService
-from services.liked_service import *
-from services.deal_service import *
-from repositories.liked_repository import *
-from repositories.deal_repository import *
-from repositories.advert_repository import AdvertsRepository
+from core.timing import timed_templates
 
 from models.advert import Advert
 
-from repositories.category_repository import *
-from services.category_service import *
-
-from core.db import create_session
+from service_locator import ServiceLocator, get_request_locator
 
 
-templates = Jinja2Templates(directory="templates")
+templates = timed_templates("templates")
 advert_router = APIRouter()
 
 
 @advert_router.get("/profile/create_advert", response_class=HTMLResponse)
-async def create_advert_form(request: Request):
+async def create_advert_form(request: Request, sl: ServiceLocator = Depends(get_request_locator)):
     if not request.state.user:
         return RedirectResponse(url="/login", status_code=303)
 
-    db = create_session("authorized_user")
-    try:
-        category_service = CategoryService(CategoryRepository(db))
-        categories = await category_service.get_all()
-        return templates.TemplateResponse(
-            "create_advert.html",
-            {
-                "request": request,
-                "user": request.state.user,
-                "categories": categories
-            }
-        )
-    finally:
-        await db.close()
+    categories = await sl.get_category_service().get_all()
+    return templates.TemplateResponse(
+        "create_advert.html",
+        {
+            "request": request,
+            "user": request.state.user,
+            "categories": categories
+        }
+    )
 
 
 
 @advert_router.post("/profile/create_advert")
 async def create_advert(
     request: Request,
-
+    sl: ServiceLocator = Depends(get_request_locator),
 ):
     if not request.state.user:
         return RedirectResponse(url="/login", status_code=303)
 
-    db = create_session("authorized_user")
     try:
-        advert_repo = AdvertsRepository(db)
-        advert_service = AdvertService(advert_repo)
+        advert_service = sl.get_advert_service()
 
         form_data = await request.form()
         content = form_data.get("content")
@@ -76,7 +59,7 @@ async def create_advert(
         return RedirectResponse(url="/profile/my_adverts", status_code=303)
     except Exception as e:
         # При ошибке повторно показываем форму
-        categories = await CategoryService(CategoryRepository(db)).get_all()
+        categories = await sl.get_category_service().get_all()
         return templates.TemplateResponse(
             "create_advert.html",
             {
@@ -86,5 +69,3 @@ async def create_advert(
                 "error": str(e)
             }
         )
-    finally:
-        await db.close()
\ No newline at end of file
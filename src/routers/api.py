@@ -0,0 +1,213 @@
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from starlette.datastructures import UploadFile
+from fastapi.responses import StreamingResponse
+
+from core.bulk_import import EXTENSIONS, PARSERS, RawRow
+from core.pagination import Cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, next_cursor
+from core.serialization import FastJSONResponse, dumps, parse_fields, project
+from dto.advert_dto import AdvertWithCategoryDTO
+from dto.like_dto import LikeToggleRequest
+from models.advert import Advert
+from repositories.advert_repository import AdvertsRepository
+from service_locator import ServiceLocator, get_request_locator, open_locator, request_role
+
+
+api_router = APIRouter(prefix="/api/v1", tags=["api"], default_response_class=FastJSONResponse)
+
+NDJSON = "application/x-ndjson"
+
+FEED_FIELDS = set(AdvertWithCategoryDTO.model_fields)
+ADVERT_FIELDS = set(Advert.model_fields)
+
+# (локатор, id пользователя, курсор, размер страницы) -> страница ленты
+PageLoader = Callable[[ServiceLocator, Optional[int], Optional[Cursor], int], Awaitable[List[AdvertWithCategoryDTO]]]
+# (локатор, id пользователя, курсор) -> вся лента после курсора, по одному объявлению
+FeedIterator = Callable[[ServiceLocator, Optional[int], Optional[Cursor]], AsyncIterator[AdvertWithCategoryDTO]]
+
+
+def current_user_id(request: Request) -> Optional[int]:
+    return request.state.user["id"] if request.state.user else None
+
+
+def require_user_id(request: Request) -> int:
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return request.state.user["id"]
+
+
+def wants_ndjson(request: Request, format: str) -> bool:
+    return format == "ndjson" or NDJSON in request.headers.get("accept", "")
+
+
+async def stream_ndjson(role: str, iterate: FeedIterator, user_id: Optional[int],
+                        after: Optional[Cursor], fields: Optional[set[str]]) -> AsyncIterator[bytes]:
+    """
+    Вся лента начиная с after, по строке JSON на объявление.
+    Строки читаются серверным курсором и уходят клиенту сразу, список в памяти не собирается.
+    Сессия своя: зависимости FastAPI закрываются раньше, чем отправляется тело ответа.
+    """
+    async with open_locator(role) as sl:
+        async for item in iterate(sl, user_id, after):
+            yield dumps(project(item, fields)) + b"\n"
+
+
+async def listing(request: Request, sl: ServiceLocator, load_page: PageLoader, iterate: FeedIterator,
+                  after: Optional[str], limit: int, fields: Optional[str], format: str):
+    """Страница ленты {"items", "next_cursor"} или, в режиме NDJSON, поток всей ленты."""
+    selected = parse_fields(fields, FEED_FIELDS)
+    user_id = current_user_id(request)
+    if wants_ndjson(request, format):
+        return StreamingResponse(
+            stream_ndjson(request_role(request), iterate, user_id, decode_cursor(after), selected),
+            media_type=NDJSON,
+        )
+    items = await load_page(sl, user_id, decode_cursor(after), limit)
+    return FastJSONResponse({
+        "items": [project(item, selected) for item in items],
+        "next_cursor": next_cursor(items, limit),
+    })
+
+
+# -------------------
+# Объявления
+# -------------------
+@api_router.get("/adverts")
+async def list_adverts(request: Request, after: str | None = None,
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       fields: str | None = None, format: Literal["json", "ndjson"] = "json",
+                       sl: ServiceLocator = Depends(get_request_locator)):
+    async def load_page(locator: ServiceLocator, user_id, cursor, size):
+        return await locator.get_advert_service().get_all_adverts_for_user(user_id, after=cursor, limit=size)
+
+    def iterate(locator: ServiceLocator, user_id, cursor):
+        return locator.get_advert_service().iter_adverts_for_user(user_id, after=cursor)
+
+    return await listing(request, sl, load_page, iterate, after, limit, fields, format)
+
+
+async def upload_chunks(upload: UploadFile, size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(size):
+        yield chunk
+
+
+async def import_source(request: Request) -> AsyncIterable[RawRow]:
+    """
+    Строки файла импорта: тело запроса (text/csv, application/x-ndjson, application/json)
+    читается потоком, из multipart берётся поле file, формат — по его типу или расширению.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type == "multipart/form-data":
+        upload = (await request.form()).get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=400, detail="No file uploaded")
+        media_type = upload.content_type if upload.content_type in PARSERS else \
+            EXTENSIONS.get(os.path.splitext(upload.filename or "")[1].lower(), "")
+        chunks = upload_chunks(upload)
+    else:
+        chunks = request.stream()
+    if media_type not in PARSERS:
+        raise HTTPException(status_code=415, detail=f"Supported formats: {', '.join(PARSERS)}")
+    return PARSERS[media_type](chunks)
+
+
+def advert_units(request: Request):
+    """Транзакции для пачек импорта: каждая пачка фиксируется сама, а не вместе с запросом."""
+    role = request_role(request)
+
+    @asynccontextmanager
+    async def unit() -> AsyncIterator[AdvertsRepository]:
+        async with open_locator(role) as locator:
+            yield locator.get_advert_repo()
+    return unit
+
+
+@api_router.post("/adverts/import")
+async def import_adverts(request: Request, sl: ServiceLocator = Depends(get_request_locator)):
+    user_id = require_user_id(request)
+    rows = await import_source(request)
+    category_ids = {category.id for category in await sl.get_category_service().get_all()}
+    report = await sl.get_advert_service().import_adverts(user_id, rows, category_ids, advert_units(request))
+    return FastJSONResponse(report.model_dump())
+
+
+@api_router.get("/adverts/{advert_id}")
+async def get_advert(advert_id: int, fields: str | None = None,
+                     sl: ServiceLocator = Depends(get_request_locator)):
+    selected = parse_fields(fields, ADVERT_FIELDS)
+    advert = await sl.get_advert_service().get_advert(advert_id)
+    if advert is None:
+        raise HTTPException(status_code=404, detail="Advert not found")
+    return FastJSONResponse(project(advert, selected))
+
+
+@api_router.get("/search")
+async def search_adverts(request: Request, q: str, after: str | None = None,
+                         limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                         fields: str | None = None, format: Literal["json", "ndjson"] = "json",
+                         sl: ServiceLocator = Depends(get_request_locator)):
+    async def load_page(locator: ServiceLocator, user_id, cursor, size):
+        return await locator.get_advert_service().get_adverts_by_key_word(q, user_id, after=cursor, limit=size)
+
+    def iterate(locator: ServiceLocator, user_id, cursor):
+        return locator.get_advert_service().iter_adverts_by_key_word(q, user_id, after=cursor)
+
+    return await listing(request, sl, load_page, iterate, after, limit, fields, format)
+
+
+# -------------------
+# Категории
+# -------------------
+@api_router.get("/categories")
+async def list_categories(sl: ServiceLocator = Depends(get_request_locator)):
+    categories = await sl.get_category_service().get_all()
+    return FastJSONResponse([category.model_dump() for category in categories])
+
+
+@api_router.get("/categories/{category_id}/adverts")
+async def list_category_adverts(request: Request, category_id: int, after: str | None = None,
+                                limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                fields: str | None = None, format: Literal["json", "ndjson"] = "json",
+                                sl: ServiceLocator = Depends(get_request_locator)):
+    async def load_page(locator: ServiceLocator, user_id, cursor, size):
+        return await locator.get_advert_service().get_adverts_by_category_authorized(
+            category_id, user_id, after=cursor, limit=size
+        )
+
+    def iterate(locator: ServiceLocator, user_id, cursor):
+        return locator.get_advert_service().iter_adverts_by_category_authorized(category_id, user_id, after=cursor)
+
+    return await listing(request, sl, load_page, iterate, after, limit, fields, format)
+
+
+# -------------------
+# Избранное и сделки текущего пользователя
+# -------------------
+@api_router.get("/me/liked")
+async def my_liked(request: Request, fields: str | None = None,
+                   sl: ServiceLocator = Depends(get_request_locator)):
+    user_id = require_user_id(request)
+    selected = parse_fields(fields, ADVERT_FIELDS)
+    adverts = await sl.get_liked_service().get_liked_by_user(user_id)
+    return FastJSONResponse([project(advert, selected) for advert in adverts])
+
+
+@api_router.post("/me/liked")
+async def toggle_liked(request: Request, body: LikeToggleRequest,
+                       sl: ServiceLocator = Depends(get_request_locator)):
+    """Пакет лайков и анлайков одним запросом к БД; повтор того же пакета ничего не меняет."""
+    user_id = require_user_id(request)
+    report = await sl.get_liked_service().toggle_liked(user_id, body.toggles)
+    return FastJSONResponse(report.model_dump())
+
+
+@api_router.get("/me/deals")
+async def my_deals(request: Request, fields: str | None = None,
+                   sl: ServiceLocator = Depends(get_request_locator)):
+    user_id = require_user_id(request)
+    selected = parse_fields(fields, ADVERT_FIELDS)
+    adverts = await sl.get_deal_service().get_deals_by_user(user_id)
+    return FastJSONResponse([project(advert, selected) for advert in adverts])
@@ -1,60 +1,61 @@
+from urllib.parse import urlsplit
+
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.db import create_session
-from services.liked_service import LikedService
-from repositories.liked_repository import LikedRepository
+from service_locator import ServiceLocator, get_request_locator
 
 
-templates = Jinja2Templates(directory="templates")
 likes_router = APIRouter()
 
 
+def same_site_path(request: Request, url: str | None) -> str:
+    """
+    Путь для редиректа из Referer: только свой сайт. Чужой адрес (в том числе
+    //host и /\\host, которые браузер понимает как другой сервер) заменяется на "/".
+    """
+    if not url:
+        return "/"
+    parts = urlsplit(url)
+    if parts.netloc and (parts.netloc != request.url.netloc or parts.scheme not in ("http", "https")):
+        return "/"
+    path = parts.path
+    if not path.startswith("/") or path.startswith("//") or "\\" in path:
+        return "/"
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def back(request: Request) -> RedirectResponse:
+    # вернуться на страницу, откуда пришли
+    return RedirectResponse(url=same_site_path(request, request.headers.get("referer")), status_code=303)
+
+
 @likes_router.post("/like/{item_id}")
 async def add_like(
         request: Request,
-        db: AsyncSession = Depends(lambda: create_session("authorized_user"))
+        item_id: int,
+        sl: ServiceLocator = Depends(get_request_locator)
 ):
     if not request.state.user:
         return RedirectResponse(url="/login", status_code=303)
 
-    user_id = request.state.user.id
-    repo = LikedRepository(db)
-
-    try:
-        #await repo.cre(user_id, item_id)
-        pass
-        return RedirectResponse(url=request.referrer, status_code=303)  # Вернуться на страницу, откуда пришли
-    except Exception as e:
-        return templates.TemplateResponse("error.html", {"request": request, "error": str(e)})
-    finally:
-        await db.close()
+    serv = sl.get_liked_service()
+    user_id = request.state.user["id"]
+    # повторный клик не создаёт дубликат — см. likes.create
+    await serv.add_to_liked(user_id, item_id)
+    return back(request)
 
 
 @likes_router.post("/unlike/{item_id}")
 async def remove_like(
         request: Request,
         item_id: int,
-        db: AsyncSession = Depends(lambda: create_session("authorized_user"))
+        sl: ServiceLocator = Depends(get_request_locator)
 ):
     if not request.state.user:
         return RedirectResponse(url="/login", status_code=303)
 
-
-    repo = LikedRepository(db)
-    serv = LikedService(repo)
-    if request.state.user:
-        db = create_session("authorized_user")
-    else:
-        db = create_session("any_user")
-    user_id = request.state.user["id"] if request.state.user else None
-    try:
-        await serv.remove_from_liked(user_id, item_id)
-        return RedirectResponse(url= "/", status_code=303)  # Вернуться на страницу
-    except Exception as e:
-        #return templates.TemplateResponse("error.html", {"request": request, "error": str(e)})
-        print(e)
-    finally:
-        await db.close()
\ No newline at end of file
+    serv = sl.get_liked_service()
+    user_id = request.state.user["id"]
+    await serv.remove_from_liked(user_id, item_id)
+    return back(request)
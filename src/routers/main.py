@@ -1,128 +1,109 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from typing import Awaitable, Callable, List
+from urllib.parse import urlencode
 
-from core.db import create_session
-from services.advert_service import AdvertService
-from services.liked_service import *
-from services.deal_service import *
-from repositories.liked_repository import *
-from repositories.deal_repository import *
-from repositories.advert_repository import AdvertsRepository
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import HTMLResponse
+from core.timing import timed_templates
 
-from repositories.category_repository import *
-from services.category_service import *
+from core.page_cache import RenderedPage, page_cache
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, next_cursor
+from service_locator import ServiceLocator, get_request_locator, open_locator
 
 
 from fastapi.responses import RedirectResponse
 
-from dto.advert_dto import AdvertWithCategoryDTO
-
 
 
-templates = Jinja2Templates(directory="templates")
+templates = timed_templates("templates")
 main_router = APIRouter()
 
+AdvertsLoader = Callable[[ServiceLocator, int | None], Awaitable[List]]
 
-@main_router.get("/", response_class=HTMLResponse)
-async def index(request: Request):
-    # токен можно проверять здесь, чтобы в хедере решать, что показывать
-    token = request.cookies.get("access_token")
-    #return templates.TemplateResponse("index.html", {"request": request, "token": token})
-    #return templates.TemplateResponse("index.html", {"request": request, "user": request.state.user})
 
-    if request.state.user:
-        db = create_session("authorized_user")
-    else:
-        db = create_session("any_user")
-    user_id = request.state.user["id"] if request.state.user else None
-    try:
-        category_repo = CategoryRepository(db)
-        categories = await CategoryService(category_repo).get_all()
-        repo =  AdvertsRepository(db)
-
-        adverts_dto = []
+def next_page_url(request: Request, items: list, limit: int) -> str | None:
+    """Ссылка «следующая страница» с курсором после последнего показанного объявления."""
+    cursor = next_cursor(items, limit)
+    if cursor is None:
+        return None
+    return str(request.url.include_query_params(after=cursor, limit=limit))
 
-        adverts = await AdvertService(repo).get_all_adverts()
-        for advert in adverts:
-            advert_dict = advert.model_dump()
 
-            dto = AdvertWithCategoryDTO(**advert_dict)
-            dto.category_name = await CategoryService(category_repo).get_name_by_id(dto.id_category)
+async def feed_context(request: Request, sl: ServiceLocator, load_adverts: AdvertsLoader, limit: int) -> dict:
+    user_id = request.state.user["id"] if request.state.user else None
+    categories = await sl.get_category_service().get_all()
+    # одна выборка с категориями, продавцом и флагами вместо запросов на каждое объявление
+    adverts = await load_adverts(sl, user_id)
+    return {
+        "request": request,
+        "user": request.state.user,
+        "user_id": user_id,
+        "adverts": adverts,
+        "categories": categories,
+        "next_url": next_page_url(request, adverts, limit),
+    }
+
+
+def page_key(request: Request) -> str:
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+async def cached_feed_page(request: Request, sl: ServiceLocator, load_adverts: AdvertsLoader,
+                           limit: int) -> HTMLResponse:
+    """
+    Лента index.html. Анонимам (без cookie access_token) страница отдаётся из page_cache,
+    авторизованным — рендерится всегда: в ней флаги «в избранном», «куплено».
+    """
+    if "access_token" in request.cookies:
+        return templates.TemplateResponse("index.html", await feed_context(request, sl, load_adverts, limit))
+
+    async def render(locator: ServiceLocator) -> RenderedPage:
+        context = await feed_context(request, locator, load_adverts, limit)
+        body = templates.TemplateResponse("index.html", context).body
+        return RenderedPage(body, cacheable=bool(context["adverts"]))
+
+    async def refresh() -> RenderedPage:
+        # фоновое обновление переживает запрос — открываем собственную сессию
+        async with open_locator("any_user") as locator:
+            return await render(locator)
+
+    body, status = await page_cache.get(page_key(request), lambda: render(sl), refresh)
+    return HTMLResponse(body, headers={"X-Cache": status})
 
-            if request.state.user:
-                dto.is_favorite = await LikedService(LikedRepository(db)).is_liked(user_id, dto.id)
-                dto.is_bought = await DealsService(DealRepository(db)).is_in_deals(user_id, dto.id)
-                dto.is_created = await AdvertService(AdvertsRepository(db)).is_created(user_id, dto.id)
-            adverts_dto.append(dto)
 
-    finally:
-        await db.close()
+@main_router.get("/", response_class=HTMLResponse)
+async def index(request: Request, after: str | None = None,
+                limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                sl: ServiceLocator = Depends(get_request_locator)):
+    async def load_adverts(locator: ServiceLocator, user_id: int | None):
+        return await locator.get_advert_service().get_all_adverts_for_user(
+            user_id, after=decode_cursor(after), limit=limit
+        )
 
-    #print(request.state.user, user_id)
-    #print(adverts_dto)
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "user": request.state.user,
-            "user_id": user_id,
-            "adverts": adverts_dto,
-            "categories": categories
-        },
-    )
+    return await cached_feed_page(request, sl, load_adverts, limit)
 
 
 @main_router.get("/category/{category_id}", response_class=HTMLResponse)
-async def adverts_by_category(request: Request, category_id: int):
-    if request.state.user:
-        db = create_session("authorized_user")
-    else:
-        db = create_session("any_user")
-    user_id = request.state.user["id"] if request.state.user else None
-    try:
-        category_repo = CategoryRepository(db)
-        categories = await CategoryService(category_repo).get_all()
+async def adverts_by_category(request: Request, category_id: int, after: str | None = None,
+                              limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                              sl: ServiceLocator = Depends(get_request_locator)):
+    async def load_adverts(locator: ServiceLocator, user_id: int | None):
+        return await locator.get_advert_service().get_adverts_by_category_authorized(
+            category_id, user_id, after=decode_cursor(after), limit=limit
+        )
 
-        repo = AdvertsRepository(db)
-        adverts = []
-        if request.state.user:
-
-            adverts = await AdvertService(repo).get_adverts_by_category_authorized(user_id, category_id)  # fix!!!!
-        else:
-            adverts = await AdvertService(repo).get_adverts_by_category(category_id)
-    finally:
-        await db.close()
-
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "user": request.state.user,
-            "user_id": user_id,
-            "adverts": adverts,
-            "categories": categories
-        },
-    )
+    return await cached_feed_page(request, sl, load_adverts, limit)
 
 
 @main_router.get("/search", response_class=HTMLResponse)
-async def search_adverts(request: Request, q: str):
-    db: AsyncSession = create_session("any_user" if not request.state.user else "authorized_user")
-    try:
-        advert_repo = AdvertsRepository(db)
-        advert_service = AdvertService(advert_repo)
-        adverts = await advert_service.get_adverts_by_key_word(q)
-
-        category_repo = CategoryRepository(db)
-        categories = await category_repo.get_all()
-    finally:
-        await db.close()
-
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "user": request.state.user, "adverts": adverts, "categories": categories}
-    )
+async def search_adverts(request: Request, q: str, after: str | None = None,
+                         limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                         sl: ServiceLocator = Depends(get_request_locator)):
+    async def load_adverts(locator: ServiceLocator, user_id: int | None):
+        return await locator.get_advert_service().get_adverts_by_key_word(
+            q, user_id, after=decode_cursor(after), limit=limit
+        )
+
+    return templates.TemplateResponse("index.html", await feed_context(request, sl, load_adverts, limit))
 
 @main_router.get("/profile", response_class=HTMLResponse)
 async def profile_page(request: Request):
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from core.category_cache import category_cache
+from core.db import pool_manager
+from core.metrics import CONTENT_TYPE, Exposition, query_metrics, render_cache_stats, render_pool_stats
+from core.page_cache import page_cache
+from core.timing import request_timer
+from core.user_sets import user_sets
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики SQL, пулов соединений, реплик и кэшей в формате Prometheus."""
+    out = Exposition()
+    query_metrics.render(out)
+    request_timer.render(out)
+    render_pool_stats(out, pool_manager.stats())
+    pool_manager.replicas.render(out)
+    render_cache_stats(out, {"page": page_cache.stats(), "category": category_cache.stats(),
+                             "user_sets": user_sets.stats()})
+    return Response(out.text(), media_type=CONTENT_TYPE)
@@ -1,20 +1,19 @@
+import logging
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.ext.asyncio import AsyncSession
+from core.timing import timed_templates
 
-from core.db import create_session
-from services.auth_service import AuthService
-from repositories.user_repository import UserRepository
+from service_locator import ServiceLocator, get_authorized_locator
 
+logger = logging.getLogger(__name__)
 
-templates = Jinja2Templates(directory="templates")
+
+templates = timed_templates("templates")
 user_router = APIRouter()
 
 # Страница логина
 @user_router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
-    print('ggg')
     return templates.TemplateResponse("login.html", {"request": request})
 
 
@@ -22,11 +21,10 @@ async def login_page(request: Request):
 @user_router.post("/login")
 async def login(
     request: Request,
-    db: AsyncSession = Depends(lambda: create_session("authorized_user"))
+    sl: ServiceLocator = Depends(get_authorized_locator)
 ):
-    print(type(db), db)
-    repo = UserRepository(db)
-    service = AuthService(repo)
+    db = sl.session
+    service = sl.get_auth_service()
     form_data = await request.form()
 
     email = form_data.get("email")
@@ -37,13 +35,11 @@ async def login(
         token = await service.login(db, email, password)
         response = RedirectResponse(url="/", status_code=303)
         response.set_cookie(key="access_token", value=token, httponly=True)
-        print('ok')
+        logger.info("Вход пользователя %s", email)
         return response
     except Exception as e:
-        print(e)
+        logger.info("Неудачный вход %s: %s", email, e)
         return templates.TemplateResponse("login.html", {"request": request, "error": str(e)})
-    finally:
-        await db.close()
 
 
 # -------------------
@@ -63,13 +59,12 @@ async def register(
     phone_number: str = Form(...),
     password: str = Form(...),
     repeat_password: str = Form(...),
-    db: AsyncSession = Depends(lambda: create_session("authorized_user")),
+    sl: ServiceLocator = Depends(get_authorized_locator),
 ):
-    repo = UserRepository(db)
-    service = AuthService(repo)
+    service = sl.get_auth_service()
     try:
         await service.register(
-            db,
+            sl.session,
             {
                 "nickname": nickname,
                 "fio": fio,
@@ -82,15 +77,16 @@ async def register(
         return RedirectResponse(url="/login", status_code=303)
     except Exception as e:
         return templates.TemplateResponse("register.html", {"request": request, "user": None, "error": str(e)})
-    finally:
-        await db.close()
 
 
 # -------------------
 # Логаут
 # -------------------
 @user_router.get("/logout")
-async def logout(request: Request):
+async def logout(request: Request, sl: ServiceLocator = Depends(get_authorized_locator)):
+    token = request.cookies.get("access_token")
+    if token:
+        await sl.get_auth_service().logout(token)
     response = RedirectResponse(url="/", status_code=303)
     response.delete_cookie("access_token")
     return response
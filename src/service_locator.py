@@ -1,28 +1,30 @@
 # src/service_locator.py
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # твои фабрики сессий по ролям
 from core.db import SessionLocal
+from core.unit_of_work import run_after_commit, track_commit
 
 # твои репозитории
 from repositories.user_repository import UserRepository
 from repositories.advert_repository import AdvertsRepository
 from repositories.category_repository import CategoryRepository
-#from repositories.liked_repository import LikedRepository
-#from repositories.deal_repository import DealsRepository  # если есть
+from repositories.liked_repository import LikedRepository
+from repositories.deal_repository import DealRepository
 
 # твои сервисы
 from services.auth_service import AuthService
 from services.advert_service import AdvertService
 from services.category_service import CategoryService
 from services.liked_service import LikedService
-# добавь, если есть сервис для deals
-# from services.deal_service import DealService
+from services.deal_service import DealsService
 
 
 # ----------------------------
@@ -34,7 +36,7 @@ class Repositories:
     adverts: AdvertsRepository
     categories: CategoryRepository
     likes: LikedRepository
-    # deals: DealsRepository | None = None
+    deals: DealRepository
 
 
 @dataclass
@@ -43,7 +45,7 @@ class Services:
     adverts: AdvertService
     categories: CategoryService
     likes: LikedService
-    # deals: DealService | None = None
+    deals: DealsService
 
 
 class ServiceLocator:
@@ -67,6 +69,9 @@ class ServiceLocator:
     def get_liked_repo(self) -> LikedRepository:
         return self.repositories.likes
 
+    def get_deal_repo(self) -> DealRepository:
+        return self.repositories.deals
+
     def get_auth_service(self) -> AuthService:
         return self.services.auth
 
@@ -79,60 +84,83 @@ class ServiceLocator:
     def get_liked_service(self) -> LikedService:
         return self.services.likes
 
+    def get_deal_service(self) -> DealsService:
+        return self.services.deals
+
+
+def build_locator(session: AsyncSession) -> ServiceLocator:
+    """Собирает репозитории и сервисы поверх одной сессии."""
+    # --- репозитории (работают на одной и той же сессии/роли) ---
+    user_repo = UserRepository(session)
+    advert_repo = AdvertsRepository(session)
+    category_repo = CategoryRepository(session)
+    liked_repo = LikedRepository(session)
+    deals_repo = DealRepository(session)
+
+    repositories = Repositories(
+        users=user_repo,
+        adverts=advert_repo,
+        categories=category_repo,
+        likes=liked_repo,
+        deals=deals_repo,
+    )
+
+    # --- сервисы, получают интерфейсы репозиториев ---
+    likes = LikedService(liked_repo)                  # избранное
+    deals = DealsService(deals_repo)                  # сделки
+    services = Services(
+        auth=AuthService(user_repo),                  # JWT логин/регистрация/логаут
+        # CRUD объявлений; флаги избранного и покупок — по множествам из likes/deals
+        adverts=AdvertService(advert_repo, liked_serv=likes, deals_serv=deals),
+        categories=CategoryService(category_repo),    # справочник категорий
+        likes=likes,
+        deals=deals,
+    )
+
+    return ServiceLocator(session=session, repositories=repositories, services=services)
+
 
 # ----------------------------
 #  Фабрики локаторов по ролям
 # ----------------------------
-async def _make_locator(role: str) -> AsyncGenerator[ServiceLocator, None]:
+@asynccontextmanager
+async def open_locator(role: str) -> AsyncIterator[ServiceLocator]:
     """
-    Общая фабрика: открываем сессию для нужной роли, собираем репозитории/сервисы,
-    отдаём через yield, после запроса сессия корректно закроется.
+    Unit of work: одна сессия и одна транзакция.
+    Репозитории не коммитят сами — транзакция фиксируется здесь один раз
+    после успешной обработки или откатывается при исключении.
+    Изменения кэшей, отложенные через core.unit_of_work.after_commit,
+    выполняются только после успешного commit.
+    Напрямую нужен там, где работа идёт вне HTTP-запроса (фоновые задачи).
     """
     # открываем сессию для конкретной роли (admin | authorized_user | any_user)
     async with SessionLocal[role]() as session:
-        # --- репозитории (работают на одной и той же сессии/роли) ---
-        user_repo = UserRepository(session)
-        advert_repo = AdvertsRepository(session)
-        category_repo = CategoryRepository(session)
-        liked_repo = LikedRepository(session)
-        # deals_repo = DealsRepository(session)
-
-        repositories = Repositories(
-            users=user_repo,
-            adverts=advert_repo,
-            categories=category_repo,
-            likes=liked_repo,
-            # deals=deals_repo,
-        )
-
-        # --- сервисы, получают интерфейсы репозиториев ---
-        auth_service = AuthService(user_repo)              # JWT логин/регистрация/логаут
-        advert_service = AdvertService(advert_repo)        # CRUD объявлений
-        category_service = CategoryService(category_repo)  # справочник категорий
-        liked_service = LikedService(liked_repo)           # избранное
-        # deal_service = DealService(deals_repo)
-
-        services = Services(
-            auth=auth_service,
-            adverts=advert_service,
-            categories=category_service,
-            likes=liked_service,
-            # deals=deal_service,
-        )
-
-        locator = ServiceLocator(session=session, repositories=repositories, services=services)
-        # отдаём локатор “живым” до конца обработки HTTP-запроса
-        yield locator
+        locator = build_locator(session)
+        with track_commit() as pending:
+            try:
+                yield locator
+            except Exception:
+                await session.rollback()
+                raise
+            else:
+                await session.commit()
+        run_after_commit(pending)
         # тут автоматически выйдем из async with, и сессия закроется
 
 
+async def _make_locator(role: str) -> AsyncGenerator[ServiceLocator, None]:
+    """Unit of work на один HTTP-запрос: локатор “живой” до конца обработки запроса."""
+    async with open_locator(role) as locator:
+        yield locator
+
+
 # ------------- готовые зависимости для FastAPI -------------
 # Пример использования:
 #   from fastapi import Depends
-#   from service_locator import get_authorized_locator, ServiceLocator
+#   from service_locator import get_request_locator, ServiceLocator
 #
 #   @router.get("/adverts")
-#   async def list_adverts(sl: ServiceLocator = Depends(get_authorized_locator)):
+#   async def list_adverts(sl: ServiceLocator = Depends(get_request_locator)):
 #       return await sl.get_advert_service().get_all_adverts()
 
 async def get_admin_locator() -> AsyncGenerator[ServiceLocator, None]:
@@ -148,3 +176,17 @@ async def get_authorized_locator() -> AsyncGenerator[ServiceLocator, None]:
 async def get_anon_locator() -> AsyncGenerator[ServiceLocator, None]:
     async for loc in _make_locator("any_user"):
         yield loc
+
+
+def request_role(request: Request) -> str:
+    """
+    Роль БД по проверенному пользователю (см. middleware в main.py): негодный,
+    истёкший или отозванный токен получает any_user. Без cookie токен не проверяется,
+    с cookie проверка после первого запроса — поиск в кэше проверенных токенов.
+    """
+    return "authorized_user" if request.state.user else "any_user"
+
+
+async def get_request_locator(request: Request) -> AsyncGenerator[ServiceLocator, None]:
+    async for loc in _make_locator(request_role(request)):
+        yield loc
@@ -1,18 +1,39 @@
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncContextManager, AsyncIterable, AsyncIterator, Callable, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from models.advert import Advert
 from dto.advert_dto import AdvertWithCategoryDTO
+from dto.import_dto import AdvertImportError, AdvertImportReport
 from abstract_repositories.iadvert_repository import IAdvertRepository
+from core.bulk_import import IMPORT_CHUNK_SIZE, IMPORT_FIELDS, RawRow
+from core.pagination import Cursor, DEFAULT_PAGE_SIZE
+from core.page_cache import PageCache, page_cache
+from core.rows import with_fields
+from core.unit_of_work import after_commit
+from core.user_sets import IdSet
+from services.deal_service import IDealsService
+from services.liked_service import ILikedService
+
+logger = logging.getLogger(__name__)
+
+# Открывает отдельную транзакцию и отдаёт репозиторий в ней; commit — при выходе
+RepoUnit = Callable[[], AsyncContextManager[IAdvertRepository]]
 
 class IAdvertService(ABC):
     @abstractmethod
     async def create_advert(self, advert: Advert) -> Advert: ...
 
+    @abstractmethod
+    async def import_adverts(self, seller_id: int, rows: AsyncIterable[RawRow], category_ids: Set[int],
+                             units: RepoUnit, chunk_size: int = IMPORT_CHUNK_SIZE) -> AdvertImportReport: ...
+
     @abstractmethod
     async def get_advert(self, advert_id: int) -> Optional[Advert]: ...
 
     @abstractmethod
-    async def get_all_adverts(self) -> List[Advert]: ...
+    async def get_all_adverts(self, after: Optional[Cursor] = None, limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]: ...
 
     @abstractmethod
     async def get_advert_by_user(self, user_id: int) -> List[Advert]: ...
@@ -21,35 +42,130 @@ class IAdvertService(ABC):
     async def is_created(self, user_id: int, advert_id: int) -> bool: ...
 
     @abstractmethod
-    async def get_adverts_by_key_word(self, key_word: str) -> List[Advert]: ...
+    async def is_created_many(self, user_id: int, advert_ids: List[int]) -> Set[int]: ...
 
     @abstractmethod
-    async def get_adverts_by_category(self, category_id: int) -> List[Advert]: ...
+    async def get_adverts_by_key_word(self, key_word: str, user_id: int | None = None,
+                                      after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]: ...
+
+    @abstractmethod
+    async def get_adverts_by_category(self, category_id: int, after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]: ...
 
     @abstractmethod
     async def delete_advert(self, advert_id: int, user_id: int) -> None: ...
 
     @abstractmethod
-    async def get_all_adverts_for_user(self, user_id: int | None) -> List[AdvertWithCategoryDTO]: ...
+    async def get_all_adverts_for_user(self, user_id: int | None, after: Optional[Cursor] = None,
+                                       limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]: ...
+
+    @abstractmethod
+    async def get_adverts_by_category_authorized(self, category_id: int, user_id: int | None,
+                                                 after: Optional[Cursor] = None,
+                                                 limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]: ...
+
+    @abstractmethod
+    def iter_adverts_for_user(self, user_id: int | None,
+                              after: Optional[Cursor] = None) -> AsyncIterator[AdvertWithCategoryDTO]: ...
 
     @abstractmethod
-    async def get_adverts_by_category_authorized(self, category_id: int, user_id: int) -> List[AdvertWithCategoryDTO]: ...
+    def iter_adverts_by_category_authorized(self, category_id: int, user_id: int | None,
+                                            after: Optional[Cursor] = None) -> AsyncIterator[AdvertWithCategoryDTO]: ...
+
+    @abstractmethod
+    def iter_adverts_by_key_word(self, key_word: str, user_id: int | None = None,
+                                 after: Optional[Cursor] = None) -> AsyncIterator[AdvertWithCategoryDTO]: ...
 
 class AdvertService(IAdvertService):
-    def __init__(self, repo: IAdvertRepository):
+    def __init__(self, repo: IAdvertRepository, cache: PageCache | None = None,
+                 liked_serv: ILikedService | None = None, deals_serv: IDealsService | None = None):
         self.repo = repo
-        #self.liked_serv = liked_serv
-        #self.deals_serv = deals_serv
+        # закэшированные страницы ленты для анонимов устаревают при любом изменении объявлений
+        self.page_cache = cache if cache is not None else page_cache
+        # флаги is_favorite / is_bought ставятся по множествам id пользователя (core.user_sets)
+        self.liked_serv = liked_serv
+        self.deals_serv = deals_serv
 
     async def create_advert(self, advert: Advert) -> Advert:
         result = await self.repo.create(advert)
+        if result is not None:
+            after_commit(self.page_cache.invalidate)
         return result
 
+    async def import_adverts(self, seller_id: int, rows: AsyncIterable[RawRow], category_ids: Set[int],
+                             units: RepoUnit, chunk_size: int = IMPORT_CHUNK_SIZE) -> AdvertImportReport:
+        """
+        Массовое создание объявлений продавца из строк файла. Строки проверяются по мере
+        чтения, корректные пишутся пачками по chunk_size, каждая пачка — в своей
+        транзакции из units(). В отчёт попадают только зафиксированные пачки; ошибки
+        собираются по номерам строк и не мешают остальным.
+        """
+        report = AdvertImportReport()
+        chunk: List[Tuple[int, Advert]] = []
+        async for row in rows:
+            advert, errors = self._parse_import_row(row, seller_id, category_ids)
+            if errors:
+                report.errors.append(AdvertImportError(row=row.number, errors=errors))
+                continue
+            chunk.append((row.number, advert))
+            if len(chunk) >= chunk_size:
+                await self._write_chunk(units, chunk, report)
+                chunk = []
+        if chunk:
+            await self._write_chunk(units, chunk, report)
+
+        report.errors.sort(key=lambda error: error.row)
+        report.created = len(report.ids)
+        report.failed = len(report.errors)
+        if report.created:
+            # пачки уже зафиксированы своими транзакциями — ждать commit запроса незачем
+            self.page_cache.invalidate()
+        return report
+
+    @staticmethod
+    def _parse_import_row(row: RawRow, seller_id: int,
+                          category_ids: Set[int]) -> Tuple[Optional[Advert], List[str]]:
+        if row.error:
+            return None, [row.error]
+        missing = [name for name in IMPORT_FIELDS if row.values.get(name) in (None, "")]
+        if missing:
+            return None, [f"{name}: обязательное поле" for name in missing]
+        try:
+            advert = Advert(**{name: row.values[name] for name in IMPORT_FIELDS}, id_seller=seller_id, status=1)
+        except ValidationError as e:
+            return None, [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()]
+        errors = []
+        if not advert.content.strip():
+            errors.append("content: обязательное поле")
+        if advert.price < 0:
+            errors.append("price: цена не может быть отрицательной")
+        if advert.id_category not in category_ids:
+            errors.append(f"id_category: категории {advert.id_category} нет")
+        return (None, errors) if errors else (advert, [])
+
+    async def _write_chunk(self, units: RepoUnit, chunk: List[Tuple[int, Advert]],
+                           report: AdvertImportReport) -> None:
+        try:
+            async with units() as repo:
+                created = await repo.create_many([advert for _, advert in chunk])
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при пакетном создании объявлений: %s", e)
+            created = None
+        if created is not None:
+            report.ids.extend(advert.id for advert in created)
+        elif len(chunk) > 1:
+            # пачка откатилась целиком — пишем её строки по одной, чтобы найти виноватые
+            for item in chunk:
+                await self._write_chunk(units, [item], report)
+        else:
+            report.errors.append(AdvertImportError(row=chunk[0][0], errors=["не удалось сохранить объявление"]))
+
     async def get_advert(self, advert_id: int) -> Optional[Advert]:
         return await self.repo.get_by_id(advert_id)
 
-    async def get_all_adverts(self) -> List[Advert]:
-        return await self.repo.get_all_adverts()
+    async def get_all_adverts(self, after: Optional[Cursor] = None, limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]:
+        return await self.repo.get_all_adverts(after=after, limit=limit)
 
     async def get_advert_by_user(self, user_id: int) -> List[Advert]:
         return await self.repo.get_advert_by_user(user_id)
@@ -57,12 +173,19 @@ class AdvertService(IAdvertService):
     async def is_created(self, user_id: int, advert_id: int) -> bool:
         return await self.repo.is_created(user_id, advert_id)
 
-    async def get_adverts_by_key_word(self, key_word: str) -> List[Advert]:
-        return await self.repo.get_adverts_by_key_word(key_word)
+    async def is_created_many(self, user_id: int, advert_ids: List[int]) -> Set[int]:
+        return await self.repo.is_created_many(user_id, advert_ids)
+
+    async def get_adverts_by_key_word(self, key_word: str, user_id: int | None = None,
+                                      after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]:
+        adverts = await self.repo.get_adverts_by_key_word(key_word, user_id=user_id, after=after, limit=limit)
+        return await self._annotate_all(user_id, adverts)
 
 
-    async def get_adverts_by_category(self, category_id: int) -> List[Advert]:
-        return await self.repo.get_adverts_by_category(category_id)
+    async def get_adverts_by_category(self, category_id: int, after: Optional[Cursor] = None,
+                                      limit: int = DEFAULT_PAGE_SIZE) -> List[Advert]:
+        return await self.repo.get_adverts_by_category(category_id, after=after, limit=limit)
 
 
     async def delete_advert(self, advert_id: int, user_id: int) -> None:
@@ -71,22 +194,60 @@ class AdvertService(IAdvertService):
             raise ValueError("Advert not found")
         if advert.id_seller != user_id:
             raise PermissionError("Not allowed to delete this advert")
-        await self.repo.delete(advert_id)
-
-    async def get_all_adverts_for_user(self, user_id: int | None) -> List[AdvertWithCategoryDTO]:
-        adverts = await self.repo.get_all_with_full_info(user_id)
-        #adverts = [AdvertWithCategoryDTO(**row) for row in raw_rows]
-
-        '''if user_id:
-            for advert in adverts:
-                advert.is_favorite = await self.liked_serv.is_liked(user_id, advert.id)
-                advert.is_bought = await self.deals_serv.is_in_deals(user_id, advert.id)
-        '''
-        return adverts
-
-    async def get_adverts_by_category_authorized(self, category_id: int, user_id: int) -> List[AdvertWithCategoryDTO]:
-        adverts = await self.repo.get_all_by_category_authorized(category_id, user_id)
-        for advert in adverts:
-            advert.is_created = advert.id_seller == user_id
-        print(user_id, adverts)
-        return adverts
\ No newline at end of file
+        if await self.repo.delete_advert(advert_id, user_id):
+            after_commit(self.page_cache.invalidate)
+
+    async def get_all_adverts_for_user(self, user_id: int | None, after: Optional[Cursor] = None,
+                                       limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]:
+        adverts = await self.repo.get_all_with_full_info(user_id, after=after, limit=limit)
+        return await self._annotate_all(user_id, adverts)
+
+    async def get_adverts_by_category_authorized(self, category_id: int, user_id: int | None,
+                                                 after: Optional[Cursor] = None,
+                                                 limit: int = DEFAULT_PAGE_SIZE) -> List[AdvertWithCategoryDTO]:
+        adverts = await self.repo.get_all_by_category_authorized(category_id, user_id, after=after, limit=limit)
+        logger.debug("Категория %s для пользователя %s: %d объявлений", category_id, user_id, len(adverts))
+        return await self._annotate_all(user_id, adverts)
+
+    # Потоковые варианты для выгрузок и NDJSON: объявления по одному, без списка в памяти
+    def iter_adverts_for_user(self, user_id: int | None,
+                              after: Optional[Cursor] = None) -> AsyncIterator[AdvertWithCategoryDTO]:
+        return self._annotate_stream(user_id, self.repo.iter_all_with_full_info(user_id, after=after))
+
+    def iter_adverts_by_category_authorized(self, category_id: int, user_id: int | None,
+                                            after: Optional[Cursor] = None) -> AsyncIterator[AdvertWithCategoryDTO]:
+        return self._annotate_stream(user_id,
+                                     self.repo.iter_all_by_category_authorized(category_id, user_id, after=after))
+
+    def iter_adverts_by_key_word(self, key_word: str, user_id: int | None = None,
+                                 after: Optional[Cursor] = None) -> AsyncIterator[AdvertWithCategoryDTO]:
+        return self._annotate_stream(user_id, self.repo.iter_adverts_by_key_word(key_word, user_id=user_id,
+                                                                                after=after))
+
+    # -----------------
+    # Флаги избранного и покупок: проверка по множествам id в памяти, без SQL на карточку
+    # -----------------
+    async def _user_sets(self, user_id: int | None) -> Optional[Tuple[IdSet, IdSet]]:
+        if not user_id or self.liked_serv is None or self.deals_serv is None:
+            return None
+        return await self.liked_serv.liked_ids(user_id), await self.deals_serv.bought_ids(user_id)
+
+    @staticmethod
+    def _annotate(advert: AdvertWithCategoryDTO, liked: IdSet, bought: IdSet) -> AdvertWithCategoryDTO:
+        is_favorite, is_bought = advert.id in liked, advert.id in bought
+        if not (is_favorite or is_bought):
+            return advert
+        return with_fields(advert, is_favorite=is_favorite, is_bought=is_bought)
+
+    async def _annotate_all(self, user_id: int | None,
+                            adverts: List[AdvertWithCategoryDTO]) -> List[AdvertWithCategoryDTO]:
+        sets = await self._user_sets(user_id) if adverts else None
+        if sets is None:
+            return adverts
+        return [self._annotate(advert, *sets) for advert in adverts]
+
+    async def _annotate_stream(self, user_id: int | None, adverts: AsyncIterator[AdvertWithCategoryDTO]
+                               ) -> AsyncIterator[AdvertWithCategoryDTO]:
+        sets = await self._user_sets(user_id)
+        async for advert in adverts:
+            yield advert if sets is None else self._annotate(advert, *sets)
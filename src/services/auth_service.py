@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 from models.user import User
 from abstract_repositories.iuser_repository import IUserRepository
 from core.create_jwt import JWTManager
+from core.passwords import PasswordHasher, password_hasher
+from core.revocation import RevocationStore, revocation_store, token_id
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -20,9 +22,13 @@ class IAuthService(ABC):
 
 
 class AuthService(IAuthService):
-    def __init__(self, user_repo: IUserRepository):
+    def __init__(self, user_repo: IUserRepository, revocations: RevocationStore | None = None,
+                 hasher: PasswordHasher | None = None):
         self.user_repo = user_repo
-        self.invalidated_tokens: set[str] = set()
+        # общий на процесс список отзывов, а не множество на экземпляр сервиса
+        self.revocations = revocations if revocations is not None else revocation_store
+        # хэширование идёт в пуле потоков, event loop не блокируется
+        self.hasher = hasher if hasher is not None else password_hasher
 
     async def register(self, db: AsyncSession, user: dict) -> User:
         if await self.user_repo.find_by_email(db, user["email"]):
@@ -30,21 +36,30 @@ class AuthService(IAuthService):
         if user["password"] != user["repeat_password"]:
             raise ValueError("Passwords didn't matched!")
 
-        user_create = User(**user) #delete odd
+        user_create = User(**{**user, "password": await self.hasher.hash(user["password"])}) #delete odd
         return await self.user_repo.create(user_create)
 
     async def login(self, db: AsyncSession, email: str, password: str) -> str:
         user = await self.user_repo.find_by_email(db, email)
-        if user and user.password == password:
+        if user and await self.hasher.verify(password, user.password):
+            if self.hasher.needs_rehash(user.password):
+                # открытый текст или сменились параметры хэша — пересохраняем
+                await self.user_repo.update_password(user.id, await self.hasher.hash(password))
             return JWTManager.create_access_token({"sub": user.email, "id": user.id, "role": "authorized_user"})
 
         raise ValueError("Invalid credentials")
 
     async def logout(self, token: str) -> bool:
-        self.invalidated_tokens.add(token)
+        try:
+            payload = JWTManager.decode_token(token)
+        except ValueError:
+            # невалидный или истёкший токен отзывать незачем
+            return True
+        await self.revocations.revoke(token_id(token, payload), float(payload["exp"]))
         return True
 
     def verify_token(self, token: str) -> dict:
-        if token in self.invalidated_tokens:
+        payload = JWTManager.decode_token(token)
+        if self.revocations.is_revoked(token_id(token, payload)):
             raise ValueError("Token revoked")
-        return JWTManager.decode_token(token)
+        return payload
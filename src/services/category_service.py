@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from models.category import Category
 from abstract_repositories.icategory_repository import ICategoryRepository
+from core.category_cache import CategoryCache, category_cache
 
 from typing import List
 
@@ -12,16 +13,33 @@ class ICategoryService(ABC):
     @abstractmethod
     async def get_name_by_id(self, id_category: int) -> str: ...
 
+    @abstractmethod
+    def invalidate_cache(self) -> None: ...
+
 
 
 class CategoryService(ICategoryService):
-    def __init__(self, category_repo: ICategoryRepository):
+    def __init__(self, category_repo: ICategoryRepository, cache: CategoryCache | None = None):
         self.cat_repo = category_repo
+        self.cache = cache if cache is not None else category_cache
         self.invalidated_tokens: set[str] = set()
 
     async def get_all(self) -> List[Category]:
-        return await self.cat_repo.get_all()
+        categories = self.cache.get_all()
+        if categories is None:
+            categories = await self.cat_repo.get_all()
+            self.cache.store(categories)
+        return categories
 
     async def get_name_by_id(self, id_category: int) -> str:
-        return await self.cat_repo.get_name_by_id(id_category)
+        names = self.cache.get_names()
+        if names is None:
+            categories = await self.cat_repo.get_all()
+            self.cache.store(categories)
+            names = {category.id: category.name for category in categories}
+        return names.get(id_category, "Категория не найдена")
+
+    def invalidate_cache(self) -> None:
+        """Вызывать после любого изменения справочника категорий."""
+        self.cache.invalidate()
 
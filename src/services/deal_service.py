@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Set
 from models.deal import Deal
 from models.advert import Advert
 from abstract_repositories.ideal_repository import IDealRepository
+from core.unit_of_work import after_commit
+from core.user_sets import IdSet, UserSetsCache, user_sets
 
 
 class IDealsService(ABC):
@@ -15,12 +17,22 @@ class IDealsService(ABC):
     @abstractmethod
     async def is_in_deals(self, user_id: int, advert_id: int) -> bool: ...
 
+    @abstractmethod
+    async def is_in_deals_many(self, user_id: int, advert_ids: List[int]) -> Set[int]: ...
+
+    @abstractmethod
+    async def bought_ids(self, user_id: int) -> IdSet: ...
+
 class DealsService(IDealsService):
-    def __init__(self, repo: IDealRepository):
+    def __init__(self, repo: IDealRepository, cache: UserSetsCache | None = None):
         self.repo = repo
+        # id купленного по пользователям — для флагов is_bought в лентах
+        self.user_sets = cache if cache is not None else user_sets
 
     async def create_deal(self, user_id: int, advert_id :int) -> Deal:
         result = await self.repo.create_deal(user_id, advert_id)
+        # множество меняется только после commit — откат не оставит лишний флаг
+        after_commit(lambda: self.user_sets.add("bought", user_id, advert_id))
         return result
 
     async def get_deals_by_user(self, user_id: int) -> List[Advert]:
@@ -29,24 +41,8 @@ class DealsService(IDealsService):
     async def is_in_deals(self, user_id: int, advert_id: int) -> bool:
         return await self.repo.is_in_deals(user_id, advert_id)
 
+    async def is_in_deals_many(self, user_id: int, advert_ids: List[int]) -> Set[int]:
+        return await self.repo.is_in_deals_many(user_id, advert_ids)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    async def bought_ids(self, user_id: int) -> IdSet:
+        return await self.user_sets.load("bought", user_id, lambda: self.repo.get_bought_ids(user_id))
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Set
 from models.liked import Liked
 from models.advert import Advert
+from dto.like_dto import LikeToggle, LikeToggleResult
 
 from abstract_repositories.iliked_repository import ILikedRepository
+from core.unit_of_work import after_commit
+from core.user_sets import IdSet, UserSetsCache, user_sets
 
 
 class ILikedService(ABC):
@@ -16,22 +19,52 @@ class ILikedService(ABC):
     @abstractmethod
     async def remove_from_liked(self, user_id: int, advert_id: int) -> None: ...
 
+    @abstractmethod
+    async def toggle_liked(self, user_id: int, toggles: List[LikeToggle]) -> LikeToggleResult: ...
+
     @abstractmethod
     async def is_liked(self, user_id: int, advert_id: int) -> bool: ...
 
+    @abstractmethod
+    async def is_liked_many(self, user_id: int, advert_ids: List[int]) -> Set[int]: ...
+
+    @abstractmethod
+    async def liked_ids(self, user_id: int) -> IdSet: ...
+
 class LikedService(ILikedService):
-    def __init__(self, repo: ILikedRepository):
+    def __init__(self, repo: ILikedRepository, cache: UserSetsCache | None = None):
         self.repo = repo
+        # id избранного по пользователям — для флагов is_favorite в лентах
+        self.user_sets = cache if cache is not None else user_sets
 
     async def add_to_liked(self, user_id: int, advert_id: int) -> Optional[Liked]:
         result = await self.repo.add_to_liked(user_id, advert_id)
+        # без исключения объявление в избранном — вставили мы или параллельный запрос;
+        # множество меняется только после commit — откат не оставит лишний флаг
+        after_commit(lambda: self.user_sets.add("liked", user_id, advert_id))
         return result
 
     async def get_liked_by_user(self, user_id: int) -> List[Advert]:
         return await self.repo.get_liked_by_user(user_id)
 
     async def remove_from_liked(self, user_id: int, advert_id: int) -> None:
-        return await self.repo.remove_from_liked(user_id, advert_id)
+        # ошибка БД сюда не дойдёт: исключение пропустит after_commit, а запрос откатится
+        result = await self.repo.remove_from_liked(user_id, advert_id)
+        after_commit(lambda: self.user_sets.discard("liked", user_id, advert_id))
+        return result
+
+    async def toggle_liked(self, user_id: int, toggles: List[LikeToggle]) -> LikeToggleResult:
+        # несколько переключений одного объявления в пакете — действует последнее
+        final = {toggle.advert_id: toggle.liked for toggle in toggles}
+        report = await self.repo.toggle_likes(user_id, final)
+        after_commit(lambda: self._apply_toggles(user_id, report))
+        return report
+
+    def _apply_toggles(self, user_id: int, report: LikeToggleResult) -> None:
+        for advert_id in report.liked:
+            self.user_sets.add("liked", user_id, advert_id)
+        for advert_id in report.unliked:
+            self.user_sets.discard("liked", user_id, advert_id)
 
     async def is_liked(self, user_id: int, advert_id: int) -> bool:
         return await self.repo.is_liked(user_id, advert_id)
@@ -57,3 +90,10 @@ class LikedService(ILikedService):
 
 
 
+
+
+    async def is_liked_many(self, user_id: int, advert_ids: List[int]) -> Set[int]:
+        return await self.repo.is_liked_many(user_id, advert_ids)
+
+    async def liked_ids(self, user_id: int) -> IdSet:
+        return await self.user_sets.load("liked", user_id, lambda: self.repo.get_liked_ids(user_id))
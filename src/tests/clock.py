@@ -0,0 +1,8 @@
+class FakeClock:
+    """Часы для тестов кэшей и таймеров: время двигается присваиванием clock.now."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
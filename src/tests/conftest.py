@@ -3,3 +3,5 @@ import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+# общие помощники тестов (clock.py) — в том числе для tests/services
+sys.path.append(os.path.dirname(__file__))
@@ -1,15 +1,24 @@
 import unittest
-from unittest.mock import AsyncMock
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
 
 from models.advert import Advert
+from core.bulk_import import RawRow
 from services.advert_service import AdvertService
 from abstract_repositories.iadvert_repository import IAdvertRepository
+from core.pagination import Cursor, DEFAULT_PAGE_SIZE
+from core.rows import row_factory
+from core.user_sets import IdSet
+from dto.rows import AdvertWithCategoryRow
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
 
 
 class TestAdvertService(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.repo = AsyncMock(spec=IAdvertRepository)
-        self.service = AdvertService(self.repo)
+        self.page_cache = MagicMock()
+        self.service = AdvertService(self.repo, cache=self.page_cache)
 
         self.advert = Advert(
             id=10,
@@ -35,6 +44,12 @@ class TestAdvertService(unittest.IsolatedAsyncioTestCase):
         created = await self.service.create_advert(self.advert)
         self.assertEqual(created.id, 10)
         self.repo.create.assert_awaited_once_with(self.advert)
+        self.page_cache.invalidate.assert_called_once()
+
+    async def test_failed_create_keeps_page_cache(self):
+        self.repo.create.return_value = None
+        await self.service.create_advert(self.advert)
+        self.page_cache.invalidate.assert_not_called()
 
     async def test_get_advert_found(self):
         self.repo.get_by_id.return_value = self.advert
@@ -67,14 +82,21 @@ class TestAdvertService(unittest.IsolatedAsyncioTestCase):
         items = await self.service.get_adverts_by_category(2)
         self.assertEqual(len(items), 1)
         self.assertEqual(items[0].id_category, 2)
-        self.repo.get_adverts_by_category.assert_awaited_once_with(2)
+        self.repo.get_adverts_by_category.assert_awaited_once_with(2, after=None, limit=DEFAULT_PAGE_SIZE)
 
     async def test_get_adverts_by_key_word(self):
         self.repo.get_adverts_by_key_word.return_value = [self.advert]
         items = await self.service.get_adverts_by_key_word("Контент")
         self.assertEqual(len(items), 1)
         self.assertIn("Контент", items[0].content)
-        self.repo.get_adverts_by_key_word.assert_awaited_once_with("Контент")
+        self.repo.get_adverts_by_key_word.assert_awaited_once_with("Контент", user_id=None, after=None,
+                                                                   limit=DEFAULT_PAGE_SIZE)
+
+    async def test_get_all_adverts_passes_cursor(self):
+        cursor = Cursor(datetime(2025, 1, 1), 10)
+        self.repo.get_all_adverts.return_value = [self.advert_other]
+        await self.service.get_all_adverts(after=cursor, limit=5)
+        self.repo.get_all_adverts.assert_awaited_once_with(after=cursor, limit=5)
 
     async def test_is_created_true(self):
         self.repo.is_created.return_value = True
@@ -86,22 +108,151 @@ class TestAdvertService(unittest.IsolatedAsyncioTestCase):
         self.assertFalse(await self.service.is_created(200, 10))
         self.repo.is_created.assert_awaited_once_with(200, 10)
 
+    async def test_is_created_many(self):
+        self.repo.is_created_many.return_value = {10}
+        self.assertEqual(await self.service.is_created_many(100, [10, 11]), {10})
+        self.repo.is_created_many.assert_awaited_once_with(100, [10, 11])
+
     async def test_delete_advert_success(self):
         # владелец совпадает
         self.repo.get_by_id.return_value = self.advert
+        self.repo.delete_advert.return_value = True
         await self.service.delete_advert(advert_id=10, user_id=100)
-        # Сервис вызывает repo.delete(advert_id)
-        self.repo.delete.assert_awaited_once_with(10)
+        self.repo.delete_advert.assert_awaited_once_with(10, 100)
+        self.page_cache.invalidate.assert_called_once()
+
+    async def test_delete_advert_already_gone_keeps_page_cache(self):
+        # параллельный запрос успел удалить объявление между проверкой и DELETE
+        self.repo.get_by_id.return_value = self.advert
+        self.repo.delete_advert.return_value = False
+        await self.service.delete_advert(advert_id=10, user_id=100)
+        self.page_cache.invalidate.assert_not_called()
 
     async def test_delete_advert_not_found(self):
         self.repo.get_by_id.return_value = None
         with self.assertRaises(ValueError):
             await self.service.delete_advert(advert_id=999, user_id=100)
-        self.repo.delete.assert_not_called()
+        self.repo.delete_advert.assert_not_called()
 
     async def test_delete_advert_permission_denied(self):
         # владелец не совпадает
         self.repo.get_by_id.return_value = self.advert_other  # id_seller=200
         with self.assertRaises(PermissionError):
             await self.service.delete_advert(advert_id=11, user_id=100)
-        self.repo.delete.assert_not_called()
\ No newline at end of file
+        self.repo.delete_advert.assert_not_called()
+
+async def rows_of(*rows):
+    for row in rows:
+        yield row
+
+
+class TestFeedFlags(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.repo = AsyncMock(spec=IAdvertRepository)
+        self.liked = AsyncMock()
+        self.liked.liked_ids.return_value = IdSet([1, 3])
+        self.deals = AsyncMock()
+        self.deals.bought_ids.return_value = IdSet([2])
+        self.service = AdvertService(self.repo, cache=MagicMock(), liked_serv=self.liked, deals_serv=self.deals)
+        make = row_factory(AdvertWithCategoryRow, ["id", "content", "description", "id_category", "price",
+                                                   "status", "id_seller", "date_created"])
+        self.feed = [make((i, "", "", 1, 1, 1, 5, None)) for i in (1, 2, 3)]
+
+    async def test_flags_from_user_sets(self):
+        self.repo.get_all_with_full_info.return_value = self.feed
+        items = await self.service.get_all_adverts_for_user(7)
+        self.assertEqual([(a.is_favorite, a.is_bought) for a in items], [(True, False), (False, True), (True, False)])
+        self.liked.liked_ids.assert_awaited_once_with(7)
+
+    async def test_stream_loads_sets_once(self):
+        self.repo.iter_all_by_category_authorized = MagicMock(return_value=rows_of(*self.feed))
+        items = [a async for a in self.service.iter_adverts_by_category_authorized(1, 7)]
+        self.assertEqual([a.is_favorite for a in items], [True, False, True])
+        self.deals.bought_ids.assert_awaited_once_with(7)
+
+    async def test_anonymous_not_annotated(self):
+        self.repo.get_adverts_by_key_word.return_value = self.feed
+        items = await self.service.get_adverts_by_key_word("x")
+        self.assertFalse(any(a.is_favorite for a in items))
+        self.liked.liked_ids.assert_not_called()
+
+
+class TestAdvertImport(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.repo = AsyncMock(spec=IAdvertRepository)
+        self.page_cache = MagicMock()
+        self.service = AdvertService(self.repo, cache=self.page_cache)
+
+        async def create_many(adverts):
+            return [advert.model_copy(update={"id": 100 + i}) for i, advert in enumerate(adverts)]
+        self.repo.create_many.side_effect = create_many
+        self.commits = []
+
+        @asynccontextmanager
+        async def unit():
+            yield self.repo
+            self.commits.append(len(self.repo.create_many.await_args.args[0]))
+        self.units = unit
+
+    @staticmethod
+    def row(number, **values):
+        base = {"content": f"Объявление {number}", "description": "Описание", "id_category": "2", "price": "1500"}
+        return RawRow(number, {**base, **values})
+
+    async def test_valid_rows_written_in_chunks(self):
+        rows = rows_of(*(self.row(n) for n in range(1, 6)))
+        report = await self.service.import_adverts(7, rows, {2}, self.units, chunk_size=2)
+
+        self.assertEqual(report.created, 5)
+        self.assertEqual(report.failed, 0)
+        self.assertEqual(self.commits, [2, 2, 1])
+        first = self.repo.create_many.await_args_list[0].args[0][0]
+        self.assertEqual((first.id_seller, first.status, first.price), (7, 1, 1500))
+        self.page_cache.invalidate.assert_called_once()
+
+    async def test_invalid_rows_reported_without_failing_batch(self):
+        rows = rows_of(
+            self.row(1),
+            self.row(2, price="дорого"),
+            self.row(3, id_category="9"),
+            RawRow(4, None, "некорректный JSON"),
+            self.row(5, content=""),
+        )
+        report = await self.service.import_adverts(7, rows, {2}, self.units)
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual([error.row for error in report.errors], [2, 3, 4, 5])
+        self.assertIn("price", report.errors[0].errors[0])
+        self.assertEqual(report.errors[3].errors, ["content: обязательное поле"])
+
+    async def test_failed_chunk_retried_row_by_row(self):
+        async def create_many(adverts):
+            if any(advert.content == "плохое" for advert in adverts):
+                raise SQLAlchemyError("check violation")
+            return [advert.model_copy(update={"id": 1}) for advert in adverts]
+        self.repo.create_many.side_effect = create_many
+
+        rows = rows_of(self.row(1), self.row(2, content="плохое"), self.row(3))
+        report = await self.service.import_adverts(7, rows, {2}, self.units, chunk_size=10)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([error.row for error in report.errors], [2])
+        self.assertEqual(self.commits, [1, 1])
+
+    async def test_failed_commit_not_reported_as_created(self):
+        @asynccontextmanager
+        async def unit():
+            yield self.repo
+            raise SQLAlchemyError("commit failed")
+
+        report = await self.service.import_adverts(7, rows_of(self.row(1), self.row(2)), {2}, unit)
+
+        self.assertEqual((report.created, report.ids), (0, []))
+        self.assertEqual([error.row for error in report.errors], [1, 2])
+        self.page_cache.invalidate.assert_not_called()
+
+    async def test_nothing_created_keeps_page_cache(self):
+        report = await self.service.import_adverts(7, rows_of(self.row(1, price="-5")), {2}, self.units)
+        self.assertEqual(report.failed, 1)
+        self.repo.create_many.assert_not_called()
+        self.page_cache.invalidate.assert_not_called()
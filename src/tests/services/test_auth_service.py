@@ -1,6 +1,11 @@
 import unittest
 from unittest.mock import AsyncMock, patch
 
+from datetime import timedelta
+
+from core.create_jwt import JWTManager
+from core.passwords import PasswordHasher
+from core.revocation import InMemoryRevocationBackend, RevocationStore
 from models.user import User
 from services.auth_service import AuthService
 
@@ -8,7 +13,9 @@ from services.auth_service import AuthService
 class TestAuthService(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.mock_repo = AsyncMock()
-        self.auth_service = AuthService(self.mock_repo)
+        self.revocations = RevocationStore(InMemoryRevocationBackend())
+        self.hasher = PasswordHasher(iterations=1000, max_workers=1)
+        self.auth_service = AuthService(self.mock_repo, revocations=self.revocations, hasher=self.hasher)
         self.fake_user = User(
             id=1, nickname="nick", fio="TestFio", email="test@example.com",
             phone_number="123", password="pass"
@@ -30,6 +37,10 @@ class TestAuthService(unittest.IsolatedAsyncioTestCase):
         result = await self.auth_service.register(object(), self.fake_register_user)
         self.assertEqual(result.email, "test@example.com")
 
+        stored = self.mock_repo.create.call_args.args[0].password
+        self.assertNotEqual(stored, "pass")
+        self.assertTrue(await self.hasher.verify("pass", stored))
+
     @patch("services.auth_service.JWTManager.create_access_token", return_value="fake.jwt.token")
     async def test_login_success(self, mock_jwt):
         self.mock_repo.find_by_email.return_value = self.fake_user
@@ -38,6 +49,24 @@ class TestAuthService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(token, "fake.jwt.token")
         mock_jwt.assert_called_once()
 
+    @patch("services.auth_service.JWTManager.create_access_token", return_value="fake.jwt.token")
+    async def test_login_rehashes_plaintext_password(self, mock_jwt):
+        self.mock_repo.find_by_email.return_value = self.fake_user
+
+        await self.auth_service.login(object(), "test@example.com", "pass")
+
+        profile_id, new_hash = self.mock_repo.update_password.call_args.args
+        self.assertEqual(profile_id, 1)
+        self.assertFalse(self.hasher.needs_rehash(new_hash))
+
+    @patch("services.auth_service.JWTManager.create_access_token", return_value="fake.jwt.token")
+    async def test_login_with_current_hash_does_not_rehash(self, mock_jwt):
+        hashed = self.fake_user.model_copy(update={"password": await self.hasher.hash("pass")})
+        self.mock_repo.find_by_email.return_value = hashed
+
+        self.assertEqual(await self.auth_service.login(object(), "test@example.com", "pass"), "fake.jwt.token")
+        self.mock_repo.update_password.assert_not_called()
+
     @patch("services.auth_service.JWTManager.create_access_token")
     async def test_login_wrong_credentials(self, mock_jwt):
         self.mock_repo.find_by_email.return_value = self.fake_user
@@ -53,4 +82,21 @@ class TestAuthService(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(ValueError):
             await self.auth_service.login(object(), "no-user@example.com", "any")
 
-        mock_jwt.assert_not_called()
\ No newline at end of file
+        mock_jwt.assert_not_called()
+
+    async def asyncTearDown(self):
+        self.hasher.shutdown()
+
+    async def test_logout_revokes_token_for_all_instances(self):
+        token = JWTManager.create_access_token({"sub": "test@example.com", "id": 1}, timedelta(minutes=5))
+        self.assertEqual(self.auth_service.verify_token(token)["id"], 1)
+
+        await self.auth_service.logout(token)
+
+        other = AuthService(self.mock_repo, revocations=self.revocations)
+        with self.assertRaises(ValueError):
+            other.verify_token(token)
+
+    async def test_logout_with_invalid_token(self):
+        self.assertTrue(await self.auth_service.logout("garbage"))
+        self.assertEqual(len(self.revocations), 0)
@@ -4,12 +4,16 @@ from unittest.mock import AsyncMock
 from models.category import Category
 from services.category_service import CategoryService
 from abstract_repositories.icategory_repository import ICategoryRepository
+from core.category_cache import CategoryCache
+from clock import FakeClock
 
 
 class TestCategoryService(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.repo = AsyncMock(spec=ICategoryRepository)
-        self.service = CategoryService(self.repo)
+        self.clock = FakeClock()
+        self.cache = CategoryCache(ttl=60, clock=self.clock)
+        self.service = CategoryService(self.repo, cache=self.cache)
 
         self.cat1 = Category(id=1, name="Электроника")
         self.cat2 = Category(id=2, name="Книги")
@@ -32,9 +36,55 @@ class TestCategoryService(unittest.IsolatedAsyncioTestCase):
         self.repo.get_all.assert_awaited_once()
 
     async def test_get_name_by_id_found(self):
-        self.repo.get_name_by_id.return_value = "Электроника"
+        self.repo.get_all.return_value = [self.cat1, self.cat2]
 
         name = await self.service.get_name_by_id(1)
 
         self.assertEqual(name, "Электроника")
-        self.repo.get_name_by_id.assert_awaited_once_with(1)
\ No newline at end of file
+        self.repo.get_name_by_id.assert_not_called()
+
+    async def test_get_name_by_id_not_found(self):
+        self.repo.get_all.return_value = [self.cat1]
+
+        self.assertEqual(await self.service.get_name_by_id(99), "Категория не найдена")
+
+    async def test_cached_lookups_skip_repository(self):
+        self.repo.get_all.return_value = [self.cat1, self.cat2]
+
+        await self.service.get_all()
+        await self.service.get_all()
+        await self.service.get_name_by_id(2)
+
+        self.repo.get_all.assert_awaited_once()
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    async def test_cache_shared_between_service_instances(self):
+        self.repo.get_all.return_value = [self.cat1]
+        await self.service.get_all()
+
+        other_repo = AsyncMock(spec=ICategoryRepository)
+        items = await CategoryService(other_repo, cache=self.cache).get_all()
+
+        self.assertEqual(items, [self.cat1])
+        other_repo.get_all.assert_not_called()
+
+    async def test_ttl_expiry_reloads(self):
+        self.repo.get_all.return_value = [self.cat1]
+        await self.service.get_all()
+
+        self.clock.now = 61
+        self.repo.get_all.return_value = [self.cat1, self.cat2]
+        items = await self.service.get_all()
+
+        self.assertEqual(len(items), 2)
+        self.assertEqual(self.repo.get_all.await_count, 2)
+
+    async def test_invalidate_reloads(self):
+        self.repo.get_all.return_value = [self.cat1]
+        await self.service.get_all()
+
+        self.service.invalidate_cache()
+        await self.service.get_all()
+
+        self.assertEqual(self.repo.get_all.await_count, 2)
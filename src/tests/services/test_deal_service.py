@@ -45,4 +45,9 @@ class TestDealsService(unittest.IsolatedAsyncioTestCase):
     async def test_is_in_deals(self):
         self.repo.is_in_deals.return_value = True
         self.assertTrue(await self.service.is_in_deals(1, 5))
-        self.repo.is_in_deals.assert_awaited_once_with(1, 5)
\ No newline at end of file
+        self.repo.is_in_deals.assert_awaited_once_with(1, 5)
+
+    async def test_is_in_deals_many(self):
+        self.repo.is_in_deals_many.return_value = {5}
+        self.assertEqual(await self.service.is_in_deals_many(1, [5, 6]), {5})
+        self.repo.is_in_deals_many.assert_awaited_once_with(1, [5, 6])
@@ -1,12 +1,16 @@
 import unittest
 from unittest.mock import AsyncMock
+from core.unit_of_work import run_after_commit, track_commit
+from core.user_sets import UserSetsCache
+from dto.like_dto import LikeToggle, LikeToggleResult
 from models.liked import Liked
 from services.liked_service import LikedService
 
 class TestLikedService(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.mock_repo = AsyncMock()
-        self.service = LikedService(self.mock_repo)
+        self.cache = UserSetsCache()
+        self.service = LikedService(self.mock_repo, self.cache)
         self.fake_like = Liked(id=1, id_customer=1, id_advert=5)
 
     async def test_add_like(self):
@@ -26,4 +30,53 @@ class TestLikedService(unittest.IsolatedAsyncioTestCase):
 
     async def test_is_liked(self):
         self.mock_repo.is_liked.return_value = True
-        self.assertTrue(await self.service.is_liked(1, 5))
\ No newline at end of file
+        self.assertTrue(await self.service.is_liked(1, 5))
+
+    async def test_is_liked_many(self):
+        self.mock_repo.is_liked_many.return_value = {5}
+        self.assertEqual(await self.service.is_liked_many(1, [5, 6]), {5})
+        self.mock_repo.is_liked_many.assert_awaited_once_with(1, [5, 6])
+
+    async def test_toggle_last_wins_and_updates_cache(self):
+        self.cache.store("liked", 1, [5, 6])
+        self.mock_repo.toggle_likes.return_value = LikeToggleResult(liked=[7], unliked=[5], changed=[7, 5], missing=[])
+        toggles = [LikeToggle(advert_id=5, liked=True), LikeToggle(advert_id=7, liked=True),
+                   LikeToggle(advert_id=5, liked=False)]
+
+        report = await self.service.toggle_liked(1, toggles)
+
+        self.mock_repo.toggle_likes.assert_awaited_once_with(1, {5: False, 7: True})
+        self.assertEqual(report.changed, [7, 5])
+        self.assertEqual(list(self.cache.get("liked", 1)), [6, 7])
+
+    async def test_toggle_failure_keeps_cache(self):
+        self.cache.store("liked", 1, [5])
+        self.mock_repo.toggle_likes.side_effect = RuntimeError("boom")
+        with track_commit() as pending, self.assertRaises(RuntimeError):
+            await self.service.toggle_liked(1, [LikeToggle(advert_id=5, liked=False)])
+        run_after_commit(pending)
+        self.assertEqual(list(self.cache.get("liked", 1)), [5])
+
+    async def test_cache_updated_only_after_commit(self):
+        self.cache.store("liked", 1, [])
+        self.mock_repo.add_to_liked.return_value = self.fake_like
+        with track_commit() as pending:
+            await self.service.add_to_liked(1, 5)
+            self.assertNotIn(5, self.cache.get("liked", 1))
+        run_after_commit(pending)
+        self.assertIn(5, self.cache.get("liked", 1))
+
+    async def test_already_liked_still_marks_cache(self):
+        # лайк вставил параллельный запрос — для пользователя объявление всё равно в избранном
+        self.cache.store("liked", 1, [])
+        self.mock_repo.add_to_liked.return_value = None
+        await self.service.add_to_liked(1, 5)
+        self.assertIn(5, self.cache.get("liked", 1))
+
+    async def test_failed_remove_keeps_cache(self):
+        self.cache.store("liked", 1, [5])
+        self.mock_repo.remove_from_liked.side_effect = RuntimeError("boom")
+        with track_commit() as pending, self.assertRaises(RuntimeError):
+            await self.service.remove_from_liked(1, 5)
+        self.assertEqual(pending, [])
+        self.assertIn(5, self.cache.get("liked", 1))
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.pagination import Cursor
+from repositories.advert_repository import AdvertsRepository
+
+ROWS = 2500
+
+
+class TestAdvertStreaming(unittest.IsolatedAsyncioTestCase):
+    """Потоковое чтение на SQLite: схема adv подключается через ATTACH."""
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        adv_path = os.path.join(self.tmp.name, "adv.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'main.db')}")
+
+        @event.listens_for(self.engine.sync_engine, "connect")
+        def attach_adv(dbapi_connection, _):
+            dbapi_connection.execute(f"ATTACH DATABASE '{adv_path}' AS adv")
+
+        started = datetime(2025, 1, 1)
+        async with self.engine.begin() as conn:
+            await conn.execute(text("""
+                CREATE TABLE adv.adverts (
+                    id INTEGER PRIMARY KEY, content TEXT, description TEXT, id_category INTEGER,
+                    price INTEGER, status INTEGER, id_seller INTEGER, date_created TIMESTAMP
+                )
+            """))
+            await conn.execute(
+                text("INSERT INTO adv.adverts VALUES (:id, :content, '', :cat, 100, 1, 1, :date)"),
+                [{"id": i, "content": f"ad {i}", "cat": i % 3, "date": started + timedelta(minutes=i)}
+                 for i in range(1, ROWS + 1)],
+            )
+        self.session = AsyncSession(self.engine)
+        self.repo = AdvertsRepository(self.session)
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+        self.tmp.cleanup()
+
+    async def test_streams_every_row_in_feed_order(self):
+        ids = [advert.id async for advert in self.repo.iter_all_adverts(fetch_size=100)]
+        self.assertEqual(ids, list(range(ROWS, 0, -1)))
+
+    async def test_stream_continues_after_cursor(self):
+        last = (await self.repo.get_all_adverts(limit=10))[-1]
+        stream = self.repo.iter_all_adverts(after=Cursor(last.date_created, last.id), fetch_size=100)
+        ids = [advert.id async for advert in stream]
+        self.assertEqual(ids[0], last.id - 1)
+        self.assertEqual(len(ids), ROWS - 10)
+
+    async def test_by_category(self):
+        ids = [advert.id async for advert in self.repo.iter_adverts_by_category(1, fetch_size=50)]
+        self.assertEqual(len(ids), len([i for i in range(1, ROWS + 1) if i % 3 == 1]))
+        self.assertTrue(all(i % 3 == 1 for i in ids))
+
+    async def test_early_stop_releases_cursor(self):
+        stream = self.repo.iter_all_adverts(fetch_size=10)
+        async for advert in stream:
+            break
+        await stream.aclose()
+        # сессия снова пригодна для обычных запросов
+        self.assertEqual(len(await self.repo.get_all_adverts(limit=5)), 5)
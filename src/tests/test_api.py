@@ -0,0 +1,116 @@
+import json
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from core.category_cache import category_cache
+from dto.like_dto import LikeToggleResult
+from service_locator import build_locator, get_request_locator
+from test_feed_queries import CountingSession
+
+USER = {"id": 1, "sub": "a@b.c", "role": "authorized_user"}
+
+
+class TestJsonApi(unittest.TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        self.session = CountingSession(3)
+        app.dependency_overrides[get_request_locator] = lambda: build_locator(self.session)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_adverts_page(self):
+        response = self.client.get("/api/v1/adverts?limit=3")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item["id"] for item in body["items"]], [1, 2, 3])
+        self.assertEqual(body["items"][0]["date_created"], "2025-01-01T00:00:00")
+        self.assertIsNotNone(body["next_cursor"])
+
+    def test_sparse_fieldset(self):
+        body = self.client.get("/api/v1/adverts?fields=id,price").json()
+        self.assertEqual(body["items"][0], {"id": 1, "price": 100})
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get("/api/v1/adverts?fields=id,passwd")
+        self.assertEqual(response.status_code, 400)
+
+    def test_categories(self):
+        self.assertEqual(self.client.get("/api/v1/categories").json(), [{"id": 1, "name": "Электроника"}])
+
+    def test_liked_requires_user(self):
+        self.assertEqual(self.client.get("/api/v1/me/liked").status_code, 401)
+
+    def test_ndjson_stream(self):
+        @asynccontextmanager
+        async def fake_open_locator(role):
+            yield build_locator(self.session)
+
+        with patch("routers.api.open_locator", fake_open_locator):
+            response = self.client.get("/api/v1/categories/1/adverts?fields=id,content",
+                                       headers={"Accept": "application/x-ndjson"})
+
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(lines, [{"id": i + 1, "content": f"Объявление {i}"} for i in range(3)])
+
+    def test_authorized_flags(self):
+        with patch("core.token_cache.JWTManager.decode_token", return_value=USER):
+            body = self.client.get("/api/v1/adverts?fields=id,is_favorite",
+                                   cookies={"access_token": "token"}).json()
+        self.assertEqual(body["items"][0], {"id": 1, "is_favorite": False})
+
+    def test_toggle_liked(self):
+        async def toggle_likes(repo, user_id, toggles):
+            self.assertEqual((user_id, toggles), (1, {2: True, 3: False}))
+            return LikeToggleResult(liked=[2], unliked=[3], changed=[2])
+
+        body = {"toggles": [{"advert_id": 2, "liked": True}, {"advert_id": 3, "liked": False}]}
+        with patch("core.token_cache.JWTManager.decode_token", return_value=USER), \
+                patch("repositories.liked_repository.LikedRepository.toggle_likes", toggle_likes):
+            response = self.client.post("/api/v1/me/liked", json=body, cookies={"access_token": "token"})
+        self.assertEqual(response.json(), {"liked": [2], "unliked": [3], "changed": [2], "missing": []})
+
+    def test_toggle_liked_requires_user(self):
+        response = self.client.post("/api/v1/me/liked", json={"toggles": []})
+        self.assertEqual(response.status_code, 401)
+
+    def test_import_requires_user(self):
+        response = self.client.post("/api/v1/adverts/import", content=b"content\n",
+                                    headers={"Content-Type": "text/csv"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_import_csv(self):
+        async def create_many(repo, adverts):
+            return [advert.model_copy(update={"id": 50 + i}) for i, advert in enumerate(adverts)]
+
+        roles = []
+
+        @asynccontextmanager
+        async def fake_open_locator(role):
+            roles.append(role)
+            yield build_locator(self.session)
+
+        data = "content,description,id_category,price\nДиван,Мягкий,1,1500\nСтол,Дубовый,42,700\n"
+        with patch("core.token_cache.JWTManager.decode_token", return_value=USER), \
+                patch("routers.api.open_locator", fake_open_locator), \
+                patch("repositories.advert_repository.AdvertsRepository.create_many", create_many):
+            response = self.client.post("/api/v1/adverts/import", files={"file": ("adverts.csv", data.encode())},
+                                        cookies={"access_token": "token"})
+
+        body = response.json()
+        self.assertEqual((body["created"], body["ids"]), (1, [50]))
+        self.assertEqual(body["errors"], [{"row": 2, "errors": ["id_category: категории 42 нет"]}])
+        self.assertEqual(roles, ["authorized_user"])
+
+    def test_import_unsupported_format(self):
+        with patch("core.token_cache.JWTManager.decode_token", return_value=USER):
+            response = self.client.post("/api/v1/adverts/import", content=b"<xml/>",
+                                        headers={"Content-Type": "application/xml"},
+                                        cookies={"access_token": "token"})
+        self.assertEqual(response.status_code, 415)
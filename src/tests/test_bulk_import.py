@@ -0,0 +1,62 @@
+import unittest
+
+from core.bulk_import import csv_rows, json_rows, ndjson_rows
+
+
+async def chunks_of(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(parser, data: bytes):
+    return [row async for row in parser(chunks_of(data))]
+
+
+class TestImportParsers(unittest.IsolatedAsyncioTestCase):
+    async def test_csv_with_bom_and_quoted_newline(self):
+        data = '﻿content,description,id_category,price\n' \
+               'Диван,"Большой,\nмягкий",2,1500\r\n' \
+               '\n' \
+               'Стол,Дубовый,3\n'.encode()
+        rows = await collect(csv_rows, data)
+
+        self.assertEqual(rows[0].values, {"content": "Диван", "description": "Большой,\nмягкий",
+                                          "id_category": "2", "price": "1500"})
+        self.assertEqual((rows[1].number, rows[1].values), (2, None))
+        self.assertIn("4", rows[1].error)
+
+    async def test_csv_unclosed_quote(self):
+        rows = await collect(csv_rows, b'content,price\n"abc,1\n')
+        self.assertEqual(rows[-1].error, "незакрытая кавычка")
+
+    async def test_ndjson_reports_bad_lines(self):
+        data = '{"content": "Диван"}\n\nnot json\n[1]\n{"price": 1}'.encode()
+        rows = await collect(ndjson_rows, data)
+
+        self.assertEqual([row.number for row in rows], [1, 2, 3, 4])
+        self.assertEqual(rows[0].values, {"content": "Диван"})
+        self.assertTrue(rows[1].error.startswith("некорректный JSON"))
+        self.assertEqual(rows[2].error, "ожидался объект JSON")
+        self.assertEqual(rows[3].values, {"price": 1})
+
+    async def test_json_array(self):
+        rows = await collect(json_rows, b'[{"price": 1}, 2]')
+        self.assertEqual(rows[0].values, {"price": 1})
+        self.assertEqual(rows[1].error, "ожидался объект JSON")
+
+        rows = await collect(json_rows, b'{"price": 1}')
+        self.assertEqual(rows[0].error, "ожидался массив объектов JSON")
+
+    async def test_json_array_streamed_across_chunks(self):
+        data = '﻿[{"content": "Диван", "price": 12345}, {"price": 7} ]'.encode()
+        rows = [row async for row in json_rows(chunks_of(data, 1))]
+        self.assertEqual([row.values for row in rows], [{"content": "Диван", "price": 12345}, {"price": 7}])
+
+        rows = await collect(json_rows, b'[{"price": 1} {"price": 2}]')
+        self.assertEqual(rows[1].number, 2)
+        self.assertTrue(rows[1].error.startswith("некорректный JSON"))
+
+    async def test_json_item_size_capped(self):
+        data = b'[{"content": "' + b"x" * 100 + b'"}]'
+        rows = [row async for row in json_rows(chunks_of(data), max_item=50)]
+        self.assertEqual(rows, [(1, None, "элемент массива длиннее 50 символов")])
@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from core.db import PoolManager, PoolSettings
+
+
+class TestPoolSettings(unittest.TestCase):
+    def test_role_overrides_global(self):
+        env = {"DB_POOL_SIZE": "7", "DB_ANY_USER_POOL_SIZE": "40", "DB_MAX_OVERFLOW": "0"}
+        with patch.dict(os.environ, env):
+            anon = PoolSettings.from_env("any_user")
+            admin = PoolSettings.from_env("admin")
+        self.assertEqual(anon.pool_size, 40)
+        self.assertEqual(admin.pool_size, 7)
+        self.assertEqual(admin.max_overflow, 0)
+
+
+class TestPoolManager(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.manager = PoolManager(
+            {"any_user": "sqlite+aiosqlite:///:memory:"},
+            settings_factory=lambda role: PoolSettings(pool_size=2, max_overflow=1),
+        )
+
+    async def asyncTearDown(self):
+        await self.manager.dispose()
+
+    async def test_engine_created_lazily(self):
+        self.assertEqual(self.manager.stats(), {})
+        self.manager.sessionmaker("any_user")
+        self.assertIn("any_user", self.manager.stats())
+
+    async def test_stats_track_checkouts(self):
+        async with self.manager.sessionmaker("any_user")() as session:
+            await session.execute(text("SELECT 1"))
+            stats = self.manager.stats()["any_user"]
+            self.assertEqual(stats["checked_out"], 1)
+
+        stats = self.manager.stats()["any_user"]
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["checkouts"], 1)
+        self.assertGreaterEqual(stats["wait_seconds_total"], 0)
+
+    async def test_dispose_drops_engines(self):
+        self.manager.engine("any_user")
+        await self.manager.dispose()
+        self.assertEqual(self.manager.stats(), {})
@@ -0,0 +1,226 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from core.category_cache import category_cache
+from core.page_cache import page_cache
+from core.user_sets import user_sets
+from service_locator import build_locator, get_request_locator
+
+
+class FakeResult:
+    """Результат запроса: строки задаются словарями, отдаются кортежами, как у Result SQLAlchemy."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def keys(self):
+        return list(self.rows[0]) if self.rows else []
+
+    def mappings(self):
+        return FakeMappings(self.rows)
+
+    def all(self):
+        return list(self)
+
+    def first(self):
+        return next(iter(self), None)
+
+    def scalar(self):
+        return next(iter(self.rows[0].values())) if self.rows else None
+
+    def scalars(self):
+        return iter(next(iter(row.values())) for row in self.rows)
+
+    def __iter__(self):
+        return iter(tuple(row.values()) for row in self.rows)
+
+
+class FakeMappings:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return list(self.rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeStreamResult(FakeResult):
+    def __aiter__(self):
+        return self._rows()
+
+    async def _rows(self):
+        for row in self:
+            yield row
+
+    async def close(self):
+        pass
+
+
+class CountingSession:
+    """Подменяет AsyncSession и считает, сколько запросов ушло в БД."""
+
+    def __init__(self, adverts_count: int, liked=(), bought=()):
+        self.adverts_count = adverts_count
+        self.liked = liked
+        self.bought = bought
+        self.queries = []
+
+    async def execute(self, query, params=None):
+        sql = str(query)
+        self.queries.append(sql)
+        if "FROM adv.categories" in sql:
+            return FakeResult([{"id": 1, "name": "Электроника"}])
+        if "adv.advert_feed" in sql:
+            return FakeResult([self._feed_row(i) for i in range(self.adverts_count)])
+        if "FROM adv.likes" in sql:
+            return FakeResult([{"id_advert": advert_id} for advert_id in self.liked])
+        if "FROM adv.deals" in sql:
+            return FakeResult([{"id_advert": advert_id} for advert_id in self.bought])
+        return FakeResult([])
+
+    async def stream(self, query, params=None, **kwargs):
+        return FakeStreamResult((await self.execute(query, params)).rows)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @staticmethod
+    def _advert(i: int) -> dict:
+        return {
+            "id": i + 1,
+            "content": f"Объявление {i}",
+            "description": "Описание",
+            "id_category": 1,
+            "price": 100,
+            "status": 1,
+            "id_seller": 1,
+            "date_created": datetime(2025, 1, 1),
+        }
+
+    def _feed_row(self, i: int) -> dict:
+        row = self._advert(i)
+        row.update(category_name="Электроника", seller_name="Продавец", is_created=False)
+        return row
+
+
+class TestFeedQueryCount(unittest.TestCase):
+    def _count_queries(self, path: str, adverts_count: int, cookies=None) -> int:
+        category_cache.invalidate()
+        page_cache.invalidate()
+        user_sets.invalidate()
+        session = CountingSession(adverts_count)
+        app.dependency_overrides[get_request_locator] = lambda: build_locator(session)
+        try:
+            with patch("core.token_cache.JWTManager.decode_token", return_value={"id": 1, "sub": "a@b.c", "role": "authorized_user"}):
+                client = TestClient(app, cookies=cookies or {})
+                response = client.get(path)
+        finally:
+            app.dependency_overrides.clear()
+        self.assertEqual(response.status_code, 200)
+        return len(session.queries)
+
+    def _assert_constant(self, path: str, cookies=None):
+        few = self._count_queries(path, 2, cookies)
+        many = self._count_queries(path, 200, cookies)
+        self.assertEqual(few, many)
+
+    def test_index_anonymous(self):
+        self._assert_constant("/")
+
+    def test_index_authorized(self):
+        self._assert_constant("/", {"access_token": "token"})
+
+    def test_category_authorized(self):
+        self._assert_constant("/category/1", {"access_token": "token"})
+
+    def test_search_authorized(self):
+        self._assert_constant("/search?q=test", {"access_token": "token"})
+
+
+class TestUserSetFlags(unittest.TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        user_sets.invalidate()
+        self.session = CountingSession(3, liked=[2], bought=[3])
+        app.dependency_overrides[get_request_locator] = lambda: build_locator(self.session)
+        self.client = TestClient(app, cookies={"access_token": "token"})
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        user_sets.invalidate()
+
+    def get(self, path: str):
+        with patch("core.token_cache.JWTManager.decode_token", return_value={"id": 1, "sub": "a@b.c", "role": "authorized_user"}):
+            return self.client.get(path)
+
+    def unlike(self, referer: str) -> str:
+        with patch("core.token_cache.JWTManager.decode_token", return_value={"id": 1, "sub": "a@b.c", "role": "authorized_user"}):
+            response = self.client.post("/unlike/2", headers={"Referer": referer}, follow_redirects=False)
+        return response.headers["location"]
+
+    def test_unlike_redirects_back_only_within_site(self):
+        self.assertEqual(self.unlike("http://testserver/category/1?after=x"), "/category/1?after=x")
+        self.assertEqual(self.unlike("/liked"), "/liked")
+        for foreign in ("https://evil.example/", "//evil.example/", "/\\evil.example", "javascript:alert(1)"):
+            self.assertEqual(self.unlike(foreign), "/")
+
+    def test_flags_come_from_sets_loaded_once(self):
+        first = self.get("/")
+        self.assertEqual(first.text.count("/unlike/2"), 1)
+        self.assertEqual(first.text.count('action="/like/'), 2)
+        self.assertEqual(first.text.count("Уже куплено"), 1)
+        set_queries = [sql for sql in self.session.queries if "adv.advert_feed" not in sql]
+
+        self.session.queries.clear()
+        self.get("/category/1")
+        # второй запрос берёт множества из кэша
+        self.assertFalse([sql for sql in self.session.queries if "FROM adv.likes" in sql or "FROM adv.deals" in sql])
+        self.assertTrue(any("FROM adv.likes" in sql for sql in set_queries))
+
+
+class TestAnonymousPageCache(unittest.TestCase):
+    def setUp(self):
+        category_cache.invalidate()
+        page_cache.invalidate()
+        self.session = CountingSession(3)
+        app.dependency_overrides[get_request_locator] = lambda: build_locator(self.session)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        page_cache.invalidate()
+
+    def test_second_anonymous_request_served_from_cache(self):
+        first = self.client.get("/category/1")
+        queries = len(self.session.queries)
+        second = self.client.get("/category/1")
+
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(first.text, second.text)
+        self.assertEqual(len(self.session.queries), queries)
+
+    def test_query_parameters_are_part_of_key(self):
+        self.client.get("/?limit=10")
+        self.assertEqual(self.client.get("/?limit=20").headers["X-Cache"], "MISS")
+
+    def test_authorized_requests_bypass_cache(self):
+        self.client.get("/")
+        with patch("core.token_cache.JWTManager.decode_token", return_value={"id": 1, "sub": "a@b.c", "role": "authorized_user"}):
+            response = self.client.get("/", cookies={"access_token": "token"})
+        self.assertNotIn("X-Cache", response.headers)
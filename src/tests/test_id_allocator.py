@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+
+from core.id_allocator import IdBlockAllocator
+
+
+class FakeSequenceSession:
+    """Имитирует nextval(): каждое обращение выдаёт следующие n значений."""
+
+    def __init__(self):
+        self.value = 0
+        self.round_trips = 0
+
+    async def execute(self, query, params):
+        self.round_trips += 1
+        await asyncio.sleep(0)
+        start = self.value + 1
+        self.value += params["n"]
+        return _Scalars(range(start, self.value + 1))
+
+
+class _Scalars:
+    def __init__(self, values):
+        self.values = list(values)
+
+    def scalars(self):
+        return iter(self.values)
+
+
+class TestIdBlockAllocator(unittest.IsolatedAsyncioTestCase):
+    async def test_block_is_served_from_memory(self):
+        session = FakeSequenceSession()
+        allocator = IdBlockAllocator("adv.adverts_id_seq", block_size=100)
+
+        ids = [await allocator.next_id(session) for _ in range(100)]
+
+        self.assertEqual(ids, list(range(1, 101)))
+        self.assertEqual(session.round_trips, 1)
+
+    async def test_large_batch_reserved_in_one_round_trip(self):
+        session = FakeSequenceSession()
+        allocator = IdBlockAllocator("adv.adverts_id_seq", block_size=10)
+
+        ids = await allocator.allocate(session, 250)
+
+        self.assertEqual(len(set(ids)), 250)
+        self.assertEqual(session.round_trips, 1)
+
+    async def test_concurrent_writers_get_unique_ids(self):
+        session = FakeSequenceSession()
+        allocator = IdBlockAllocator("adv.adverts_id_seq", block_size=7)
+
+        batches = await asyncio.gather(*(allocator.allocate(session, 5) for _ in range(50)))
+
+        all_ids = [i for batch in batches for i in batch]
+        self.assertEqual(len(all_ids), 250)
+        self.assertEqual(len(set(all_ids)), 250)
@@ -0,0 +1,120 @@
+import io
+import json
+import logging
+import threading
+import unittest
+
+from core.log import EnqueueHandler, SamplingFilter, parse_mapping, setup_logging, stop_logging
+
+
+class BlockingStream(io.StringIO):
+    """Поток, запись в который ждёт разрешения — как зависший приёмник журнала."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+
+    def write(self, s: str) -> int:
+        self.unblocked.wait(5)
+        return super().write(s)
+
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.saved_level = self.root.level
+        self.stream = BlockingStream()
+        self.stream.unblocked.set()
+
+    def tearDown(self):
+        stop_logging()
+        for handler in [h for h in self.root.handlers if isinstance(h, EnqueueHandler)]:
+            self.root.removeHandler(handler)
+        self.root.setLevel(self.saved_level)
+        logging.getLogger("test_log.quiet").setLevel(logging.NOTSET)
+
+    def lines(self) -> list[dict]:
+        stop_logging()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_record_with_extra(self):
+        setup_logging(level="INFO", levels={}, sampling={}, stream=self.stream, fmt="json")
+        logging.getLogger("test_log").warning("N+1: %s выполнил %s", "/", "feed.all", extra={"count": 7})
+
+        [line] = self.lines()
+        self.assertEqual(line["level"], "WARNING")
+        self.assertEqual(line["logger"], "test_log")
+        self.assertEqual(line["msg"], "N+1: / выполнил feed.all")
+        self.assertEqual(line["count"], 7)
+
+    def test_exception_text_is_kept(self):
+        setup_logging(level="INFO", levels={}, sampling={}, stream=self.stream, fmt="json")
+        try:
+            raise ValueError("сломалось")
+        except ValueError:
+            logging.getLogger("test_log").exception("Ошибка")
+
+        [line] = self.lines()
+        self.assertIn("ValueError: сломалось", line["exc"])
+
+    def test_caller_does_not_wait_for_sink(self):
+        setup_logging(level="INFO", levels={}, sampling={}, stream=self.stream, fmt="text")
+        self.stream.unblocked.clear()
+
+        # приёмник завис, но запись журнала не блокирует вызывающий поток
+        for i in range(100):
+            logging.getLogger("test_log").info("запись %d", i)
+        self.assertEqual(self.stream.getvalue(), "")
+
+        self.stream.unblocked.set()
+        stop_logging()
+        self.assertEqual(len(self.stream.getvalue().splitlines()), 100)
+
+    def test_message_args_resolved_at_call_time(self):
+        setup_logging(level="INFO", levels={}, sampling={}, stream=self.stream, fmt="json")
+        self.stream.unblocked.clear()
+        ids = [1]
+        logging.getLogger("test_log").info("ids=%s", ids)
+        ids.append(2)
+        self.stream.unblocked.set()
+
+        [line] = self.lines()
+        self.assertEqual(line["msg"], "ids=[1]")
+
+    def test_per_logger_levels(self):
+        setup_logging(level="INFO", levels={"test_log.quiet": "ERROR"}, sampling={}, stream=self.stream)
+        logging.getLogger("test_log.quiet").warning("не попадёт")
+        logging.getLogger("test_log.quiet.child").warning("и это тоже")
+        logging.getLogger("test_log.quiet").error("попадёт")
+        logging.getLogger("test_log").info("и это")
+
+        self.assertEqual([line["msg"] for line in self.lines()], ["попадёт", "и это"])
+
+    def test_parse_mapping(self):
+        self.assertEqual(parse_mapping("repositories=WARNING, core.metrics = 0.1,bad"),
+                         {"repositories": "WARNING", "core.metrics": "0.1"})
+        self.assertEqual(parse_mapping(""), {})
+
+
+class TestSamplingFilter(unittest.TestCase):
+    def record(self, name: str, level: int) -> logging.LogRecord:
+        return logging.makeLogRecord({"name": name, "levelno": level})
+
+    def test_rate_applies_to_logger_and_children(self):
+        rolls = iter([0.05, 0.5, 0.05])
+        sampling = SamplingFilter({"core.metrics": 0.1}, rand=lambda: next(rolls))
+
+        self.assertTrue(sampling.filter(self.record("core.metrics", logging.WARNING)))
+        self.assertFalse(sampling.filter(self.record("core.metrics", logging.WARNING)))
+        self.assertTrue(sampling.filter(self.record("core.metrics.sub", logging.INFO)))
+
+    def test_errors_and_other_loggers_pass(self):
+        sampling = SamplingFilter({"core.metrics": 0.0}, rand=lambda: 0.99)
+
+        self.assertTrue(sampling.filter(self.record("core.metrics", logging.ERROR)))
+        self.assertTrue(sampling.filter(self.record("repositories.advert_repository", logging.INFO)))
+        self.assertFalse(sampling.filter(self.record("core.metrics", logging.WARNING)))
+
+
+if __name__ == "__main__":
+    unittest.main()
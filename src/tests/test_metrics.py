@@ -0,0 +1,82 @@
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.metrics import Exposition, Histogram, QueryMetrics
+from core.statements import StatementRegistry
+
+registry = StatementRegistry()
+registry.define("test.one", "SELECT 1")
+registry.define("test.broken", "SELECT * FROM missing_table")
+
+
+class TestQueryMetrics(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.metrics = QueryMetrics(threshold=2)
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.metrics.instrument(self.engine)
+        self.session = AsyncSession(self.engine)
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.engine.dispose()
+
+    async def test_counts_queries_of_request(self):
+        with self.metrics.track_request() as usage:
+            await self.session.execute(registry["test.one"])
+            await self.session.execute(registry["test.one"])
+
+        self.assertEqual(usage.count, 2)
+        self.assertEqual(usage.by_statement, {"test.one": 2})
+        self.assertEqual(self.metrics.statement_seconds["test.one"].count, 2)
+        self.assertEqual(self.metrics.finish_request("/", usage), [])
+
+    async def test_repeated_statement_flagged_as_n_plus_one(self):
+        with self.metrics.track_request() as usage:
+            for _ in range(3):
+                await self.session.execute(registry["test.one"])
+
+        self.assertEqual(self.metrics.finish_request("/category/{category_id}", usage), [("test.one", 3)])
+        self.assertEqual(self.metrics.n_plus_one["/category/{category_id}", "test.one"], 1)
+
+    async def test_queries_outside_request_not_attributed(self):
+        await self.session.execute(registry["test.one"])
+        with self.metrics.track_request() as usage:
+            pass
+        self.assertEqual(usage.count, 0)
+        self.assertEqual(self.metrics.statement_seconds["test.one"].count, 1)
+
+    async def test_errors_counted(self):
+        with self.assertRaises(SQLAlchemyError):
+            await self.session.execute(registry["test.broken"])
+        self.assertEqual(self.metrics.statement_errors["test.broken"], 1)
+
+
+class TestExposition(unittest.TestCase):
+    def test_histogram_is_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        out = Exposition()
+        out.histogram("x_seconds", {"statement": 'a"b'}, histogram)
+
+        self.assertEqual(out.lines[:3], [
+            'x_seconds_bucket{statement="a\\"b",le="0.1"} 2',
+            'x_seconds_bucket{statement="a\\"b",le="1.0"} 3',
+            'x_seconds_bucket{statement="a\\"b",le="+Inf"} 4',
+        ])
+        self.assertEqual(out.lines[-1], 'x_seconds_count{statement="a\\"b"} 4')
+
+    def test_metrics_endpoint(self):
+        from main import app
+
+        client = TestClient(app)
+        client.get("/api/v1/adverts/999999?fields=bogus")
+        response = client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('http_request_db_queries_count{route="/api/v1/adverts/{advert_id}"}', response.text)
+        self.assertIn("# TYPE db_pool_checkouts_total counter", response.text)
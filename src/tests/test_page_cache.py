@@ -0,0 +1,90 @@
+import unittest
+
+from core.page_cache import PageCache, RenderedPage
+from clock import FakeClock
+
+
+class Renderer:
+    """Считает вызовы; может падать или отдавать пустую (некэшируемую) страницу."""
+
+    def __init__(self, body: bytes = b"page"):
+        self.body = body
+        self.calls = 0
+        self.fail = False
+        self.cacheable = True
+
+    async def __call__(self) -> RenderedPage:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("db is down")
+        return RenderedPage(self.body + str(self.calls).encode(), self.cacheable)
+
+
+class TestPageCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = PageCache(maxsize=2, ttl=30, clock=self.clock)
+        self.render = Renderer()
+
+    async def test_miss_then_hit(self):
+        self.assertEqual(await self.cache.get("/", self.render), (b"page1", "MISS"))
+        self.assertEqual(await self.cache.get("/", self.render), (b"page1", "HIT"))
+        self.assertEqual(self.render.calls, 1)
+
+    async def test_stale_served_while_single_refresh_runs(self):
+        await self.cache.get("/", self.render)
+        self.clock.now = 31
+
+        results = [await self.cache.get("/", self.render) for _ in range(3)]
+        self.assertEqual(results, [(b"page1", "STALE")] * 3)
+        await self.cache.wait_refreshing()
+
+        self.assertEqual(self.render.calls, 2)
+        self.assertEqual(await self.cache.get("/", self.render), (b"page2", "HIT"))
+
+    async def test_last_good_page_kept_when_refresh_fails(self):
+        await self.cache.get("/", self.render)
+        self.clock.now = 31
+        self.render.fail = True
+
+        self.assertEqual(await self.cache.get("/", self.render), (b"page1", "STALE"))
+        await self.cache.wait_refreshing()
+        self.assertEqual(await self.cache.get("/", self.render), (b"page1", "STALE"))
+        await self.cache.wait_refreshing()
+        self.assertEqual(self.cache.refresh_failures, 2)
+
+    async def test_empty_page_is_not_cached(self):
+        self.render.cacheable = False
+        await self.cache.get("/", self.render)
+        self.assertEqual((await self.cache.get("/", self.render))[1], "MISS")
+
+    async def test_empty_refresh_keeps_last_good_page(self):
+        await self.cache.get("/", self.render)
+        self.clock.now = 31
+        self.render.cacheable = False
+        await self.cache.get("/", self.render)
+        await self.cache.wait_refreshing()
+        self.assertEqual(await self.cache.get("/", self.render), (b"page1", "STALE"))
+
+    async def test_invalidate(self):
+        await self.cache.get("/", self.render)
+        self.cache.invalidate()
+        self.assertEqual(await self.cache.get("/", self.render), (b"page2", "MISS"))
+
+    async def test_refresh_started_before_invalidate_is_dropped(self):
+        await self.cache.get("/", self.render)
+        self.clock.now = 31
+        await self.cache.get("/", self.render)
+        self.cache.invalidate()
+        await self.cache.wait_refreshing()
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    async def test_size_bounded_lru(self):
+        await self.cache.get("/a", self.render)
+        await self.cache.get("/b", self.render)
+        await self.cache.get("/a", self.render)
+        await self.cache.get("/c", self.render)
+
+        self.assertEqual(self.cache.stats()["size"], 2)
+        self.assertEqual((await self.cache.get("/a", self.render))[1], "HIT")
+        self.assertEqual((await self.cache.get("/b", self.render))[1], "MISS")
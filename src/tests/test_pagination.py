@@ -0,0 +1,42 @@
+import unittest
+from datetime import datetime, timezone
+
+from core.pagination import Cursor, decode_cursor, encode_cursor, keyset_condition, next_cursor
+from models.advert import Advert
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        cursor = Cursor(datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc), 42)
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
+
+    def test_garbage_means_first_page(self):
+        self.assertIsNone(decode_cursor(None))
+        self.assertIsNone(decode_cursor(""))
+        self.assertIsNone(decode_cursor("not-a-cursor"))
+
+    def test_next_cursor_only_for_full_page(self):
+        adverts = [
+            Advert(id=i, content="c", description="d", id_category=1, price=1, id_seller=1,
+                   date_created=datetime(2025, 1, i))
+            for i in (3, 2)
+        ]
+        self.assertIsNone(next_cursor(adverts, 3))
+        self.assertEqual(decode_cursor(next_cursor(adverts, 2)), Cursor(datetime(2025, 1, 2), 2))
+
+    def test_keyset_condition(self):
+        self.assertEqual(keyset_condition(None), ("TRUE", {}))
+        condition, params = keyset_condition(Cursor(datetime(2025, 1, 1), 7), "a")
+        self.assertEqual(condition, "(a.date_created, a.id) < (:after_date, :after_id)")
+        self.assertEqual(params["after_id"], 7)
+
+    def test_ranked_keyset_condition(self):
+        cursor = Cursor(datetime(2025, 1, 1), 7, 0.25)
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
+
+        condition, params = keyset_condition(cursor, "h", ranked=True)
+        self.assertEqual(condition, "(h.rank, h.date_created, h.id) < (:after_rank, :after_date, :after_id)")
+        self.assertEqual(params["after_rank"], 0.25)
+
+        # курсор обычной ленты не подходит для выдачи поиска — начинаем с первой страницы
+        self.assertEqual(keyset_condition(Cursor(datetime(2025, 1, 1), 7), "h", ranked=True), ("TRUE", {}))
@@ -0,0 +1,37 @@
+import unittest
+
+from core.passwords import PasswordHasher
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(iterations=1000, max_workers=2)
+
+    def tearDown(self):
+        self.hasher.shutdown()
+
+    async def test_hash_and_verify(self):
+        stored = await self.hasher.hash("secret")
+        self.assertTrue(stored.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(await self.hasher.verify("secret", stored))
+        self.assertFalse(await self.hasher.verify("wrong", stored))
+
+    async def test_salt_is_random(self):
+        self.assertNotEqual(await self.hasher.hash("secret"), await self.hasher.hash("secret"))
+
+    async def test_plaintext_legacy_password(self):
+        self.assertTrue(await self.hasher.verify("secret", "secret"))
+        self.assertFalse(await self.hasher.verify("wrong", "secret"))
+        self.assertTrue(self.hasher.needs_rehash("secret"))
+
+    async def test_needs_rehash_when_cost_changes(self):
+        stored = await self.hasher.hash("secret")
+        self.assertFalse(self.hasher.needs_rehash(stored))
+
+        stronger = PasswordHasher(iterations=2000)
+        self.assertTrue(stronger.needs_rehash(stored))
+        # старый хэш по-прежнему проверяется со своим числом итераций
+        self.assertTrue(stronger.verify_sync("secret", stored))
+
+    async def test_malformed_hash(self):
+        self.assertFalse(await self.hasher.verify("secret", "pbkdf2_sha256$x$y$z"))
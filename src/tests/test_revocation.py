@@ -0,0 +1,76 @@
+import unittest
+
+from core.revocation import BloomFilter, InMemoryRevocationBackend, RevocationStore
+from clock import FakeClock
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [f"jti-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_false_positive_rate_close_to_target(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestRevocationStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.backend = InMemoryRevocationBackend(clock=self.clock)
+        self.store = RevocationStore(self.backend, expected_items=100, clock=self.clock)
+
+    async def test_revoke_and_check(self):
+        await self.store.revoke("a", expires_at=2000)
+        self.assertTrue(self.store.is_revoked("a"))
+        self.assertFalse(self.store.is_revoked("b"))
+
+    async def test_expired_revocations_are_swept(self):
+        await self.store.revoke("a", expires_at=1100)
+        await self.store.revoke("b", expires_at=5000)
+
+        self.clock.now = 1200
+        self.assertFalse(self.store.is_revoked("a"))
+        await self.store.refresh(force=True)
+
+        self.assertEqual(len(self.store), 1)
+        self.assertTrue(self.store.is_revoked("b"))
+        self.assertEqual(len(await self.backend.load_since(0)), 1)
+
+    async def test_already_expired_token_is_ignored(self):
+        await self.store.revoke("a", expires_at=900)
+        self.assertEqual(len(self.store), 0)
+
+    async def test_revocations_shared_between_workers(self):
+        other_worker = RevocationStore(self.backend, refresh_interval=5, clock=self.clock)
+        await other_worker.refresh()
+
+        await self.store.revoke("a", expires_at=2000)
+        self.assertFalse(other_worker.is_revoked("a"))
+
+        self.clock.now += 1
+        await other_worker.refresh()
+        self.assertFalse(other_worker.is_revoked("a"))  # ещё не прошёл refresh_interval
+
+        self.clock.now += 5
+        await other_worker.refresh()
+        self.assertTrue(other_worker.is_revoked("a"))
+
+    async def test_load_since_returns_only_newer(self):
+        for i in range(3):
+            await self.backend.revoke(f"jti-{i}", expires_at=5000)
+            self.clock.now += 10
+        self.assertEqual([r.jti for r in await self.backend.load_since(1005)], ["jti-1", "jti-2"])
+        self.assertEqual(await self.backend.load_since(self.clock.now), [])
+
+    async def test_grows_past_expected_items(self):
+        for i in range(1000):
+            await self.store.revoke(f"jti-{i}", expires_at=2000)
+        self.assertTrue(all(self.store.is_revoked(f"jti-{i}") for i in range(1000)))
+        self.assertFalse(self.store.is_revoked("unknown"))
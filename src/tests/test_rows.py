@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from core import rows
+from core.rows import row_factory
+from dto.advert_dto import AdvertWithCategoryDTO
+from dto.rows import AdvertRow, AdvertWithCategoryRow
+from models.advert import Advert
+
+KEYS = ["id", "content", "description", "id_category", "price", "status", "id_seller", "date_created", "search_vector"]
+ROW = (1, "Телефон", "Описание", 2, 100, 1, 7, datetime(2025, 1, 1), "'телефон':1")
+
+
+class TestTrustedRows(unittest.TestCase):
+    def test_fields_by_name_and_extra_columns_dropped(self):
+        advert = row_factory(AdvertRow, KEYS)(ROW)
+        self.assertEqual(advert.id, 1)
+        self.assertEqual(advert.date_created, datetime(2025, 1, 1))
+        self.assertEqual(advert._fields, tuple(Advert.model_fields))
+
+    def test_missing_optional_fields_get_defaults(self):
+        keys = KEYS[:-1] + ["category_name", "seller_name", "is_favorite", "is_bought", "is_created"]
+        row = row_factory(AdvertWithCategoryRow, keys)(ROW[:-1] + ("Электроника", "Продавец", True, False, False))
+        self.assertIsNone(row.rank)
+        self.assertTrue(row.is_favorite)
+
+    def test_missing_required_column_rejected(self):
+        with self.assertRaises(ValueError):
+            row_factory(AdvertRow, ["id", "content"])
+
+    def test_model_dump_and_to_model(self):
+        advert = row_factory(AdvertRow, KEYS)(ROW)
+        self.assertEqual(advert.model_dump(include={"id", "price"}), {"id": 1, "price": 100})
+        model = advert.to_model()
+        self.assertIsInstance(model, Advert)
+        self.assertEqual(model.model_dump(), advert.model_dump())
+
+    def test_validation_can_be_switched_back_on(self):
+        with patch.object(rows, "VALIDATE_ROWS", True):
+            advert = row_factory(AdvertRow, KEYS)(ROW)
+        self.assertIsInstance(advert, Advert)
+
+    def test_row_matches_dto_dump(self):
+        keys = list(AdvertWithCategoryDTO.model_fields)
+        values = (1, "a", "b", 2, "c", 100, 1, 7, "s", datetime(2025, 1, 1), False, True, False, 0.5)
+        row = row_factory(AdvertWithCategoryRow, keys)(values)
+        self.assertEqual(row.model_dump(), AdvertWithCategoryDTO(**dict(zip(keys, values))).model_dump())
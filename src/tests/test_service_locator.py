@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import service_locator
+from core.current_user import LazyUser
+from core.unit_of_work import after_commit
+
+
+class FakeSessionFactory:
+    """SessionLocal[role]() -> async context manager с фиктивной сессией."""
+
+    def __init__(self):
+        self.roles = []
+        self.session = MagicMock()
+        self.session.commit = AsyncMock()
+        self.session.rollback = AsyncMock()
+        self.session.__aenter__ = AsyncMock(return_value=self.session)
+        self.session.__aexit__ = AsyncMock(return_value=False)
+
+    def __getitem__(self, role):
+        self.roles.append(role)
+        return lambda: self.session
+
+
+class TestUnitOfWork(unittest.IsolatedAsyncioTestCase):
+    async def test_commits_once_on_success(self):
+        factory = FakeSessionFactory()
+        with patch.object(service_locator, "SessionLocal", factory):
+            gen = service_locator._make_locator("any_user")
+            locator = await gen.__anext__()
+            self.assertIs(locator.get_advert_repo().session, locator.get_deal_repo().session)
+            with self.assertRaises(StopAsyncIteration):
+                await gen.__anext__()
+
+        factory.session.commit.assert_awaited_once()
+        factory.session.rollback.assert_not_called()
+
+    async def test_rolls_back_on_error(self):
+        factory = FakeSessionFactory()
+        with patch.object(service_locator, "SessionLocal", factory):
+            gen = service_locator._make_locator("any_user")
+            await gen.__anext__()
+            with self.assertRaises(RuntimeError):
+                await gen.athrow(RuntimeError("boom"))
+
+        factory.session.rollback.assert_awaited_once()
+        factory.session.commit.assert_not_called()
+
+    async def test_failed_write_rolls_back_request(self):
+        # запись не глушит ошибку и не ставит точку сохранения — откатывается весь запрос
+        factory = FakeSessionFactory()
+        factory.session.execute = AsyncMock(side_effect=SQLAlchemyError("boom"))
+        with patch.object(service_locator, "SessionLocal", factory):
+            with self.assertRaises(SQLAlchemyError):
+                async with service_locator.open_locator("authorized_user") as locator:
+                    await locator.get_liked_repo().add_to_liked(1, 5)
+
+        factory.session.begin_nested.assert_not_called()
+        factory.session.rollback.assert_awaited_once()
+        factory.session.commit.assert_not_called()
+
+    async def test_cache_changes_wait_for_commit(self):
+        factory = FakeSessionFactory()
+        done = []
+        factory.session.commit.side_effect = lambda: done.append("commit")
+        with patch.object(service_locator, "SessionLocal", factory):
+            async with service_locator.open_locator("authorized_user"):
+                after_commit(lambda: done.append("invalidate"))
+                self.assertEqual(done, [])
+        self.assertEqual(done, ["commit", "invalidate"])
+
+    async def test_cache_changes_dropped_on_rollback(self):
+        factory = FakeSessionFactory()
+        done = []
+        with patch.object(service_locator, "SessionLocal", factory):
+            with self.assertRaises(RuntimeError):
+                async with service_locator.open_locator("authorized_user"):
+                    after_commit(lambda: done.append("invalidate"))
+                    raise RuntimeError("boom")
+        self.assertEqual(done, [])
+        # вне unit of work действие выполняется сразу
+        after_commit(lambda: done.append("now"))
+        self.assertEqual(done, ["now"])
+
+    async def test_role_follows_request_user(self):
+        factory = FakeSessionFactory()
+        request = MagicMock()
+        with patch.object(service_locator, "SessionLocal", factory):
+            request.state.user = {"id": 1}
+            await service_locator.get_request_locator(request).__anext__()
+            request.state.user = None
+            await service_locator.get_request_locator(request).__anext__()
+
+        self.assertEqual(factory.roles, ["authorized_user", "any_user"])
+
+    def test_role_requires_verified_token(self):
+        request = MagicMock()
+        request.state.user = LazyUser("forged")
+        with patch("core.current_user.decode_token_cached", side_effect=ValueError("Invalid token")):
+            self.assertEqual(service_locator.request_role(request), "any_user")
+
+        request.state.user = LazyUser("token")
+        with patch("core.current_user.decode_token_cached", return_value={"id": 1, "jti": "j"}), \
+                patch("core.current_user.revocation_store.is_revoked", return_value=True):
+            self.assertEqual(service_locator.request_role(request), "any_user")
+
+        request.state.user = LazyUser(None)
+        with patch("core.current_user.decode_token_cached", side_effect=AssertionError("decoded")):
+            self.assertEqual(service_locator.request_role(request), "any_user")
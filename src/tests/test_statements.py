@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime
+
+from core.db import PoolSettings
+from core.pagination import Cursor
+from core.statements import StatementRegistry
+from repositories.statements import statements
+
+
+class TestStatementRegistry(unittest.TestCase):
+    def test_listing_variant_chosen_by_cursor(self):
+        listing = statements.listing("feed.by_category")
+        first, params = listing(None)
+        self.assertEqual(params, {})
+        self.assertIn("LIMIT :limit", first.text)
+
+        after, params = listing(Cursor(datetime(2025, 1, 1), 7))
+        self.assertEqual(params, {"after_date": datetime(2025, 1, 1), "after_id": 7})
+        self.assertIn("(a.date_created, a.id) < (:after_date, :after_id)", after.text)
+
+        stream, _ = listing(Cursor(datetime(2025, 1, 1), 7), limited=False)
+        self.assertNotIn("LIMIT", stream.text)
+
+    def test_same_statement_object_every_call(self):
+        cursor = Cursor(datetime(2025, 1, 1), 7, 0.5)
+        self.assertIs(statements.listing("feed.search")(cursor)[0], statements.listing("feed.search")(cursor)[0])
+        self.assertIs(statements["adverts.by_id"], statements["adverts.by_id"])
+
+    def test_search_keyset_uses_rank(self):
+        query, params = statements.listing("feed.search")(Cursor(datetime(2025, 1, 1), 7, 0.5))
+        self.assertIn("(h.rank, h.date_created, h.id)", query.text)
+        self.assertEqual(params["after_rank"], 0.5)
+
+    def test_feed_reads_denormalized_table(self):
+        # категория и продавец уже лежат в adv.advert_feed — присоединяются только флаги пользователя
+        for name in ("feed.all", "feed.by_category", "feed.search"):
+            query, _ = statements.listing(name)(None)
+            self.assertIn("adv.advert_feed", query.text)
+            self.assertNotIn("adv.categories", query.text)
+            self.assertNotIn("adv.profiles", query.text)
+
+    def test_duplicate_name_rejected(self):
+        registry = StatementRegistry()
+        registry.define("a", "SELECT 1")
+        with self.assertRaises(ValueError):
+            registry.define("a", "SELECT 2")
+
+    def test_fits_driver_statement_cache(self):
+        # иначе LRU-кэш asyncpg будет вытеснять и заново готовить наши же запросы
+        self.assertLessEqual(len(statements), PoolSettings().statement_cache_size)
@@ -0,0 +1,90 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from core.page_cache import page_cache
+from core.category_cache import category_cache
+from core.timing import PHASES, RequestTimer, phase, server_timing
+from service_locator import build_locator, get_request_locator
+from test_feed_queries import CountingSession
+from clock import FakeClock
+
+
+class TestRequestTimer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.timer = RequestTimer(slow_ms=100)
+
+    def test_nested_phases_get_own_time(self):
+        with self.timer.track(self.clock) as timing:
+            self.clock.now = 0.010
+            with phase("render"):
+                self.clock.now = 0.015
+                with phase("auth"):
+                    self.clock.now = 0.018
+                self.clock.now = 0.030
+            self.clock.now = 0.040
+            timing.add_db(0.020)
+            self.clock.now = 0.050
+
+        breakdown = self.timer.finish("/", timing)
+        self.assertAlmostEqual(breakdown["render"], 0.017)
+        self.assertAlmostEqual(breakdown["auth"], 0.003)
+        self.assertAlmostEqual(breakdown["db"], 0.020)
+        self.assertAlmostEqual(breakdown["service"], 0.010)
+        self.assertAlmostEqual(breakdown["total"], 0.050)
+        self.assertFalse(self.timer.is_slow(breakdown))
+        self.assertEqual(self.timer.phase_durations["/", "db"].count, 1)
+
+    def test_db_inside_render_counted_once(self):
+        with self.timer.track(self.clock) as timing:
+            with phase("render"):
+                self.clock.now = 0.030
+                timing.add_db(0.010)
+                self.clock.now = 0.040
+            self.clock.now = 0.060
+            timing.add_db(0.005)
+
+        breakdown = self.timer.finish("/", timing)
+        self.assertAlmostEqual(breakdown["render"], 0.030)
+        self.assertAlmostEqual(breakdown["db"], 0.015)
+        self.assertAlmostEqual(breakdown["service"], 0.015)
+        self.assertAlmostEqual(sum(breakdown[name] for name in PHASES), breakdown["total"])
+
+    def test_phase_outside_request_is_noop(self):
+        with phase("auth"):
+            pass
+
+    def test_slow_request_logged_as_json(self):
+        with self.assertLogs("slow_requests", level="WARNING") as logs:
+            self.timer.log_slow("/", {"route": "/", "ms": {"total": 250.0}, "queries": 3})
+        self.assertEqual(json.loads(logs.records[0].getMessage())["queries"], 3)
+        self.assertEqual(self.timer.slow_requests["/"], 1)
+
+    def test_server_timing_header(self):
+        header = server_timing({"auth": 0.001, "db": 0.0125, "total": 0.02}, queries=4)
+        self.assertEqual(header, 'auth;dur=1.0, db;dur=12.5;desc="4 queries", total;dur=20.0')
+
+
+class TestTimingMiddleware(unittest.TestCase):
+    def test_page_has_server_timing_and_slow_log(self):
+        from main import app
+
+        category_cache.invalidate()
+        page_cache.invalidate()
+        session = CountingSession(3)
+        app.dependency_overrides[get_request_locator] = lambda: build_locator(session)
+        try:
+            with patch("main.request_timer", RequestTimer(slow_ms=0)) as timer, \
+                    self.assertLogs("slow_requests", level="WARNING") as logs:
+                response = TestClient(app).get("/")
+        finally:
+            app.dependency_overrides.clear()
+
+        phases = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+        self.assertEqual(phases, ["auth", "db", "render", "service", "total"])
+        self.assertGreater(timer.phase_durations["/", "render"].sum, 0)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["route"], record["status"]), ("/", 200))
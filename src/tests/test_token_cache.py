@@ -0,0 +1,69 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+from core.create_jwt import JWTManager
+from core.current_user import LazyUser
+from core.token_cache import VerifiedTokenCache, decode_token_cached, token_cache
+from clock import FakeClock
+
+
+class TestVerifiedTokenCache(unittest.TestCase):
+    def test_entry_evicted_on_exp(self):
+        clock = FakeClock(1000.0)
+        cache = VerifiedTokenCache(clock=clock)
+        cache.put("t", {"id": 1, "exp": 1010})
+
+        self.assertEqual(cache.get("t"), {"id": 1, "exp": 1010})
+        clock.now = 1010
+        self.assertIsNone(cache.get("t"))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_bound(self):
+        cache = VerifiedTokenCache(maxsize=2, clock=FakeClock(1000.0))
+        cache.put("a", {"exp": 2000})
+        cache.put("b", {"exp": 2000})
+        cache.get("a")
+        cache.put("c", {"exp": 2000})
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_token_without_exp_not_cached(self):
+        cache = VerifiedTokenCache(clock=FakeClock(1000.0))
+        cache.put("t", {"id": 1})
+        self.assertEqual(len(cache), 0)
+
+
+class TestLazyUser(unittest.TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.token = JWTManager.create_access_token(
+            {"sub": "a@b.c", "id": 7, "role": "authorized_user"}, timedelta(minutes=5)
+        )
+
+    def test_not_decoded_until_read(self):
+        with patch("core.token_cache.JWTManager.decode_token", wraps=JWTManager.decode_token) as decode:
+            user = LazyUser(self.token)
+            decode.assert_not_called()
+            self.assertTrue(user)
+            self.assertEqual(user["id"], 7)
+            self.assertEqual(user["email"], "a@b.c")
+        decode.assert_called_once()
+
+    def test_verified_token_reused_across_requests(self):
+        with patch("core.token_cache.JWTManager.decode_token", wraps=JWTManager.decode_token) as decode:
+            for _ in range(3):
+                self.assertEqual(LazyUser(self.token)["id"], 7)
+        decode.assert_called_once()
+
+    def test_anonymous_and_invalid_tokens_are_falsy(self):
+        self.assertFalse(LazyUser(None))
+        self.assertFalse(LazyUser("garbage"))
+        with self.assertRaises(KeyError):
+            LazyUser(None)["id"]
+
+    def test_invalid_token_not_cached(self):
+        with self.assertRaises(ValueError):
+            decode_token_cached("garbage")
+        self.assertEqual(len(token_cache), 0)
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+
+from core.user_sets import IdSet, UserSetsCache
+from clock import FakeClock
+
+
+class TestIdSet(unittest.TestCase):
+    def test_membership_add_discard(self):
+        ids = IdSet([5, 1, 9, 5])
+        self.assertEqual(list(ids), [1, 5, 9])
+        self.assertIn(5, ids)
+        self.assertNotIn(4, ids)
+
+        ids.add(4)
+        ids.add(4)
+        ids.discard(9)
+        ids.discard(100)
+        self.assertEqual(list(ids), [1, 4, 5])
+
+    def test_eight_bytes_per_id(self):
+        self.assertEqual(IdSet(range(1000)).nbytes - IdSet().nbytes, 8000)
+
+
+class TestUserSetsCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = UserSetsCache(max_bytes=10_000, ttl=60, clock=self.clock)
+        self.loads = 0
+
+    async def loader(self, ids):
+        self.loads += 1
+        return ids
+
+    async def test_loaded_once(self):
+        first = await self.cache.load("liked", 1, lambda: self.loader([3, 2]))
+        second = await self.cache.load("liked", 1, lambda: self.loader([]))
+        self.assertIs(first, second)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    async def test_writes_update_cached_set(self):
+        await self.cache.load("liked", 1, lambda: self.loader([3]))
+        self.cache.add("liked", 1, 7)
+        self.cache.discard("liked", 1, 3)
+        self.cache.add("bought", 1, 7)  # не загружено — нечего обновлять
+
+        self.assertEqual(list(self.cache.get("liked", 1)), [7])
+        self.assertIsNone(self.cache.get("bought", 1))
+
+    async def test_lru_eviction_within_budget(self):
+        for user_id in range(3):
+            await self.cache.load("liked", user_id, lambda: self.loader(range(500)))
+        # 3 x 4200 байт не помещаются в 10 000: первый пользователь вытеснен
+        self.assertIsNone(self.cache.get("liked", 0))
+        self.assertIsNotNone(self.cache.get("liked", 2))
+        self.assertLessEqual(self.cache.bytes, self.cache.max_bytes)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    async def test_recently_read_user_survives(self):
+        await self.cache.load("liked", 0, lambda: self.loader(range(500)))
+        await self.cache.load("liked", 1, lambda: self.loader(range(500)))
+        self.cache.get("liked", 0)
+        await self.cache.load("liked", 2, lambda: self.loader(range(500)))
+        self.assertIsNotNone(self.cache.get("liked", 0))
+        self.assertIsNone(self.cache.get("liked", 1))
+
+    async def test_expires_after_ttl(self):
+        await self.cache.load("bought", 1, lambda: self.loader([1]))
+        self.clock.now = 61
+        self.assertIsNone(self.cache.get("bought", 1))
+        self.assertEqual(self.cache.bytes, 0)
+
+    async def test_write_during_load_is_not_cached(self):
+        release = asyncio.Event()
+
+        async def slow_loader():
+            await release.wait()
+            return [1]
+
+        load = asyncio.create_task(self.cache.load("liked", 1, slow_loader))
+        await asyncio.sleep(0)
+        self.cache.add("liked", 1, 2)
+        release.set()
+
+        self.assertEqual(list(await load), [1])
+        self.assertIsNone(self.cache.get("liked", 1))
+
+    async def test_load_started_before_write_is_not_cached(self):
+        first_release, second_release = asyncio.Event(), asyncio.Event()
+
+        async def loader(release, ids):
+            await release.wait()
+            return ids
+
+        first = asyncio.create_task(self.cache.load("liked", 1, lambda: loader(first_release, [1])))
+        await asyncio.sleep(0)
+        self.cache.add("liked", 1, 2)
+        second = asyncio.create_task(self.cache.load("liked", 1, lambda: loader(second_release, [1, 2])))
+        await asyncio.sleep(0)
+
+        first_release.set()
+        await first
+        self.assertIsNone(self.cache.get("liked", 1))
+
+        second_release.set()
+        await second
+        self.assertEqual(list(self.cache.get("liked", 1)), [1, 2])
+        self.assertEqual(self.cache._loading, {})
+
+    async def test_failed_load_is_not_cached(self):
+        ids = await self.cache.load("liked", 1, lambda: self.loader(None))
+        self.assertEqual(len(ids), 0)
+        self.assertIsNone(self.cache.get("liked", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()